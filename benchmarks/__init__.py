@@ -0,0 +1,15 @@
+"""Performance benchmarks of Magia. Run each benchmark as a module, e.g. `python -m benchmarks.signal_memory`."""
+import subprocess
+from os import PathLike
+from pathlib import Path
+
+
+def git_commit(directory: None | PathLike = None) -> None | str:
+    """Return the short hash of the commit checked out in the directory, which is the benchmarks by default."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S603, S607
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent if directory is None else directory,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,242 @@
+"""
+Scalability of the elaboration.
+
+Build synthetic designs, and measure the time of constructing the design, tracing all of its modules with
+`Module.trace`, and elaborating it with `Elaborator.to_string`, plus the peak memory measured by `tracemalloc`.
+Report the best time of each phase in seconds, and the peak memory in bytes, as JSON.
+
+The results can be compared against the results of another commit with `--baseline`,
+which reports the ratio of each metric to the baseline, i.e. > 1 is a regression.
+
+Usage: python -m benchmarks.elaboration [--scale SCALE] [--repeat REPEAT] [--output FILE] [--baseline FILE]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from math import isqrt
+from pathlib import Path
+
+from magia import Elaborator, Input, Memory, Module, Output
+from magia.gen import FSM
+
+from . import git_commit
+from .trace import XorTree
+
+
+class AdderChain(Module):
+    """A deep chain of adders."""
+
+    def __init__(self, count: int, **kwargs):
+        super().__init__(**kwargs)
+        self.io += Input("a", 16)
+        self.io += Output("q", 16)
+        net = self.io.a
+        for i in range(count):
+            net = net + (i & 0xFFFF)
+        self.io.q <<= net
+
+
+class Leaf(Module):
+    """A small module, which is specialized for each instance."""
+
+    def __init__(self, offset: int, **kwargs):
+        super().__init__(**kwargs)
+        self.io += Input("a", 8)
+        self.io += Output("q", 8)
+        self.io.q <<= (self.io.a + offset) ^ self.io.a
+
+
+class Group(Module):
+    """A chain of leaf instances."""
+
+    def __init__(self, count: int, **kwargs):
+        super().__init__(**kwargs)
+        self.io += Input("a", 8)
+        self.io += Output("q", 8)
+        net = self.io.a
+        for i in range(count):
+            inst = Leaf(i % 256).instance()
+            inst.io.a <<= net
+            net = inst.io.q
+        self.io.q <<= net
+
+
+class Hierarchy(Module):
+    """Groups of leaf modules, with `count` leaf instances in total."""
+
+    def __init__(self, count: int, **kwargs):
+        super().__init__(**kwargs)
+        self.io += Input("a", 8)
+        self.io += Output("q", 8)
+        groups = max(isqrt(count), 1)
+        net = self.io.a
+        for _ in range(groups):
+            inst = Group(count // groups).instance()
+            inst.io.a <<= net
+            net = inst.io.q
+        self.io.q <<= net
+
+
+class CaseRom(Module):
+    """A ROM of `count` entries, implemented by a case statement."""
+
+    def __init__(self, count: int, **kwargs):
+        super().__init__(**kwargs)
+        addr_width = max((count - 1).bit_length(), 1)
+        self.io += Input("addr", addr_width)
+        self.io += Output("q", 32)
+        self.io.q <<= self.io.addr.case(
+            {i: (i * 0x9E3779B1) & 0xFFFF_FFFF for i in range(count)},
+            default=0,
+        )
+
+
+class MemoryBank(Module):
+    """Memories with many read ports, of which the outputs are reduced by XOR."""
+
+    PORTS = 8
+
+    def __init__(self, count: int, **kwargs):
+        super().__init__(**kwargs)
+        self.io += Input("clk", 1)
+        self.io += Input("wen", 1)
+        self.io += Input("addr", 8)
+        self.io += Input("din", 16)
+        self.io += Output("q", 16)
+        net = self.io.din
+        for _ in range(max(count // self.PORTS, 1)):
+            mem = Memory(self.io.clk, 8, 16, r_port=self.PORTS, w_port=1)
+            mem.write_port().addr <<= self.io.addr
+            mem.write_port().din <<= net
+            mem.write_port().wen <<= self.io.wen
+            for i in range(self.PORTS):
+                mem.read_port(i).addr <<= self.io.addr + i
+                mem.read_port(i).en <<= 1
+                net = net ^ mem.read_port(i).dout
+        self.io.q <<= net
+
+
+class BigFSM(Module):
+    """A FSM of `count` states, which advances or returns to the first state on the inputs."""
+
+    def __init__(self, count: int, **kwargs):
+        super().__init__(**kwargs)
+        self.io += Input("clk", 1)
+        self.io += Input("rst", 1)
+        self.io += Input("go", 1)
+        self.io += Input("back", 1)
+        fsm = FSM()
+        fsm.add_states(**{f"s{i}": None for i in range(count)})
+        for i in range(count):
+            fsm.add_transitions(
+                (f"s{i}", "s0", self.io.back),
+                (f"s{i}", f"s{(i + 1) % count}", self.io.go),
+            )
+        state = fsm.generate("s0", self.io.clk, reset=self.io.rst)
+        self.io += Output("state", state.width)
+        self.io.state <<= state
+
+
+# Designs and their sizes at scale 1
+DESIGNS: dict[str, tuple[Callable[[int], Module], int]] = {
+    "adder_chain": (AdderChain, 20_000),
+    "xor_tree": (XorTree, 40_000),
+    "hierarchy": (Hierarchy, 10_000),
+    "case_rom": (CaseRom, 4_096),
+    "memory_bank": (MemoryBank, 1_024),
+    "fsm": (BigFSM, 1_000),
+}
+
+
+def trace_all(top: Module) -> int:
+    """Trace all the modules in the hierarchy of the top module, and return the number of traced objects."""
+    traced, modules, visited = 0, [top], {id(top)}
+    while modules:
+        module = modules.pop()
+        objs, insts = Module.trace(module._trace_roots())
+        traced += len(objs)
+        for inst in insts:
+            if id(inst.module) not in visited:
+                visited.add(id(inst.module))
+                modules.append(inst.module)
+    return traced
+
+
+def measure(design: Callable[[int], Module], size: int, repeat: int) -> dict[str, float | int]:
+    result = {"size": size}
+    timing = {"construct": [], "trace": [], "to_string": []}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        top = design(size)
+        timing["construct"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        result["objects"] = trace_all(top)
+        timing["trace"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        sv_code = Elaborator.to_string(top)
+        timing["to_string"].append(time.perf_counter() - start)
+        result["code_bytes"] = len(sv_code.encode())
+        del top, sv_code
+
+    result |= {phase: round(min(times), 4) for phase, times in timing.items()}
+
+    # Measure the memory separately, as tracemalloc slows down the allocations.
+    tracemalloc.start()
+    top = design(size)
+    Elaborator.to_string(top)
+    _, result["peak_memory"] = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result
+
+
+def compare(result: dict, baseline: dict) -> dict[str, dict[str, float]]:
+    """Return the ratio of each metric to the baseline, for the designs of the same size."""
+    ratios = {}
+    for name, metrics in result["designs"].items():
+        base = baseline["designs"].get(name)
+        if base is None or base["size"] != metrics["size"]:
+            continue
+        ratios[name] = {
+            metric: round(metrics[metric] / base[metric], 2)
+            for metric in ("construct", "trace", "to_string", "peak_memory")
+            if base.get(metric)
+        }
+    return ratios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="Scale the size of the designs.")
+    parser.add_argument("--repeat", type=int, default=3, help="Report the best time of the repeated runs.")
+    parser.add_argument("--designs", nargs="+", choices=list(DESIGNS), default=list(DESIGNS))
+    parser.add_argument("--output", type=Path, help="Write the results to the JSON file.")
+    parser.add_argument("--baseline", type=Path, help="Compare the results against a JSON file of the results.")
+    args = parser.parse_args()
+
+    result = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "scale": args.scale,
+        "designs": {
+            name: measure(DESIGNS[name][0], max(int(DESIGNS[name][1] * args.scale), 1), args.repeat)
+            for name in args.designs
+        },
+    }
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        result["baseline"] = {"commit": baseline.get("commit"), "ratio": compare(result, baseline)}
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(result, indent=2))
+    json.dump(result, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Memory footprint of signals.
+
+Report the average number of bytes allocated per net, measured by `tracemalloc`.
+
+The footprint before a change is measured by running the benchmark against the Magia package of another commit,
+checked out in a worktree, and saved as the baseline. Then `--baseline` reports the ratio to it, i.e. < 1 is a saving:
+    git worktree add /tmp/magia-baseline HEAD~1
+    python -m benchmarks.signal_memory --source /tmp/magia-baseline --output baseline.json
+    python -m benchmarks.signal_memory --baseline baseline.json
+
+Usage: python -m benchmarks.signal_memory [--count COUNT] [--source DIR] [--output FILE] [--baseline FILE]
+"""
+import argparse
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+from . import git_commit
+
+
+def signal_chain(count: int) -> list:
+    """Plain signals connected in a chain."""
+    from magia import Signal
+
+    nets = [Signal(8)]
+    for _ in range(count):
+        net = Signal(8)
+        net <<= nets[-1]
+        nets.append(net)
+    return nets
+
+
+def operation_chain(count: int) -> list:
+    """Binary operations connected in a chain."""
+    from magia import Signal
+
+    operand = Signal(8)
+    nets = [Signal(8)]
+    for _ in range(count):
+        nets.append(nets[-1] ^ operand)
+    return nets
+
+
+def bytes_per_net(build, count: int) -> float:
+    build(1)  # Import Magia and warm up its caches outside the measurement.
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    nets = build(count)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del nets
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=10_000, help="The number of nets to build.")
+    parser.add_argument("--source", type=Path, help="Measure the Magia package in the directory, e.g. a worktree.")
+    parser.add_argument("--output", type=Path, help="Write the results to the JSON file.")
+    parser.add_argument("--baseline", type=Path, help="Compare the results against a JSON file of the results.")
+    args = parser.parse_args()
+
+    if args.source is not None:
+        sys.path.insert(0, str(args.source.absolute()))
+    result = {
+        "commit": git_commit(args.source),
+        "net_count": args.count,
+        "bytes_per_net": {
+            build.__name__: round(bytes_per_net(build, args.count), 1)
+            for build in (signal_chain, operation_chain)
+        },
+    }
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        result["baseline"] = {
+            "commit": baseline.get("commit"),
+            "ratio": {
+                name: round(value / baseline["bytes_per_net"][name], 2)
+                for name, value in result["bytes_per_net"].items()
+                if baseline["bytes_per_net"].get(name)
+            },
+        }
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(result, indent=2))
+    json.dump(result, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Performance of `Module.trace`.
+
+Compare the worklist traversal of `Module.trace` against the previous level-by-level implementation.
+Report the best time of each implementation in seconds.
+Usage: python -m benchmarks.trace [NET_COUNT]
+"""
+import json
+import sys
+import timeit
+from collections import Counter
+
+from magia import Input, Module, Output
+from magia.assertions import AssertionCell
+from magia.memory import MemorySignal
+from magia.module import Instance
+from magia.signals import Signal, Synthesizable
+from magia.sva_manual import SVAManual
+
+
+def legacy_trace(trace_from: list[Synthesizable]) -> tuple[list[Synthesizable], list[Instance]]:
+    """`Module.trace` before the worklist rewrite: level-by-level dict merges, reversed at the end."""
+    traced_obj_id: set[int] = set()
+    traced_inst_id: set[int] = set()
+    traced_obj: list[Synthesizable] = []
+    traced_inst: list[Instance] = []
+    obj_to_be_traced: dict[int, Synthesizable] = {
+        id(obj): obj
+        for obj in trace_from
+    }
+
+    while obj_to_be_traced:
+        next_trace = {}
+        for obj_id, obj in obj_to_be_traced.items():
+            if obj_id in traced_obj_id:
+                continue
+            if not isinstance(obj, (Input, Output)):
+                traced_obj_id.add(obj_id)
+                traced_obj.append(obj)
+
+            match obj:
+                case Input():
+                    continue
+
+                case Output():
+                    owner_inst = obj.owner_instance
+                    if owner_inst is None:
+                        next_trace |= {
+                            id_sig: sig for sig in obj.drivers
+                            if (id_sig := id(sig)) not in traced_obj_id
+                        }
+                    else:
+                        if id(owner_inst) in traced_inst_id:
+                            continue
+                        traced_inst_id.add(id(owner_inst))
+                        traced_inst.append(owner_inst)
+                        # Trace the IO Ports of an instance.
+                        # Input port is driven by external signal, so we go for the driver.
+                        # Output port is an extra signal placeholder,
+                        # so we add the port itself and ensure the declaration exists.
+                        port_drivers = [
+                            port.driver() if port.is_input else port
+                            for port in owner_inst.io.values()
+                        ]
+                        next_trace |= {
+                            id_sig: sig for sig in port_drivers
+                            if (id_sig := id(sig)) not in traced_obj_id
+                        }
+
+                case MemorySignal() as obj_mem_sig:
+                    next_trace |= {
+                        id_sig: sig for sig in obj_mem_sig.drivers
+                        if (id_sig := id(sig)) not in traced_obj_id
+                    }
+
+                    obj_mem = obj_mem_sig.memory
+                    if id(obj_mem) in traced_obj_id:
+                        continue
+
+                    traced_obj_id.add(id(obj_mem))
+                    traced_obj.append(obj_mem)
+                    next_trace |= {
+                        id_sig: sig for sig in obj_mem.drivers
+                        if (id_sig := id(sig)) not in traced_obj_id
+                    }
+
+                case Signal() | SVAManual() | AssertionCell():
+                    next_trace |= {
+                        id_sig: sig for sig in obj.drivers
+                        if (id_sig := id(sig)) not in traced_obj_id
+                    }
+
+                case _:
+                    raise ValueError(f"Unsupported object type: {obj}")
+
+        obj_to_be_traced = next_trace
+
+    traced_obj.reverse()
+    traced_inst.reverse()
+
+    # Check if we have name conflict on the signals and instances
+    sig_name_counter = Counter(sig.name for sig in traced_obj)
+    inst_name_counter = Counter(inst.name for inst in traced_inst)
+    sig_conflicts = [name for name, cnt in sig_name_counter.items() if cnt > 1]
+    inst_conflicts = [name for name, cnt in inst_name_counter.items() if cnt > 1]
+    if sig_conflicts:
+        raise ValueError(f"Signal name conflict: {sig_conflicts}")
+    if inst_conflicts:
+        raise ValueError(f"Instance name conflict: {inst_conflicts}")
+
+    return traced_obj, traced_inst
+
+
+class OperationChain(Module):
+    """Binary operations connected in a chain."""
+
+    def __init__(self, count: int, **kwargs):
+        super().__init__(**kwargs)
+        self.io += Input("a", 8)
+        self.io += Output("q", 8)
+        net = self.io.a
+        for _ in range(count):
+            net = net ^ self.io.a
+        self.io.q <<= net
+
+
+class ReconvergentMesh(Module):
+    """Each net is driven by the previous two nets, so most nets are reached through multiple paths."""
+
+    def __init__(self, count: int, **kwargs):
+        super().__init__(**kwargs)
+        self.io += Input("a", 8)
+        self.io += Output("q", 8)
+        nets = [self.io.a, self.io.a + 1]
+        for _ in range(count):
+            nets.append(nets[-1] ^ nets[-2])
+        self.io.q <<= nets[-1]
+
+
+class XorTree(Module):
+    """Balanced reduction tree of XOR operations."""
+
+    def __init__(self, count: int, **kwargs):
+        super().__init__(**kwargs)
+        self.io += Input("a", 8)
+        self.io += Output("q", 8)
+        nets = [self.io.a + i % 256 for i in range(count // 2)]
+        while len(nets) > 1:
+            nets = [x ^ y for x, y in zip(nets[::2], nets[1::2])] + nets[len(nets) // 2 * 2:]
+        self.io.q <<= nets[0]
+
+
+def compare(module: Module, repeat: int = 3) -> dict[str, float]:
+    roots = module._trace_roots()
+    new_objs, new_insts = Module.trace(roots)
+    old_objs, old_insts = legacy_trace(roots)
+    if set(map(id, new_objs)) != set(map(id, old_objs)) or set(map(id, new_insts)) != set(map(id, old_insts)):
+        raise RuntimeError("Traced objects differ between the implementations.")
+    legacy = min(timeit.repeat(lambda: legacy_trace(roots), number=1, repeat=repeat))
+    worklist = min(timeit.repeat(lambda: Module.trace(roots), number=1, repeat=repeat))
+    return {
+        "objects": len(new_objs),
+        "legacy": round(legacy, 4),
+        "worklist": round(worklist, 4),
+        "speedup": round(legacy / worklist, 2),
+    }
+
+
+def main(count: int = 100_000):
+    result = {
+        design.__name__: compare(design(count))
+        for design in (OperationChain, ReconvergentMesh, XorTree)
+    }
+    json.dump({"net_count": count, "trace_seconds": result}, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -3,24 +3,54 @@ Core Magia package.
 
 This index shall only import modules from this level of the package.
 Sub-packages (e.g. magia.std, etc.) shall be imported in their respective __init__.py files.
+
+The Elaborator and ExternalModule are imported on their first access, see `__getattr__`,
+so constructing modules does not pay for multiprocessing and the hdlConvertor extension.
 """
 
+from importlib import import_module
 from importlib.util import find_spec
+from typing import TYPE_CHECKING
 
 from . import factory
 from .bundle import Bundle, BundleSpec, BundleType
 from .constant import Constant
-from .elaborator import Elaborator
 from .io_ports import IOPorts
 from .io_signal import Input, Output
 from .memory import Memory
 from .module import Instance, Module, VerilogWrapper
 from .register import Register
-from .signals import CodeSectionType, Signal
+from .signals import CallStackMode, CodeSectionType, Signal
 
-if find_spec("hdlConvertor") is not None:
+if TYPE_CHECKING:
+    from .elaborator import Elaborator
     from .external import ExternalModule
-else:
+
+# Attributes imported on their first access, and the modules defining them.
+_LAZY_ATTRS = {
+    "Elaborator": ".elaborator",
+    "ExternalModule": ".external",
+}
+
+
+def __getattr__(name: str):
+    """Import the attributes in `_LAZY_ATTRS` on their first access."""
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if name == "ExternalModule" and find_spec("hdlConvertor") is None:
+        value = _disabled_external_module()
+    else:
+        value = getattr(import_module(_LAZY_ATTRS[name], __name__), name)
+    # Cached as a global, so `__getattr__` is not called again.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY_ATTRS})
+
+
+def _disabled_external_module() -> type:
     # HDLConvertor is not installed. Disable ExternalModule.
     class ExternalModule:
         ERROR = NotImplementedError("ExternalModule is disabled. Install hdlConvertor to enable it.")
@@ -39,6 +69,8 @@ else:
         def from_code(cls, sv_code, top_name):
             raise cls.ERROR
 
+    return ExternalModule
+
 """
 Basic Signal Objects
 """
@@ -67,6 +99,7 @@ __all__ += [
     "ExternalModule",
     "VerilogWrapper",
     "CodeSectionType",
+    "CallStackMode",
 ]
 
 """
@@ -0,0 +1,6 @@
+"""Run the command-line entry point, e.g. `python -m magia package.module:Class`."""
+import sys
+
+from .cli import main
+
+sys.exit(main())
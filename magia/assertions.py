@@ -43,8 +43,6 @@ class AssertionCellConfig:
 class AssertionCell(Synthesizable):
     """Assertion Cells for Formal Verification."""
 
-    assertion_counter = 0
-
     def __init__(
             self,
             name: None | str,
@@ -67,8 +65,7 @@ class AssertionCell(Synthesizable):
         if isinstance(assertion_type, str):
             assertion_type = AssertionType(assertion_type)
         if name is None:
-            name = f"{assertion_type.value}_autogen_{AssertionCell.assertion_counter}"
-            AssertionCell.assertion_counter += 1
+            name = ModuleContext().allocate_name(f"{assertion_type.value}_autogen")
 
         self.config = AssertionCellConfig(
             name=name,
@@ -0,0 +1,247 @@
+"""
+Command-line entry point of the elaboration.
+
+Elaborate a module class, specialized by the parameters given on the command line or in a TOML / JSON file.
+
+Usage: magia package.module:Class [-p width=16] [--params params.toml] [-o output_dir] [-j 8] ...
+
+With `--serve SOCKET`, a warm elaboration daemon is started instead, see `magia.daemon`.
+With `--connect SOCKET`, the command line is run by the daemon.
+
+The elaborator and the target are imported after the arguments are parsed,
+so `magia --help` and invalid command lines do not pay for them.
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import importlib
+import json
+import os
+import sys
+from collections.abc import Sequence
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .elab_cache import ElaborationCache
+
+
+class UsageError(ValueError):
+    """Invalid command line, e.g. the target or the parameters cannot be resolved."""
+
+
+def parse_value(text: str) -> object:
+    """Parse a parameter value as a Python literal (e.g. `16`, `True`, `(1, 2)`), or keep it as a string."""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def load_params(filename: Path) -> dict[str, object]:
+    """Load the parameters from a TOML or JSON file, which maps the parameter names to their values."""
+    try:
+        if filename.suffix == ".toml":
+            try:
+                import tomllib
+            except ModuleNotFoundError as e:
+                raise UsageError("Reading TOML requires Python 3.11 or later, use a JSON file instead.") from e
+            with filename.open("rb") as f:
+                params = tomllib.load(f)
+        else:
+            params = json.loads(filename.read_text())
+    except (OSError, ValueError) as e:
+        raise UsageError(f"Cannot read the parameters from {filename}: {e}") from e
+    if not isinstance(params, dict):
+        raise UsageError(f"Parameters in {filename} must be a table / object, got {type(params).__name__}")
+    return params
+
+
+def resolve_target(target: str) -> type:
+    """Import the class referred by `package.module:Class`. Nested classes are referred by `Outer.Inner`."""
+    module_name, sep, qualname = target.partition(":")
+    if not sep or not module_name or not qualname:
+        raise UsageError(f"Target must be in the form of package.module:Class, got {target!r}")
+    try:
+        obj = importlib.import_module(module_name)
+    except ModuleNotFoundError as e:
+        if e.name is None or not module_name.startswith(e.name):
+            raise  # Raised by the imported module
+        raise UsageError(f"Cannot import {module_name}: {e}") from e
+    for attr in qualname.split("."):
+        if not hasattr(obj, attr):
+            raise UsageError(f"{target} is not found: {obj.__name__} has no attribute {attr!r}")
+        obj = getattr(obj, attr)
+    return obj
+
+
+@contextmanager
+def _import_path(directory: str):
+    """Import the modules from the directory within the context, which is removed from `sys.path` on exit."""
+    if directory in sys.path:
+        yield
+        return
+    sys.path.insert(0, directory)
+    try:
+        yield
+    finally:
+        sys.path.remove(directory)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="magia",
+        description="Elaborate a Magia module into SystemVerilog.",
+    )
+    parser.add_argument(
+        "target", nargs="?", help="The module class to be elaborated, in the form of package.module:Class.",
+    )
+    parser.add_argument(
+        "-p", "--param", action="append", default=[], metavar="NAME=VALUE",
+        help="A parameter of the module. Values are parsed as Python literals, or strings otherwise. "
+             "Overrides the parameters in --params.",
+    )
+    parser.add_argument("--params", type=Path, metavar="FILE", help="A TOML or JSON file of the parameters.")
+    parser.add_argument("--name", help="The name of the top module.")
+
+    output = parser.add_argument_group("output")
+    output.add_argument(
+        "-o", "--output-dir", type=Path,
+        help="Write the code of each module to the directory, see Elaborator.to_files. "
+             "The code is written to stdout if it is not specified.",
+    )
+    output.add_argument("-f", "--force", action="store_true", help="Overwrite the files in the output directory.")
+    output.add_argument(
+        "--incremental", action="store_true", help="Write only the files with changed content to the output directory.",
+    )
+    output.add_argument(
+        "--manifest", metavar="FILE", help="Write the manifest of the files, relative to the output directory.",
+    )
+
+    elaboration = parser.add_argument_group("elaboration")
+    elaboration.add_argument("--top-only", action="store_true", help="Skip the submodules of the top module.")
+    elaboration.add_argument("-j", "--jobs", type=int, default=1, help="The number of worker processes.")
+    elaboration.add_argument("--cache-dir", type=Path, help="The directory of the elaboration cache.")
+    elaboration.add_argument("--dedup", action="store_true", help="Merge the modules with identical structure.")
+    elaboration.add_argument(
+        "--naming-by-params", action="store_true",
+        help="Name the modules by their class and parameters, which are stable across runs.",
+    )
+    elaboration.add_argument("--profile", type=Path, metavar="FILE", help="Write the elaboration profile as JSON.")
+
+    daemon = parser.add_argument_group("daemon").add_mutually_exclusive_group()
+    daemon.add_argument(
+        "--serve", type=Path, metavar="SOCKET",
+        help="Run the elaboration daemon on the Unix socket, with the cache in the memory backed by --cache-dir.",
+    )
+    daemon.add_argument("--connect", type=Path, metavar="SOCKET", help="Run the command line by the daemon.")
+    return parser
+
+
+def _daemon_argv(argv: Sequence[str]) -> list[str]:
+    """Remove the --connect option from the command line, which is forwarded to the daemon."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--connect")
+    _, forwarded = parser.parse_known_args(argv)
+    return forwarded
+
+
+def connect(args: argparse.Namespace, argv: Sequence[str]) -> int:
+    from .daemon import request
+
+    if args.target is None:
+        raise UsageError("the target is required")
+    try:
+        response = request(args.connect, _daemon_argv(argv))
+    except OSError as e:
+        raise UsageError(f"Cannot connect to the elaboration daemon on {args.connect}: {e}") from e
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["status"]
+
+
+def serve(args: argparse.Namespace):
+    from .daemon import ElaborationDaemon
+
+    if args.target is not None:
+        raise UsageError("--serve does not take a target, which is given by each --connect")
+    ElaborationDaemon(args.serve, cache_dir=args.cache_dir).serve_forever()
+
+
+def run(args: argparse.Namespace, cache: None | ElaborationCache = None):
+    if args.target is None:
+        raise UsageError("the target is required")
+    params = {} if args.params is None else load_params(args.params)
+    for param in args.param:
+        name, sep, value = param.partition("=")
+        if not sep or not name:
+            raise UsageError(f"Parameter must be in the form of NAME=VALUE, got {param!r}")
+        params[name.strip()] = parse_value(value.strip())
+    if args.name is not None:
+        params["name"] = args.name
+    if args.manifest is not None and args.output_dir is None:
+        raise UsageError("--manifest requires --output-dir")
+
+    from .elaborator import Elaborator
+    from .module import Module
+
+    module_class = resolve_target(args.target)
+    if not (isinstance(module_class, type) and issubclass(module_class, Module)):
+        raise UsageError(f"{args.target} is not a subclass of Module")
+
+    profiling = nullcontext() if args.profile is None else Elaborator.profile()
+    with Module.naming_by_params(args.naming_by_params), profiling as profiler:
+        top = module_class(**params)
+        options = {
+            "top_only": args.top_only, "jobs": args.jobs, "cache_dir": args.cache_dir if cache is None else cache,
+        }
+        if args.output_dir is not None:
+            Elaborator.to_files(
+                args.output_dir, top, force=args.force, dedup=args.dedup,
+                incremental=args.incremental, manifest=args.manifest, **options,
+            )
+        elif args.dedup:
+            sys.stdout.write(Elaborator.to_string(top, dedup=True, **options))
+            sys.stdout.write("\n")
+        else:
+            # Same as `to_string`, but written once each module is elaborated.
+            for i, (_, sv_code) in enumerate(Elaborator.to_stream(top, **options)):
+                if i:
+                    sys.stdout.write("\n\n")
+                sys.stdout.write(sv_code)
+            sys.stdout.write("\n")
+
+    if profiler is not None:
+        profiler.to_json(args.profile)
+
+
+def main(argv: None | Sequence[str] = None, cache: None | ElaborationCache = None) -> int:
+    """
+    Run the command line.
+
+    Invalid command lines exit with status 2, as argparse.
+    Errors raised by the design propagate with their traceback.
+
+    :param argv: The arguments, excluding the program name. `sys.argv[1:]` if it is None.
+    :param cache: The elaboration cache kept by the daemon, which replaces --cache-dir.
+    :returns: The exit code.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        if cache is not None and (args.connect is not None or args.serve is not None):
+            raise UsageError("--connect and --serve are not supported by the daemon")
+        if args.connect is not None:
+            return connect(args, argv)
+        if args.serve is not None:
+            serve(args)
+        else:
+            # The target is resolved from the working directory, as `python -m`.
+            with _import_path(os.getcwd()):
+                run(args, cache)
+    except UsageError as e:
+        parser.error(str(e))
+    return 0
@@ -1,15 +1,25 @@
 """This module provides the basic unary/binary combinational operations for the digital design."""
 from __future__ import annotations
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
 from string import Template
+from types import MappingProxyType
+from typing import TYPE_CHECKING
 
 from .constant import Constant
 from .data_struct import OPType
-from .signals import Signal
+from .signals import Signal, Synthesizable, compile_template
+from .utils import ModuleContext
 
+if TYPE_CHECKING:
+    from collections.abc import Mapping
 
-@dataclass
+    from .module import Module
+
+
+@dataclass(slots=True)
 class OperationConfig:
     slicing: None | slice = None
     shifting: None | int = None
@@ -99,38 +109,173 @@ OP_SIGN_INFERENCE = {
 }
 OP_BLOCK_TEMPLATE = Template("always_comb\n  $op_impl")
 
+# Expressions of the operations, for inlining the operations into the operands of another operation.
+OP_EXPR_TEMPLATE = {
+    op_type: Template(template.template.removeprefix("$output = ").removesuffix(";"))
+    for op_type, template in OP_IMPL_TEMPLATE.items()
+}
+OP_EXPR_FORMAT = {op_type: compile_template(template) for op_type, template in OP_EXPR_TEMPLATE.items()}
+OP_BLOCK_FORMAT = compile_template(OP_BLOCK_TEMPLATE)
+# Signedness of the expressions in SystemVerilog, which is signed only if all operands are signed.
+OP_EXPR_SIGN = {
+    OPType.NOT: lambda x, y: x.signed,
+    OPType.OR: lambda x, y: x.signed and y.signed,
+    OPType.AND: lambda x, y: x.signed and y.signed,
+    OPType.XOR: lambda x, y: x.signed and y.signed,
+    OPType.ADD: lambda x, y: x.signed and y.signed,
+    OPType.MINUS: lambda x, y: x.signed and y.signed,
+    OPType.MUL: lambda x, y: x.signed and y.signed,
+
+    OPType.LSHIFT: lambda x, y: x.signed,
+    OPType.RSHIFT: lambda x, y: x.signed,
+    OPType.ALSHIFT: lambda x, y: x.signed,
+    OPType.ARSHIFT: lambda x, y: x.signed,
+}
+# Operations of which the width of the expression does not depend on the context.
+OP_SELF_DETERMINED = frozenset((
+    OPType.EQ, OPType.NEQ, OPType.LT, OPType.LE, OPType.GT, OPType.GE,
+    OPType.ANY, OPType.ALL, OPType.PARITY, OPType.CONCAT, OPType.SLICE,
+))
+
+
+# Options set by `Operation.structural_sharing` and `Operation.inlining`, or None for the global options.
+_scoped_structural_sharing: ContextVar[None | bool] = ContextVar("scoped_structural_sharing", default=None)
+_scoped_inlining: ContextVar[None | bool] = ContextVar("scoped_inlining", default=None)
+
 
 class Operation(Signal):
     """Representing a simply unary/binary operation."""
 
+    __slots__ = ("_op_config",)
+
+    _structural_sharing = False
+    _inlining = False
+
     def __init__(self, width: int, op_type: OPType, signed: bool = False, **kwargs):
         super().__init__(width=width, signed=signed, **kwargs)
         self.signal_config.op_type = op_type
         self._op_config = OperationConfig()
 
-    def elaborate(self) -> str:
-        """Declare the signal and elaborate the operation in the module implementation."""
+    @classmethod
+    @contextmanager
+    def structural_sharing(cls, enable: bool = True):
+        """
+        Share structurally identical operations created within this context manager.
+
+        Creating an operation with the same type and operands as an existing one in the same module
+        returns the existing operation, instead of creating a new net.
+        Operations renamed, resized or annotated after creation are not shared.
+        As an operation may be shared by multiple expressions, avoid modifying it with `set_width()`, etc.
+        Hit and miss statistics are recorded in `Module.operation_pool_stats`.
+        The option is local to the current thread or asyncio task.
+
+        :param enable: Enable or disable the sharing.
+        """
+        token = _scoped_structural_sharing.set(enable)
+        try:
+            yield
+        finally:
+            _scoped_structural_sharing.reset(token)
+
+    @classmethod
+    def set_structural_sharing(cls, enable: bool):
+        """Enable or disable the sharing of structurally identical operations globally, outside of the contexts."""
+        Operation._structural_sharing = enable
+
+    @classmethod
+    @property
+    def structural_sharing_enabled(cls) -> bool:
+        if (enabled := _scoped_structural_sharing.get()) is None:
+            return Operation._structural_sharing
+        return enabled
+
+    @classmethod
+    @contextmanager
+    def inlining(cls, enable: bool = True):
+        """
+        Inline the operations into the expressions of the operations using them, when elaborated in this context.
+
+        An operation is inlined if it is used by a single operation only (except slicing),
+        and its name is not given by the user, nor it is annotated.
+        The inlined operands are cast to the width and signedness of the operations,
+        so the inlined expressions produce the same result as the individual nets.
+        The option is local to the current thread or asyncio task.
+
+        :param enable: Enable or disable the inlining.
+        """
+        token = _scoped_inlining.set(enable)
+        try:
+            yield
+        finally:
+            _scoped_inlining.reset(token)
+
+    @classmethod
+    def set_inlining(cls, enable: bool):
+        """Enable or disable the inlining of operations globally, outside of the contexts."""
+        Operation._inlining = enable
+
+    @classmethod
+    @property
+    def inlining_enabled(cls) -> bool:
+        if (enabled := _scoped_inlining.get()) is None:
+            return Operation._inlining
+        return enabled
+
+    def expression(self, inlined: Mapping[int, str] = MappingProxyType({})) -> str:
+        """
+        Return the SystemVerilog expression of the operation.
+
+        :param inlined: Expressions of the inlined operands, keyed by the id of the operands.
+        """
+        operands = {
+            driver_name: inlined.get(id(driver)) or driver.name
+            for driver_name, driver in self._drivers.items()
+        }
+        if self.signal_config.op_type in (OPType.NOT, OPType.PARITY) and id(self._drivers["a"]) in inlined:
+            # Parenthesize the operand of unary operators, or `~8'(x)` may be parsed as a cast of size `~8`
+            operands["a"] = f"({operands['a']})"
+        impl_params = {"a": operands["a"]}
+
+        if operands.get("b") is not None:
+            impl_params["b"] = operands["b"]
+
+        # Slicing Operator
+        if self._op_config.slicing is not None:
+            impl_params["slice_start"] = self._op_config.slicing.start
+            impl_params["slice_stop"] = self._op_config.slicing.stop
+
+        # Shifting Operator
+        if self._op_config.shifting is not None:
+            impl_params["b"] = self._op_config.shifting
+
+        return OP_EXPR_FORMAT[self.signal_config.op_type](**impl_params)
+
+    def inline_expression(self, inlined: Mapping[int, str] = MappingProxyType({})) -> str:
+        """
+        Return the expression of the operation, to be inlined as an operand of another operation.
+
+        The expression is cast to the width and signedness of the operation if needed.
+        """
+        op_type, x, y = self.signal_config.op_type, self._drivers["a"], self._drivers.get("b")
+        expr = self.expression(inlined)
+        y = self._op_config.slicing if op_type == OPType.SLICE else y
+        if op_type not in OP_SELF_DETERMINED or OP_WIDTH_INFERENCE[op_type](x, y) != self.width:
+            expr = f"{self.width}'({expr})"
+        elif op_type != OPType.SLICE:
+            expr = f"({expr})"
+        if OP_EXPR_SIGN.get(op_type, lambda *_: False)(x, y) != self.signed:
+            expr = f"{'signed' if self.signed else 'unsigned'}'({expr})"
+        return expr
+
+    def elaborate(self, inlined: Mapping[int, str] = MappingProxyType({})) -> str:
+        """
+        Declare the signal and elaborate the operation in the module implementation.
+
+        :param inlined: Expressions of the inlined operands, keyed by the id of the operands.
+        """
         op_impl = ""
         if self.signal_config.op_type in OP_IMPL_TEMPLATE:
-            impl_params = {
-                "output": self.name,
-                "a": self._drivers["a"].name,
-            }
-
-            if self._drivers.get("b") is not None:
-                impl_params["b"] = self._drivers["b"].name
-
-            # Slicing Operator
-            if self._op_config.slicing is not None:
-                impl_params["slice_start"] = self._op_config.slicing.start
-                impl_params["slice_stop"] = self._op_config.slicing.stop
-
-            # Shifting Operator
-            if self._op_config.shifting is not None:
-                impl_params["b"] = self._op_config.shifting
-
-            op_impl = OP_IMPL_TEMPLATE[self.signal_config.op_type].substitute(**impl_params)
-            op_impl = OP_BLOCK_TEMPLATE.substitute(op_impl=op_impl)
+            op_impl = OP_BLOCK_FORMAT(op_impl=f"{self.name} = {self.expression(inlined)};")
 
         return op_impl
 
@@ -153,7 +298,7 @@ class Operation(Signal):
                 raise TypeError("Shifting Operator only support constant shifting with integer.")
         else:
             if isinstance(y, (int, bytes)):
-                y = Constant(y, x.width, x.signed)
+                y = Constant.pooled(y, x.width, x.signed)
             if not isinstance(y, Signal) and y is not None:
                 raise TypeError(f"Cannot perform operation on {type(y).__name__}")
 
@@ -178,9 +323,18 @@ class Operation(Signal):
                     OPType.ARSHIFT: OPType.RSHIFT,
                 }.get(op_type, op_type)
 
+        width = OP_WIDTH_INFERENCE[op_type](x, y)
+        signed = OP_SIGN_INFERENCE[op_type](x, y)
+
+        module, key = None, None
+        if Operation.structural_sharing_enabled and (module := ModuleContext().current) is not None:
+            key = Operation._structural_key(op_type, x, y)
+            if (shared := Operation._shared_operation(module, key, width, signed)) is not None:
+                return shared
+
         new_op = Operation(
-            width=OP_WIDTH_INFERENCE[op_type](x, y),
-            signed=OP_SIGN_INFERENCE[op_type](x, y),
+            width=width,
+            signed=signed,
             op_type=op_type,
         )
         new_op._drivers["a"] = x
@@ -191,8 +345,34 @@ class Operation(Signal):
             new_op._op_config.slicing = y
         if op_type in (OPType.LSHIFT, OPType.RSHIFT, OPType.ALSHIFT, OPType.ARSHIFT):
             new_op._op_config.shifting = y
+
+        if key is not None:
+            module.operation_pool[key] = (new_op, new_op.name)
         return new_op
 
+    @staticmethod
+    def _structural_key(op_type: OPType, x: Signal, y: None | Signal | slice | int) -> tuple:
+        """Key identifying an operation by its type, operands and the current code section."""
+        match y:
+            case Signal():
+                operand = id(y)
+            case slice():
+                operand = (y.start, y.stop)
+            case _:
+                operand = y
+        return op_type, id(x), operand, Synthesizable.current_code_section
+
+    @staticmethod
+    def _shared_operation(module: Module, key: tuple, width: int, signed: bool) -> None | Operation:
+        """Look up an identical operation in the module, which is not modified since its creation."""
+        if (entry := module.operation_pool.get(key)) is not None:
+            shared, name = entry
+            if shared.name == name and shared.width == width and shared.signed == signed and not shared.annotated:
+                module.operation_pool_stats.hits += 1
+                return shared
+        module.operation_pool_stats.misses += 1
+        return None
+
     @staticmethod
     def _legalize_slice(driver: Signal, slice_: slice):
         if slice_.step is not None:
@@ -2,11 +2,15 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from string import Template
+from typing import TYPE_CHECKING
 
 from .constant import Constant
 from .data_struct import OPType
 from .factory import constant_like
-from .signals import Signal
+from .signals import Signal, compile_template
+
+if TYPE_CHECKING:
+    from collections.abc import Collection
 
 IF_ELSE_TEMPLATE = Template(
     "always_comb\n"
@@ -24,9 +28,12 @@ CASE_ITEM_TEMPLATE = Template(
     "    $selector_value: $output = $driver;"
 )
 CASE_DEFAULT_VALUE_DRIVER = "default"
+IF_ELSE_FORMAT = compile_template(IF_ELSE_TEMPLATE)
+CASE_FORMAT = compile_template(CASE_TEMPLATE)
+CASE_ITEM_FORMAT = compile_template(CASE_ITEM_TEMPLATE)
 
 
-@dataclass
+@dataclass(slots=True)
 class CaseConfig:
     unique: bool = False
     default: None | Signal = None
@@ -35,6 +42,8 @@ class CaseConfig:
 class When(Signal):
     """Representing an if-else statement."""
 
+    __slots__ = ()
+
     def __init__(self, condition: Signal, if_true: Signal, if_false: None | Signal | int | bytes, **kwargs):
         super().__init__(width=if_true.width, signed=if_true.signed, **kwargs)
         self.signal_config.op_type = OPType.WHEN
@@ -52,7 +61,7 @@ class When(Signal):
         self._drivers["d_false"] = if_false
 
     def elaborate(self) -> str:
-        return IF_ELSE_TEMPLATE.substitute(
+        return IF_ELSE_FORMAT(
             output=self.name,
             condition=self._drivers["condition"].name,
             if_true=self._drivers[self.DEFAULT_DRIVER].name,
@@ -73,6 +82,8 @@ class Case(Signal):
     before the creation of the Operation.
     """
 
+    __slots__ = ("_cases", "_case_config")
+
     def __init__(
             self, selector: Signal, cases: dict[int, Signal | int],
             default: None | Signal | int = None,
@@ -128,19 +139,32 @@ class Case(Signal):
     def _driver_name(case: int) -> str:
         return f"case_{case}"
 
-    def elaborate(self) -> str:
+    def elaborate(self, reachable: None | Collection[int] = None) -> str:
+        """
+        Elaborate the case statement.
+
+        :param reachable: The selector values which can be selected. Other case arms are dropped if specified.
+        """
         def driver_value(sig_or_const: None | Signal | int) -> str:
             if isinstance(sig_or_const, Signal):
                 return sig_or_const.name
             return Constant.sv_constant(sig_or_const, self.width, self.signed)
 
+        cases, unique, default = self._cases, self._case_config.unique, self._case_config.default
+        if reachable is not None:
+            cases = {sel_value: cases[sel_value] for sel_value in reachable}
+            if unique and len(cases) < len(self._cases):
+                # The last reachable arm becomes the default, so the case statement is still complete
+                *items, (_, default) = cases.items()
+                cases, unique = dict(items), False
+
         case_table = []
 
-        for selector_value, driver in self._cases.items():
+        for selector_value, driver in cases.items():
             driver = driver.name if isinstance(driver, Signal) else Constant.sv_constant(driver, self.width,
                                                                                          self.signed)
             case_table.append(
-                CASE_ITEM_TEMPLATE.substitute(
+                CASE_ITEM_FORMAT(
                     selector_value=Constant.sv_constant(
                         selector_value,
                         self._drivers[self.DEFAULT_DRIVER].width, False
@@ -150,17 +174,17 @@ class Case(Signal):
                 )
             )
 
-        if not self._case_config.unique:
+        if not unique:
             case_table.append(
-                CASE_ITEM_TEMPLATE.substitute(
+                CASE_ITEM_FORMAT(
                     selector_value="default",
                     output=self.name,
-                    driver=driver_value(self._case_config.default),
+                    driver=driver_value(default),
                 )
             )
 
-        return CASE_TEMPLATE.substitute(
+        return CASE_FORMAT(
             selector=self._drivers[self.DEFAULT_DRIVER].name,
             cases="\n".join(case_table),
-            unique="unique" if self._case_config.unique else "",
+            unique="unique" if unique else "",
         )
@@ -0,0 +1,400 @@
+"""
+Constant folding and dead-logic elimination on the netlist of a module.
+
+The pass runs before emitting the SystemVerilog code of a module, without modifying the objects of the module.
+Each node is either kept, replaced by a constant or another signal, or removed if it drives nothing after folding.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .comb_ops import OP_EXPR_SIGN, Operation
+from .comb_select import Case, When
+from .constant import Constant
+from .data_struct import OPType
+from .netlist import AUTO_NAME_PATTERN, NodeKind
+from .signals import Signal
+
+if TYPE_CHECKING:
+    from .netlist import Netlist
+
+
+def _mask(width: int) -> int:
+    return (1 << width) - 1
+
+
+def _to_signed(raw: int, width: int) -> int:
+    """Interpret the bits as a two's complement number."""
+    return raw - (1 << width) if width and raw >> (width - 1) & 1 else raw
+
+
+def _extend(raw: int, width: int, signed: bool, to_width: int) -> int:
+    """Sign-extend or zero-extend the bits, then truncate them to `to_width` bits."""
+    return (_to_signed(raw, width) if signed else raw) & _mask(to_width)
+
+
+def _constant_bits(const: Constant) -> None | int:
+    """Return the bits of a constant, or None if the value is unknown."""
+    value = const.value
+    if isinstance(value, bytes):
+        value = int.from_bytes(value, byteorder="big")
+    return None if value is None else value & _mask(const.width)
+
+
+def _is_auto_named(obj: Signal) -> bool:
+    return AUTO_NAME_PATTERN.fullmatch(obj.name or "") is not None
+
+
+@dataclass(slots=True)
+class FoldResult:
+    """Result of the constant folding of a module."""
+
+    # Nodes replaced by a constant or another signal, and the expression driving them
+    replaced: dict[int, str] = field(default_factory=dict)
+    # Nodes referred by the replacements
+    referred: set[int] = field(default_factory=set)
+    # Case nodes with unreachable arms, and the reachable selector values
+    reachable_cases: dict[int, list[int]] = field(default_factory=dict)
+    # Nodes which drive nothing after folding
+    removed: set[int] = field(default_factory=set)
+
+
+class ConstantFolding:
+    """
+    Fold constant expressions and simplify identities in the netlist of a module.
+
+    The pass performs:
+    - Evaluating operations, if-else and case statements with constant operands.
+    - Simplifying identities, e.g. `x | 0`, `x & 0`, `x & '1`, `~~x`, and if-else with constant conditions.
+    - Dropping case arms which cannot be selected, as the known bits of the selector do not match them.
+    - Removing the nets, registers and memories which drive nothing after folding.
+
+    Instances, assertions, and the signals named by the user or annotated are never removed.
+    """
+
+    _enabled = False
+
+    def __init__(self, netlist: Netlist):
+        self.netlist = netlist
+        self.node_of = {id(obj): node for node, obj in enumerate(netlist.objects)}
+
+        # Bits of the nodes with constant values
+        self.values: dict[int, int] = {}
+        # Signals which the nodes are replaced with
+        self.aliases: dict[int, Signal] = {}
+        # Known bits of the nodes: (mask, value)
+        self.known_bits: dict[int, tuple[int, int]] = {}
+        self.result = FoldResult()
+
+    @classmethod
+    @contextmanager
+    def enabled(cls, enable: bool = True):
+        """
+        Fold constants and remove dead logic when elaborating modules within this context manager.
+
+        The number of folded and removed nodes is recorded in `Module.fold_stats`.
+
+        :param enable: Enable or disable the pass.
+        """
+        prev_value, ConstantFolding._enabled = ConstantFolding._enabled, enable
+        try:
+            yield
+        finally:
+            ConstantFolding._enabled = prev_value
+
+    @classmethod
+    def set_enabled(cls, enable: bool):
+        """Enable or disable the pass globally."""
+        ConstantFolding._enabled = enable
+
+    def _node(self, obj: Signal) -> int:
+        """Return the node of an object, where output ports of instances are represented by the instance."""
+        node = self.node_of.get(id(obj))
+        return self.node_of[id(obj.owner_instance)] if node is None else node
+
+    def run(self) -> FoldResult:
+        """Fold the netlist in topological order, then remove the dead nodes."""
+        netlist = self.netlist
+        for node in netlist.traced_nodes:
+            obj = netlist.objects[node]
+            match obj:
+                case Constant() if type(obj) is Constant:
+                    if (bits := _constant_bits(obj)) is not None:
+                        self.values[node] = bits
+                        self.known_bits[node] = (_mask(obj.width), bits)
+                case Operation() if type(obj) is Operation:
+                    self._fold_operation(node, obj)
+                case When() if type(obj) is When:
+                    self._fold_when(node, obj)
+                case Case() if type(obj) is Case:
+                    self._fold_case(node, obj)
+                case Signal() if type(obj) is Signal and len(obj.drivers) == 1:
+                    self._set_alias(node, obj, obj.driver())
+
+        for node, bits in self.values.items():
+            obj = netlist.objects[node]
+            if not isinstance(obj, Constant):
+                value = _to_signed(bits, obj.width) if obj.signed else bits
+                self.result.replaced[node] = Constant.sv_constant(value, obj.width, obj.signed)
+        for node, target in self.aliases.items():
+            obj = netlist.objects[node]
+            if node not in self.values and not (type(obj) is Signal and target is obj.driver()):
+                self.result.replaced[node] = target.name
+                self.result.referred.add(self._node(target))
+
+        self._remove_dead_nodes()
+        return self.result
+
+    def _operand(self, obj: Signal) -> None | int:
+        """Return the bits of an operand, or None if it is not a constant."""
+        node = self.node_of.get(id(obj))
+        return None if node is None else self.values.get(node)
+
+    def _set_alias(self, node: int, obj: Signal, target: Signal):
+        """
+        Replace the node with the target signal.
+
+        The replacement is `assign obj = target;`, so the target is extended by its own signedness.
+        If the target is a constant or replaced by another signal of the same type, the replacement is propagated.
+        """
+        if (bits := self._operand(target)) is not None:
+            self.values[node] = _extend(bits, target.width, target.signed, obj.width)
+            return
+        alias = self.aliases.get(self.node_of.get(id(target)))
+        # Output ports of instances are referred by their placeholders in the module
+        if (
+                alias is not None and alias.owner_instance is None
+                and alias.width == target.width and alias.signed == target.signed
+        ):
+            target = alias
+        self.aliases[node] = target
+
+    def _fold_operation(self, node: int, op: Operation):
+        op_type, width = op.signal_config.op_type, op.width
+        x, y = op.driver("a"), op.driver("b")
+        a = self._operand(x)
+        b = None if y is None else self._operand(y)
+
+        match op_type:
+            case OPType.CONCAT:
+                mask_a, value_a = self._bits(x)
+                mask_b, value_b = self._bits(y)
+                if mask_a or mask_b:
+                    self.known_bits[node] = self._resized(
+                        (mask_a << y.width | mask_b, value_a << y.width | value_b), x.width + y.width, width,
+                    )
+            case OPType.SLICE:
+                start, stop = op._op_config.slicing.start, op._op_config.slicing.stop
+                mask_a, value_a = self._bits(x)
+                if mask_a:
+                    slice_mask = _mask(start - stop + 1)
+                    self.known_bits[node] = self._resized(
+                        (mask_a >> stop & slice_mask, value_a >> stop & slice_mask), start - stop + 1, width,
+                    )
+
+        if a is not None and (y is None or b is not None):
+            if (bits := self._evaluate(op, a, b)) is not None:
+                self.values[node] = bits
+                self.known_bits[node] = (_mask(width), bits)
+            return
+
+        if (result := self._simplify(op, x, y, a, b)) is not None:
+            if isinstance(result, int):
+                self.values[node] = result
+                self.known_bits[node] = (_mask(width), result)
+            else:
+                self._set_alias(node, op, result)
+
+    def _bits(self, obj: Signal) -> tuple[int, int]:
+        node = self.node_of.get(id(obj))
+        return (0, 0) if node is None else self.known_bits.get(node, (0, 0))
+
+    @staticmethod
+    def _resized(known_bits: tuple[int, int], natural_width: int, width: int) -> tuple[int, int]:
+        """Resize the known bits of an unsigned expression to the node, where the extended bits are zeros."""
+        mask, value = known_bits
+        return (mask | _mask(width) & ~_mask(natural_width)) & _mask(width), value & _mask(width)
+
+    @staticmethod
+    def _evaluate(op: Operation, a: int, b: None | int) -> None | int:
+        """Evaluate the operation with constant operands, following the SystemVerilog expression rules."""
+        op_type, width = op.signal_config.op_type, op.width
+        x, y = op.driver("a"), op.driver("b")
+
+        match op_type:
+            case OPType.NOT | OPType.AND | OPType.OR | OPType.XOR | OPType.ADD | OPType.MINUS | OPType.MUL:
+                signed = OP_EXPR_SIGN[op_type](x, y if y is not None else x)
+                ctx_width = max(width, x.width, 0 if y is None else y.width)
+                a = _extend(a, x.width, signed, ctx_width)
+                b = 0 if y is None else _extend(b, y.width, signed, ctx_width)
+                result = {
+                    OPType.NOT: lambda: ~a,
+                    OPType.AND: lambda: a & b,
+                    OPType.OR: lambda: a | b,
+                    OPType.XOR: lambda: a ^ b,
+                    OPType.ADD: lambda: a + b,
+                    OPType.MINUS: lambda: a - b,
+                    OPType.MUL: lambda: a * b,
+                }[op_type]()
+            case OPType.LSHIFT | OPType.ALSHIFT | OPType.RSHIFT | OPType.ARSHIFT:
+                shifting = op._op_config.shifting
+                ctx_width = max(width, x.width)
+                a = _extend(a, x.width, x.signed, ctx_width)
+                if op_type in (OPType.LSHIFT, OPType.ALSHIFT):
+                    result = a << shifting
+                elif op_type == OPType.ARSHIFT and x.signed:
+                    result = _to_signed(a, ctx_width) >> shifting
+                else:
+                    result = a >> shifting
+            case OPType.EQ | OPType.NEQ | OPType.LT | OPType.LE | OPType.GT | OPType.GE:
+                if x.signed and y.signed:
+                    a, b = _to_signed(a, x.width), _to_signed(b, y.width)
+                result = {
+                    OPType.EQ: a == b,
+                    OPType.NEQ: a != b,
+                    OPType.LT: a < b,
+                    OPType.LE: a <= b,
+                    OPType.GT: a > b,
+                    OPType.GE: a >= b,
+                }[op_type]
+            case OPType.ANY:
+                result = a != 0
+            case OPType.ALL:
+                result = a == _mask(x.width)
+            case OPType.PARITY:
+                result = a.bit_count() & 1
+            case OPType.CONCAT:
+                result = a << y.width | b
+            case OPType.SLICE:
+                start, stop = op._op_config.slicing.start, op._op_config.slicing.stop
+                result = a >> stop & _mask(start - stop + 1)
+            case _:
+                return None
+        return int(result) & _mask(width)
+
+    @staticmethod
+    def _simplify(
+            op: Operation, x: Signal, y: None | Signal, a: None | int, b: None | int,
+    ) -> None | int | Signal:
+        """
+        Simplify the identities of an operation with at most one constant operand.
+
+        :returns: The bits of the result if it is a constant, the signal it is equivalent to, or None.
+        """
+        op_type, width = op.signal_config.op_type, op.width
+
+        match op_type:
+            case OPType.LSHIFT | OPType.ALSHIFT | OPType.RSHIFT | OPType.ARSHIFT if op._op_config.shifting == 0:
+                return x
+            case OPType.NOT:
+                # ~~x is x, if the inner operation does not truncate or extend x
+                if (
+                        type(x) is Operation and x.signal_config.op_type == OPType.NOT
+                        and (inner := x.driver("a")).width == x.width and inner.signed == x.signed
+                        and (width <= x.width or x.signed)
+                ):
+                    return inner
+                return None
+            case OPType.AND | OPType.OR | OPType.XOR | OPType.ADD | OPType.MINUS | OPType.MUL:
+                pass
+            case _:
+                return None
+
+        signed = OP_EXPR_SIGN[op_type](x, y)
+        ctx_width = max(width, x.width, y.width)
+
+        def is_alias(signal: Signal) -> bool:
+            # The result is the operand itself, extended in the same way as the assignment does
+            return signed == signal.signed or width <= signal.width
+
+        if x is y:
+            match op_type:
+                case OPType.AND | OPType.OR if is_alias(x):
+                    return x
+                case OPType.XOR | OPType.MINUS:
+                    return 0
+            return None
+
+        if a is not None:
+            if op_type == OPType.MINUS:
+                return None
+            const, other = _extend(a, x.width, signed, ctx_width), y
+        elif b is not None:
+            const, other = _extend(b, y.width, signed, ctx_width), x
+        else:
+            return None
+
+        if const == 0:
+            match op_type:
+                case OPType.AND | OPType.MUL:
+                    return 0
+                case OPType.OR | OPType.XOR | OPType.ADD | OPType.MINUS if is_alias(other):
+                    return other
+        elif const == _mask(ctx_width):
+            match op_type:
+                case OPType.OR:
+                    return _mask(width)
+                case OPType.AND if is_alias(other):
+                    return other
+        elif const == 1 and op_type == OPType.MUL and is_alias(other):
+            return other
+        return None
+
+    def _fold_when(self, node: int, when: When):
+        condition = self._operand(when.driver("condition"))
+        if_true, if_false = when.driver(), when.driver("d_false")
+        if condition is not None:
+            self._set_alias(node, when, if_true if condition else if_false)
+        elif if_true is if_false:
+            self._set_alias(node, when, if_true)
+
+    def _fold_case(self, node: int, case: Case):
+        selector = case.driver()
+        mask, value = self._bits(selector)
+        if not mask:
+            return
+
+        reachable = [sel_value for sel_value in case._cases if sel_value & mask == value]
+        if mask == _mask(selector.width):
+            # Constant selector
+            driver = case._cases[reachable[0]] if reachable else case._case_config.default
+            if isinstance(driver, Signal):
+                self._set_alias(node, case, driver)
+            elif driver is not None:
+                bits = driver & _mask(case.width)
+                self.values[node] = bits
+                self.known_bits[node] = (_mask(case.width), bits)
+        elif len(reachable) < len(case._cases):
+            self.result.reachable_cases[node] = reachable
+
+    def _live_drivers(self, node: int) -> list[int]:
+        """Return the nodes driving a node after folding."""
+        if node in self.values:
+            return []
+        if (alias := self.aliases.get(node)) is not None:
+            return [self._node(alias)]
+        if (reachable := self.result.reachable_cases.get(node)) is not None:
+            case = self.netlist.objects[node]
+            drivers = [case.driver(), case._case_config.default]
+            drivers += [case._cases[sel_value] for sel_value in reachable]
+            return [self._node(driver) for driver in drivers if isinstance(driver, Signal)]
+        return list(self.netlist.drivers(node))
+
+    def _remove_dead_nodes(self):
+        netlist, kinds, objects = self.netlist, self.netlist.kind, self.netlist.objects
+        stack = [
+            node for node in range(len(netlist))
+            if kinds[node] in (NodeKind.OUTPUT, NodeKind.INSTANCE, NodeKind.SVA_MANUAL, NodeKind.ASSERTION)
+            or objects[node].annotated
+            or (isinstance(objects[node], Signal) and not _is_auto_named(objects[node]))
+        ]
+        live = set(stack)
+        while stack:
+            for driver in self._live_drivers(stack.pop()):
+                if driver not in live:
+                    live.add(driver)
+                    stack.append(driver)
+
+        self.result.removed = {node for node in netlist.traced_nodes if node not in live}
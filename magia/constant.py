@@ -5,16 +5,16 @@ The constant signal is elaborated as a SystemVerilog constant expression.
 """
 from __future__ import annotations
 
-from itertools import count
 from math import ceil
 
-from .signals import SIGNAL_ASSIGN_TEMPLATE, Signal
+from .signals import SIGNAL_ASSIGN_FORMAT, Signal, Synthesizable
+from .utils import ModuleContext
 
 
 class Constant(Signal):
     """Representing a constant signal. The value stored in bytes representing the constance driver."""
 
-    new_const_counter = count(0)
+    __slots__ = ("value",)
 
     def __init__(
             self,
@@ -23,16 +23,38 @@ class Constant(Signal):
             **kwargs
     ):
         if name is None:
-            name = f"const_{next(self.new_const_counter)}"
+            name = ModuleContext().allocate_name("const")
 
         super().__init__(width=width, signed=signed, name=name, **kwargs)
         self.value = value
 
+    @classmethod
+    def pooled(cls, value: int | bytes, width: int, signed: bool = False) -> Constant:
+        """
+        Return an anonymous constant shared with the same literals in the module being constructed.
+
+        Constants are interned by (value, width, signed) and the current code section,
+        so repeated literals result in a single net.
+        A new constant is created if there is no module under construction or the width is not yet defined.
+
+        The returned constant is shared, so it must not be modified in place.
+        A constant renamed, annotated or resized after its creation is no longer shared,
+        and the next literal of the same value gets a new constant.
+        """
+        if width == 0 or (module := ModuleContext().current) is None:
+            return cls(value, width, signed)
+
+        key = (value, width, signed, Synthesizable.current_code_section)
+        if (entry := module.constant_pool.get(key)) is not None:
+            const, name = entry
+            if const.name == name and const.width == width and const.signed == signed and not const.annotated:
+                return const
+        const = cls(value, width, signed)
+        module.constant_pool[key] = (const, const.name)
+        return const
+
     def elaborate(self) -> str:
-        return SIGNAL_ASSIGN_TEMPLATE.substitute(
-            name=self.name,
-            driver=self.sv_constant(self.value, self.width, self.signed),
-        )
+        return SIGNAL_ASSIGN_FORMAT(name=self.name, driver=self.sv_constant(self.value, self.width, self.signed))
 
     @staticmethod
     def sv_constant(value: None | int | bytes, width: int, signed: bool = False) -> str:
@@ -46,6 +68,12 @@ class Constant(Signal):
         :returns: The SystemVerilog constant expression.
         """
         byte_cnt = ceil(width / 8)
+        if isinstance(value, int) and width > 0:
+            # Fast path: format the integer directly, if it can be represented in `byte_cnt` bytes.
+            # Otherwise, fall through to raise the OverflowError from `int.to_bytes`.
+            bound = 1 << (byte_cnt * 8 - signed)
+            if (-bound if signed else 0) <= value < bound:
+                return f"{width}'{'s' if signed else ''}h{value & ((1 << width) - 1):0{ceil(width / 4)}X}"
         if value is not None:
             if isinstance(value, int):
                 value = value.to_bytes(byte_cnt, byteorder="big", signed=signed)
@@ -0,0 +1,258 @@
+"""
+Elaboration daemon, which keeps a warm process to regenerate the code.
+
+Each run of the command line pays for starting the interpreter, importing Magia and the design,
+and elaborating every module again.
+The daemon stays alive between runs, with Magia imported and the elaborated code cached in the memory.
+Before each request, only the user modules whose files changed since the last request are re-imported,
+together with the modules referring to them.
+
+Requests are the command lines of `magia`, sent over a Unix socket, and served one at a time:
+    magia --serve /tmp/magia.sock --cache-dir .magia_cache &
+    magia --connect /tmp/magia.sock package.module:Class -p width=16 -o rtl --incremental
+
+The protocol is a JSON object per line, in both directions:
+    request:  {"argv": ["package.module:Class", "-p", "width=16"], "cwd": "/path/to/project"}
+    response: {"status": 0, "stdout": "...", "stderr": "...", "elapsed": 0.12}
+"""
+from __future__ import annotations
+
+import contextlib
+import importlib
+import importlib.util
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import traceback
+from collections.abc import Sequence
+from os import PathLike
+from pathlib import Path
+from time import perf_counter
+from types import ModuleType
+
+# The client only needs the standard library, so `magia --connect` starts quickly.
+# Magia is imported by the daemon on start-up.
+
+
+def request(socket_path: PathLike, argv: Sequence[str], cwd: None | PathLike = None) -> dict[str, object]:
+    """
+    Send a command line to the daemon, and wait for the response.
+
+    :param socket_path: The Unix socket of the daemon.
+    :param argv: The arguments of `magia`, excluding the program name.
+    :param cwd: The working directory of the command line. The current directory if it is None.
+    :returns: The response, with the exit status, the captured stdout and stderr, and the elapsed time in seconds.
+    """
+    payload = {"argv": list(argv), "cwd": os.fspath(Path.cwd() if cwd is None else cwd)}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(os.fspath(socket_path))
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: _Server
+
+    def handle(self):
+        try:
+            payload = json.loads(self.rfile.readline())
+            response = self.server.daemon.handle(payload["argv"], payload["cwd"])
+        except (ValueError, KeyError, TypeError) as e:
+            response = {"status": 2, "stdout": "", "stderr": f"Invalid request: {e}\n", "elapsed": 0.0}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class _Server(socketserver.UnixStreamServer):
+    daemon: ElaborationDaemon
+
+
+class ElaborationDaemon:
+    """
+    Serve the command lines of `magia` on a Unix socket, in a warm process.
+
+    Requests are served one at a time, as the construction and elaboration of modules modify the global states,
+    e.g. the working directory and the names of the modules.
+    The names of the modules are reset before each request, so the code is the same as a fresh `magia` process.
+    """
+
+    def __init__(self, socket_path: PathLike, cache_dir: None | PathLike = None):
+        """
+        Create a daemon, which listens on the socket once `serve_forever()` is called.
+
+        :param socket_path: The Unix socket to listen on. It is only accessible by the current user.
+        :param cache_dir: The directory of the on-disk elaboration cache backing the memory,
+            which is shared by the daemon and the `magia` processes. None to keep the cache in the memory only.
+        """
+        from .elab_cache import MemoryElaborationCache
+
+        # The working directory changes with the requests.
+        self.socket_path = Path(socket_path).absolute()
+        self.cache = MemoryElaborationCache(cache_dir=None if cache_dir is None else Path(cache_dir).absolute())
+        # Modules imported before serving are never reloaded, e.g. the standard library and Magia.
+        self._preloaded = set(sys.modules)
+        self._stamps: dict[str, tuple[str, tuple[int, int]]] = {}
+        self._server: None | _Server = None
+        # Working directory of the last request
+        self._cwd: None | Path = None
+
+    def serve_forever(self):
+        """Listen on the socket until the process is interrupted, or `shutdown()` is called."""
+        self._remove_stale_socket()
+        with _Server(os.fspath(self.socket_path), _RequestHandler, bind_and_activate=False) as server:
+            server.daemon = self
+            self._server = server
+            # The socket is created only accessible by the current user, as the requests run arbitrary code.
+            umask = os.umask(0o177)
+            try:
+                server.server_bind()
+            finally:
+                os.umask(umask)
+            server.server_activate()
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                self._server = None
+                self.socket_path.unlink(missing_ok=True)
+
+    def shutdown(self):
+        """Stop serving, from another thread."""
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _remove_stale_socket(self):
+        """Remove the socket left by a stopped daemon, or raise an error if a daemon is still listening on it."""
+        if not self.socket_path.exists():
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(os.fspath(self.socket_path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                self.socket_path.unlink(missing_ok=True)
+                return
+        raise RuntimeError(f"An elaboration daemon is already listening on {self.socket_path}")
+
+    def handle(self, argv: Sequence[str], cwd: PathLike) -> dict[str, object]:
+        """
+        Run a command line in the daemon, with the output captured.
+
+        :param argv: The arguments of `magia`, excluding the program name.
+        :param cwd: The working directory of the command line.
+        :returns: The response, see `request`.
+        """
+        from .cli import main
+
+        start = perf_counter()
+        stdout, stderr = io.StringIO(), io.StringIO()
+        daemon_cwd = os.getcwd()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                os.chdir(cwd)
+                if (cwd := Path.cwd()) != self._cwd:
+                    # Modules imported by another project may have the same names as the modules of this one.
+                    self._unload(set(self._stamps))
+                    self._cwd = cwd
+                else:
+                    self.reload_changed_modules()
+                self._reset_names()
+                status = main(argv, cache=self.cache)
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception:
+                traceback.print_exc()
+                status = 1
+            finally:
+                self._track_modules()
+                os.chdir(daemon_cwd)
+        return {
+            "status": status, "stdout": stdout.getvalue(), "stderr": stderr.getvalue(),
+            "elapsed": perf_counter() - start,
+        }
+
+    def reload_changed_modules(self) -> list[str]:
+        """
+        Unload the user modules whose files changed, and the modules referring to them.
+
+        They are imported again by the next command line.
+        A module refers to a changed module if any of its globals is the changed module,
+        or is defined in it, e.g. a class imported by `from package.module import Class`.
+
+        :returns: The names of the unloaded modules.
+        """
+        changed = {name for name, (filename, stamp) in self._stamps.items() if _stamp(filename) != stamp}
+        for name in changed:
+            # The bytecode is validated by the modification time in seconds, which misses quick edits.
+            with contextlib.suppress(ValueError, NotImplementedError, OSError):
+                os.unlink(importlib.util.cache_from_source(self._stamps[name][0]))
+        while True:
+            dependents = {
+                name for name in self._stamps.keys() - changed
+                if (module := sys.modules.get(name)) is not None and _refers_to(module, changed)
+            }
+            if not dependents:
+                break
+            changed |= dependents
+
+        self._unload(changed)
+        return sorted(changed)
+
+    def _unload(self, names: set[str]):
+        """Remove the user modules from `sys.modules`, so they are imported again."""
+        for name in names:
+            sys.modules.pop(name, None)
+            del self._stamps[name]
+        if names:
+            importlib.invalidate_caches()
+
+    def _track_modules(self):
+        """Record the modification time of the modules imported by the user."""
+        for name, module in list(sys.modules.items()):
+            if name in self._preloaded or name in self._stamps:
+                continue
+            filename = getattr(module, "__file__", None)
+            if filename is not None and (stamp := _stamp(filename)) is not None:
+                self._stamps[name] = filename, stamp
+
+    @staticmethod
+    def _reset_names():
+        """
+        Reset the numbering of the modules and signals, as a fresh process.
+
+        The specialization caches are cleared as well, as their modules are named by the previous numbering.
+        """
+        from .module import Module
+        from .utils import ModuleContext, NameAllocator
+
+        Module._module_names = NameAllocator()
+        ModuleContext.global_names = NameAllocator("g")
+        classes = [Module]
+        while classes:
+            module_class = classes.pop()
+            if (cache := module_class.__dict__.get("specialization_cache")) is not None:
+                cache.clear()
+            classes += module_class.__subclasses__()
+
+
+def _stamp(filename: str) -> None | tuple[int, int]:
+    """Return the modification time and the size of the file, which change once the file is edited."""
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _refers_to(module: ModuleType, names: set[str]) -> bool:
+    for value in vars(module).values():
+        if isinstance(value, ModuleType):
+            if value.__name__ in names:
+                return True
+        elif isinstance(module_name := getattr(value, "__module__", None), str) and module_name in names:
+            return True
+    return False
@@ -4,10 +4,13 @@ Data structures used in the magia package.
 It includes
 - Enums defining the types of signals and operations.
 - SignalDict class that is used to store signals in a dictionary.
+- DriverDict class that is used to store the drivers of a signal.
+- PoolStats class that records the usage of object pools.
 """
 from __future__ import annotations
 
 from collections import UserDict
+from dataclasses import dataclass
 from enum import Enum, IntEnum, auto
 from typing import TYPE_CHECKING
 
@@ -46,6 +49,53 @@ class SignalDict(UserDict):
             self.data[alias] = value
 
 
+class DriverDict(dict):
+    """
+    Driver Dict contains the drivers of a signal keyed by the driver name.
+
+    It follows the read only behavior of SignalDict, without the overhead of UserDict.
+    Every signal owns one, so it is kept as compact as a plain dict.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, alias) -> None | Signal:
+        if alias not in self:
+            raise KeyError(f"Signal {alias} is not defined.")
+        return super().__getitem__(alias)
+
+    def __setitem__(self, alias, value):
+        cur = self.get(alias)
+        if value is not None and not hasattr(value, "signal_config"):
+            raise KeyError(f"Object {alias} is not a Signal.")
+        if cur is not None and value is not cur:
+            raise KeyError(f"Signal {alias} is read only. Are you trying to connect it with <<= Operator?")
+
+        if value is not None:
+            super().__setitem__(alias, value)
+
+
+@dataclass(slots=True)
+class PoolStats:
+    """Hit and miss statistics of an object pool."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass(slots=True)
+class FoldStats:
+    """Statistics of the constant folding of a module."""
+
+    folded: int = 0
+    removed: int = 0
+
+
 class PropType(Enum):
     """Type of Properties."""
 
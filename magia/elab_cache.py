@@ -0,0 +1,397 @@
+"""
+Persistent cache of the elaborated SystemVerilog code.
+
+The code of a module is keyed by a structural hash of its traced graph.
+Re-elaborating a design, of which the modules are unchanged, reads the code back from the disk,
+instead of running `Module.elaborate()` again.
+"""
+from __future__ import annotations
+
+import hashlib
+import inspect
+import os
+import time
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from functools import cache
+from operator import attrgetter
+from os import PathLike
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .comb_ops import Operation
+from .const_fold import ConstantFolding
+from .data_struct import PoolStats
+from .module import Module
+from .signals import Synthesizable
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Attributes of Synthesizable, which are described explicitly, or never appear in the elaborated code.
+_SKIPPED_ATTRS = frozenset(Synthesizable.__slots__) | {"__weakref__", "__dict__"}
+
+
+@cache
+def _magia_digest() -> str:
+    """Digest of the magia sources, so the cache is invalidated once the code generation changes."""
+    digest = hashlib.blake2b(digest_size=16)
+    for source in sorted(Path(__file__).parent.rglob("*.py")):
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+@cache
+def _slot_attrs(cls: type) -> tuple[str, ...]:
+    """Return the slotted attributes of a class, which hold the states of the object."""
+    attrs = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        slots = (slots,) if isinstance(slots, str) else slots
+        attrs += [attr for attr in slots if attr not in _SKIPPED_ATTRS]
+    return tuple(attrs)
+
+
+def _describe(value, seen: set[int]):
+    """
+    Describe a value with built-in types, which has a deterministic `repr` across Python processes.
+
+    Synthesizable objects are referred by their names, as they are described individually.
+    """
+    cls = type(value)
+    if cls in _PLAIN_TYPES:
+        return value
+    describer = _DESCRIBERS.get(cls)
+    if describer is None:
+        describer = _DESCRIBERS[cls] = _make_describer(cls)
+    return describer(value, seen)
+
+
+def _describe_items(values, seen: set[int]) -> tuple:
+    return tuple(
+        value if type(value) in _PLAIN_TYPES else _describe(value, seen)
+        for value in values
+    )
+
+
+def _describe_sequence(value, seen: set[int]) -> tuple:
+    return _describe_items(value, seen)
+
+
+def _describe_dict(value, seen: set[int]) -> tuple:
+    return _describe_items(value.keys(), seen), _describe_items(value.values(), seen)
+
+
+def _describe_set(value, seen: set[int]) -> tuple:
+    return tuple(sorted(repr(_describe(item, seen)) for item in value))
+
+
+def _make_describer(cls: type):
+    """Create the function describing the objects of a type."""
+    if issubclass(cls, Enum):
+        return lambda value, _seen: value.name
+    if issubclass(cls, Synthesizable):
+        return lambda value, _seen: value.name
+    if issubclass(cls, type):
+        return lambda value, _seen: (value.__module__, value.__qualname__)
+    if issubclass(cls, slice):
+        return lambda value, _seen: (value.start, value.stop, value.step)
+    if issubclass(cls, (tuple, list)):
+        return _describe_sequence
+    if issubclass(cls, dict):
+        return _describe_dict
+    if issubclass(cls, (set, frozenset)):
+        return _describe_set
+
+    if is_dataclass(cls):
+        # Config objects are owned by a single object, so they are described without the cyclic check.
+        getter = attrgetter(*(field.name for field in fields(cls)), "__class__")
+        return lambda value, seen: _describe_items(getter(value), seen)
+
+    if hasattr(cls, "__dict__") or _slot_attrs(cls):
+        describe_state = _describe_state
+    else:
+        # Opaque objects are described by their representation.
+        # It misses the cache if the representation is not deterministic, but never returns a stale result.
+        def describe_state(value, _seen: set[int]) -> str:
+            return repr(value)
+
+    def describe(value, seen: set[int]):
+        if id(value) in seen:
+            return "cyclic"
+        seen.add(id(value))
+        return describe_state(value, seen)
+
+    return describe
+
+
+_PLAIN_TYPES = frozenset((type(None), bool, int, float, str, bytes))
+_DESCRIBERS = {}
+
+
+def _describe_state(obj, seen: set[int]) -> tuple:
+    """Describe the slotted attributes and the instance dictionary of an object."""
+    state = _describe_items((getattr(obj, attr, None) for attr in _slot_attrs(type(obj))), seen)
+    if hasattr(obj, "__dict__"):
+        state += _describe_dict(vars(obj), seen)
+    return state
+
+
+@cache
+def _override_digest(cls: type) -> None | str:
+    """
+    Digest the source of the user classes overriding the methods of Magia, e.g. `Module.mod_declaration`.
+
+    The overriding methods shape the elaborated code, but they are neither traced nor covered by `_magia_digest()`.
+
+    :returns: The digest, an empty string if no method is overridden, or None if the source is unavailable.
+    """
+    magia_classes = [klass for klass in cls.__mro__ if klass.__module__.partition(".")[0] == "magia"]
+    digest = hashlib.blake2b(digest_size=16)
+    overriding = False
+    for klass in cls.__mro__:
+        if klass in magia_classes or klass is object:
+            continue
+        if not any(
+            (inspect.isfunction(value) or isinstance(value, property | classmethod | staticmethod))
+            and not (name.startswith("__") and name.endswith("__"))
+            and any(name in vars(base) for base in magia_classes)
+            for name, value in vars(klass).items()
+        ):
+            continue
+        try:
+            digest.update(inspect.getsource(klass).encode())
+        except (OSError, TypeError):
+            return None
+        overriding = True
+    return digest.hexdigest() if overriding else ""
+
+
+def _describe_synthesizable(obj: Synthesizable) -> tuple:
+    """Describe a Synthesizable object, including the states which affect its elaborated code."""
+    annotation = (obj._comment, obj.loc) if obj.annotated else None
+    return (
+        type(obj).__module__, type(obj).__qualname__, obj.name, obj._code_section, annotation,
+        _describe_state(obj, {id(obj)}),
+    )
+
+
+def structural_hash(module: Module) -> tuple[None | str, set[Module]]:
+    """
+    Compute the structural hash of a module.
+
+    The hash covers the module name, parameters and IO ports, plus every object traced from the module outputs.
+    It also covers the source of the user classes overriding the methods of Magia, e.g. `mod_declaration`.
+    Modules with the same hash produce the same SystemVerilog code.
+
+    :returns: The hash in hex string, or None if the source of an overriding class is unavailable,
+        and the submodules instantiated in the module.
+    """
+    synth_objs, insts = module.trace(module._trace_roots())
+    overrides = {_override_digest(cls) for cls in {type(module), *map(type, synth_objs)}}
+    if None in overrides:
+        return None, {inst.module for inst in insts}
+
+    digest = hashlib.blake2b(digest_size=20)
+
+    def update(items: Iterable):
+        for item in items:
+            digest.update(repr(item).encode())
+            digest.update(b"\n")
+
+    update((
+        _magia_digest(),
+        _describe(type(module), set()),
+        module.name,
+        _describe(module.params, set()),
+        sorted(overrides),
+        module._module_elab_doc,
+        module.post_elaborate(),
+        Operation.inlining_enabled,
+        ConstantFolding._enabled,
+    ))
+    update(_describe_synthesizable(port) for port in module.io.inputs + module.io.outputs)
+    update(_describe_synthesizable(inst) for inst in insts)
+    update(_describe_synthesizable(obj) for obj in synth_objs)
+
+    return digest.hexdigest(), {inst.module for inst in insts}
+
+
+class ElaborationCache:
+    """
+    On-disk cache of the SystemVerilog code of elaborated modules.
+
+    The code of each module is stored in a file named by the structural hash of the module.
+    The cache is bounded by the total size of the files.
+    The least recently used files are evicted by `shrink()`, which is called by the Elaborator after elaboration.
+
+    Modules overriding `elaborate()` (e.g. ExternalModule) bypass the cache.
+    User classes overriding other methods (e.g. `mod_declaration()`) are keyed by their source as well,
+    and bypass the cache if their source is unavailable, e.g. defined in an interactive session.
+    """
+
+    DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+    def __init__(self, cache_dir: PathLike, max_size: None | int = DEFAULT_MAX_SIZE):
+        """
+        Create a cache in the directory.
+
+        :param cache_dir: The directory of the cache. It is created if it does not exist.
+        :param max_size: Maximum total size of the cached files in bytes. None for an unbounded cache.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self.stats = PoolStats()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.sv"
+
+    def get(self, key: str) -> None | str:
+        """Return the cached code of the key, or None if it is not cached."""
+        path = self._path(key)
+        try:
+            sv_code = path.read_text()
+        except FileNotFoundError:
+            return None
+        self._mark_used(path)
+        return sv_code
+
+    def put(self, key: str, sv_code: str):
+        """Store the code of the key."""
+        path = self._path(key)
+        # Write to a temporary file first, as concurrent elaborations may store the same module.
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(sv_code)
+        tmp_path.replace(path)
+        self._mark_used(path)
+
+    @staticmethod
+    def _mark_used(path: Path):
+        """Mark the file as recently used, with the precise time instead of the coarse file system clock."""
+        now = time.time_ns()
+        os.utime(path, ns=(now, now))
+
+    def elaborate(self, module: Module) -> tuple[str, set[Module]]:
+        """
+        Elaborate the module, or read its code from the cache if the module is unchanged.
+
+        :returns: The SystemVerilog code for the module, and the submodules instantiated in the module.
+        """
+        if type(module).elaborate is not Module.elaborate or module.frozen is not None:
+            return module.elaborate()
+
+        key, submodules = structural_hash(module)
+        if key is None:
+            return module.elaborate()
+        sv_code = self.get(key)
+        if sv_code is not None:
+            self.stats.hits += 1
+            return sv_code, submodules
+
+        self.stats.misses += 1
+        sv_code, submodules = module.elaborate()
+        self.put(key, sv_code)
+        return sv_code, submodules
+
+    def shrink(self):
+        """Evict the least recently used files until the cache fits into `max_size`."""
+        if self.max_size is None:
+            return
+        files = [(path.stat(), path) for path in self.cache_dir.glob("*.sv")]
+        total_size = sum(stat.st_size for stat, _ in files)
+        for stat, path in sorted(files, key=lambda file: file[0].st_mtime_ns):
+            if total_size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= stat.st_size
+
+    def clear(self):
+        """Remove all cached files."""
+        for path in self.cache_dir.glob("*.sv"):
+            path.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.cache_dir.glob("*.sv"))
+
+
+class MemoryElaborationCache(ElaborationCache):
+    """
+    Elaboration cache kept in the memory of a long-running process, e.g. the elaboration daemon.
+
+    The entries are bounded by the total size of the code, and the least recently used ones are evicted.
+    If `cache_dir` is specified, the cache is backed by an on-disk cache:
+    entries missing in the memory are read from the disk, and new entries are written through.
+    With parallel elaboration (`jobs` > 1), the worker processes inherit the cache when they are forked,
+    and the entries added by them are merged back by `merge()`.
+    """
+
+    def __init__(self, max_size: None | int = ElaborationCache.DEFAULT_MAX_SIZE, cache_dir: None | PathLike = None):
+        """
+        Create a cache in the memory.
+
+        :param max_size: Maximum total size of the code kept in the memory in bytes. None for an unbounded cache.
+        :param cache_dir: The directory of the on-disk cache backing the memory. None to keep the memory only.
+        """
+        if cache_dir is not None:
+            super().__init__(cache_dir, max_size)
+        else:
+            self.cache_dir = None
+            self.max_size = max_size
+            self.stats = PoolStats()
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._size = 0
+        # Entries added since `record_added()` was called, e.g. in a worker process
+        self._added: None | list[tuple[str, str]] = None
+
+    def get(self, key: str) -> None | str:
+        if (sv_code := self._entries.get(key)) is not None:
+            self._entries.move_to_end(key)
+            return sv_code
+        if self.cache_dir is None or (sv_code := super().get(key)) is None:
+            return None
+        self._store(key, sv_code)
+        return sv_code
+
+    def put(self, key: str, sv_code: str):
+        self._store(key, sv_code)
+        if self._added is not None:
+            self._added.append((key, sv_code))
+        if self.cache_dir is not None:
+            super().put(key, sv_code)
+
+    def record_added(self) -> list[tuple[str, str]]:
+        """Record the entries added from now on, and return the list they are appended to."""
+        self._added = []
+        return self._added
+
+    def merge(self, entries: Iterable[tuple[str, str]]):
+        """Keep the entries added by another process in the memory, which are already written to the disk by it."""
+        for key, sv_code in entries:
+            self._store(key, sv_code)
+
+    def _store(self, key: str, sv_code: str):
+        if (previous := self._entries.pop(key, None)) is not None:
+            self._size -= len(previous)
+        self._entries[key] = sv_code
+        self._size += len(sv_code)
+
+    def shrink(self):
+        """Evict the least recently used entries until the memory fits into `max_size`, and shrink the disk."""
+        if self.max_size is not None:
+            while self._size > self.max_size and self._entries:
+                _, sv_code = self._entries.popitem(last=False)
+                self._size -= len(sv_code)
+        if self.cache_dir is not None:
+            super().shrink()
+
+    def clear(self):
+        """Remove all entries in the memory, and the files on the disk."""
+        self._entries.clear()
+        self._size = 0
+        if self.cache_dir is not None:
+            super().clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,21 +1,120 @@
 from __future__ import annotations
 
+import filecmp
+import hashlib
+import json
+import re
+import threading
+from collections.abc import Callable, Collection, Iterator
+from contextlib import AbstractContextManager
 from os import PathLike
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from .module import Module
+from .data_struct import PoolStats
+from .elab_cache import ElaborationCache, MemoryElaborationCache
+from .module import Module, _is_plain_param, module_registry
+from .profiler import ElaborationProfiler, ModuleProfile
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+IDENTIFIER_PATTERN = re.compile(r"\b[A-Za-z_][A-Za-z0-9_$]*\b")
+# Result of a worker process: the code, the ids of the submodules, the cache statistics and the module profiles,
+# and the entries added to the memory cache.
+_WorkerResult = tuple[str, list[int], None | PoolStats, list[ModuleProfile], list[tuple[str, str]]]
+# Cache of the parallel elaboration, which is inherited by the forked workers instead of being pickled.
+_worker_cache: None | ElaborationCache = None
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _can_fork() -> bool:
+    """
+    Check if the workers can be forked from the current process.
+
+    Forking a process with other running threads may deadlock the workers, e.g. on a lock held by another thread.
+    multiprocessing is imported on demand, as it is slow to import.
+    """
+    if threading.active_count() > 1:
+        return False
+    import multiprocessing
+
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def _same_specialization(module: Module, other: Module) -> bool:
+    """Check if the modules are specialized from the same class with the same parameters, e.g. `naming_by_params`."""
+    if type(module) is not type(other) or module.params.keys() != other.params.keys():
+        return False
+    # Parameters other than plain values (e.g. a Signal) are compared by identity, as they may overload `==`.
+    return all(
+        value is other_value or (_is_plain_param(value) and _is_plain_param(other_value) and value == other_value)
+        for value, other_value in zip(module.params.values(), other.params.values())
+    )
+
+
+def _temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.tmp")
+
+
+def _replace_if_changed(source: Path, target: Path):
+    """Move the source file to the target, or remove it if the target has the same content."""
+    if target.is_file() and filecmp.cmp(source, target, shallow=False):
+        source.unlink()
+    else:
+        source.replace(target)
+
+
+def _elaborate_by_id(module_id: int) -> _WorkerResult:
+    """
+    Elaborate a module inherited from the parent process.
+
+    Modules are referred by id, so the design is never pickled, nor is the elaboration cache.
+    Only the SystemVerilog code, the ids of the submodules, the cache statistics,
+    the profiles and the new entries of a memory cache recorded by the worker are sent back.
+    """
+    module = module_registry[module_id]
+    profiler = ElaborationProfiler._active
+    if profiler is not None:
+        # The profiler is inherited from the parent process, with the records before forking.
+        profiler.modules = []
+
+    cache = _worker_cache
+    added = []
+    if cache is None:
+        sv_code, submodules = module.elaborate()
+        stats = None
+    else:
+        cache.stats = PoolStats()
+        if isinstance(cache, MemoryElaborationCache):
+            added = cache.record_added()
+        sv_code, submodules = cache.elaborate(module)
+        stats = cache.stats
+    profiles = [] if profiler is None else profiler.modules
+    return sv_code, [id(submodule) for submodule in submodules], stats, profiles, added
 
 
 class Elaborator:
     """Elaborator is a helper class to elaborate modules."""
 
     name_to_module: dict[str, Module] = {}
+    elaboration_cache: None | ElaborationCache = None
 
     def __init__(self):
         raise NotImplementedError("Elaborator is a helper class and should not be instantiated.")
 
     @classmethod
-    def to_dict(cls, *modules: Module, top_only: bool = False) -> dict[str, str]:
+    def to_dict(
+            cls, *modules: Module,
+            top_only: bool = False,
+            jobs: int = 1,
+            cache_dir: None | PathLike | ElaborationCache = None,
+            dedup: bool = False,
+            freeze: bool = False,
+    ) -> dict[str, str]:
         """
         Elaborate all modules in the list.
 
@@ -23,76 +122,484 @@ class Elaborator:
         Duplicated submodules will not be elaborated again.
         The elaboration is done recursively, until all submodules are elaborated.
 
+        With `jobs` > 1, modules are elaborated by a pool of forked worker processes.
+        The result is identical to the serial elaboration, including the order of the modules.
+
+        With `cache_dir`, the code of each module is cached on the disk, keyed by the structural hash of the module.
+        Unchanged modules are read from the cache, instead of being elaborated again.
+        The cache is kept as `Elaborator.elaboration_cache`, which records the hit / miss statistics.
+
+        With `dedup`, modules with identical structure (e.g. `Adder_3` and `Adder_17`) are emitted only once.
+        The instantiations of the duplicated modules are renamed to the surviving module, see `_deduplicate`.
+
+        With `freeze`, each module is frozen once it is elaborated, see `Module.freeze`.
+        The objects constructed in the modules are released, so the memory does not grow across the elaborations.
+
         :param modules: The modules to be elaborated.
         :param top_only: If True, Elaborator will skip the submodules instantiated by `modules`
+        :param jobs: The number of worker processes. Elaborate in the current process if `jobs` <= 1,
+            or if the platform does not support forking processes.
+        :param cache_dir: The directory of the elaboration cache, or an `ElaborationCache` object.
+            No cache is used if it is None.
+        :param dedup: If True, modules with identical structure are merged into one module.
+        :param freeze: If True, the elaborated modules are frozen.
         :returns: A dictionary of the SystemVerilog code for each module.
         """
+        result, _ = cls._elaborate_hierarchy(modules, top_only, jobs, cache_dir, dedup, freeze)
+        return result
+
+    @classmethod
+    def _elaborate_hierarchy(
+            cls,
+            modules: tuple[Module, ...], top_only: bool, jobs: int,
+            cache_dir: None | PathLike | ElaborationCache,
+            dedup: bool = False,
+            freeze: bool = False,
+    ) -> tuple[dict[str, str], dict[str, list[str]]]:
+        """
+        Elaborate the modules as `to_dict`.
+
+        :returns: The code of each module, and the names of the submodules of each module.
+        """
+        elaborated_modules: dict[str, str] = {}
+        hierarchy: dict[str, list[str]] = {}
+        # Modules are compared by their objects in the deduplication, so they are frozen afterwards.
+        for mod, sv_code, submodules in cls._elaborate_all(modules, top_only, jobs, cache_dir, freeze and not dedup):
+            elaborated_modules[mod.name] = sv_code
+            hierarchy[mod.name] = [submodule.name for submodule in submodules]
+
+        if not dedup:
+            return elaborated_modules, hierarchy
+
+        result = cls._deduplicate(elaborated_modules, hierarchy)
+        if freeze:
+            for name, sv_code in result.items():
+                module = cls.name_to_module[name]
+                if module.frozen is None:
+                    # The code instantiates the surviving submodules
+                    module._freeze(sv_code, {cls.name_to_module[submodule] for submodule in hierarchy[name]})
+        return result, {name: hierarchy[name] for name in result}
+
+    @classmethod
+    def to_stream(
+            cls, *modules: Module,
+            top_only: bool = False,
+            jobs: int = 1,
+            cache_dir: None | PathLike | ElaborationCache = None,
+            freeze: bool = False,
+    ) -> Iterator[tuple[str, str]]:
+        """
+        Elaborate all modules in the list, and yield the SystemVerilog code of each module once it is elaborated.
+
+        The modules are yielded in the same order as `to_dict`.
+        The code of each module can be released once it is consumed,
+        so the peak memory is bounded by the largest module, instead of the whole design.
+        Deduplication is not supported, as it requires all modules to be elaborated first.
+
+        :param modules: The modules to be elaborated.
+        :param top_only: If True, Elaborator will skip the submodules instantiated by `modules`
+        :param jobs: The number of worker processes used to elaborate the modules.
+        :param cache_dir: The directory of the elaboration cache, or an `ElaborationCache` object.
+        :param freeze: If True, the modules are frozen once they are elaborated.
+        :returns: An iterator of the module names and their SystemVerilog code.
+        """
+        for mod, sv_code, _ in cls._elaborate_all(modules, top_only, jobs, cache_dir, freeze):
+            yield mod.name, sv_code
+
+    @classmethod
+    def _elaborate_all(
+            cls,
+            modules: tuple[Module, ...], top_only: bool, jobs: int,
+            cache_dir: None | PathLike | ElaborationCache,
+            freeze: bool = False,
+    ) -> Iterator[tuple[Module, str, Collection[Module]]]:
+        """
+        Elaborate the modules and their submodules recursively, in the serial order.
+
+        Each module is elaborated only once, and yielded with its code and submodules.
+        With `freeze`, the module is frozen before it is yielded.
+        """
+        if cache_dir is not None and not isinstance(cache_dir, ElaborationCache):
+            cache_dir = ElaborationCache(cache_dir)
+        cache = cls.elaboration_cache = cache_dir
         cls.name_to_module = {}
+
+        if jobs > 1 and _can_fork():
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            global _worker_cache
+            _worker_cache = cache
+            pool = ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context("fork"))
+            try:
+                yield from cls._traverse(
+                    modules, top_only, cls._parallel_elaborate(pool, modules, top_only, cache), freeze,
+                )
+            finally:
+                pool.shutdown(cancel_futures=True)
+                _worker_cache = None
+        elif cache is not None:
+            yield from cls._traverse(modules, top_only, cache.elaborate, freeze)
+        else:
+            yield from cls._traverse(modules, top_only, lambda module: module.elaborate(), freeze)
+
+        if cache is not None:
+            cache.shrink()
+
+    @classmethod
+    def _traverse(
+            cls,
+            modules: tuple[Module, ...], top_only: bool,
+            elaborate: Callable[[Module], tuple[str, Collection[Module]]],
+            freeze: bool = False,
+    ) -> Iterator[tuple[Module, str, Collection[Module]]]:
+        """
+        Traverse the module hierarchy with `elaborate`, and skip the modules with elaborated names.
+
+        Modules sharing the same name must be specialized with the same class and parameters,
+        otherwise only one of them would be emitted, and a ValueError is raised.
+        """
         modules = list(modules)
-        elaborated_modules: dict[str, str] = {}
+        elaborated_names: set[str] = set()
         while modules:
             mod = modules.pop()
+            known = cls.name_to_module.get(mod.name)
+            if known is not None and known is not mod and not _same_specialization(known, mod):
+                raise ValueError(
+                    f"Module name conflict: {mod.name} is shared by {type(known).__name__}({known.params}) "
+                    f"and {type(mod).__name__}({mod.params})"
+                )
             cls.name_to_module[mod.name] = mod
-            if mod.name not in elaborated_modules:
-                sv_code, submodules = mod.elaborate()
-                elaborated_modules[mod.name] = sv_code
+            if mod.name not in elaborated_names:
+                elaborated_names.add(mod.name)
+                sv_code, submodules = elaborate(mod)
+                if freeze:
+                    mod._freeze(sv_code, submodules)
+                yield mod, sv_code, submodules
                 if not top_only:
                     modules += submodules
-        return elaborated_modules
 
     @classmethod
-    def to_string(cls, *modules: Module, top_only: bool = False) -> str:
+    def _deduplicate(cls, elaborated_modules: dict[str, str], hierarchy: dict[str, list[str]]) -> dict[str, str]:
+        """
+        Merge the elaborated modules with identical structure.
+
+        Modules are compared by their canonical code, in which the names of the module, its internal signals
+        and instances are replaced by their order of appearance, and the submodules by their group.
+        Submodules are grouped before their parents, so identical hierarchies are merged recursively.
+
+        The first module of each group in the elaboration order survives.
+        The instantiations of the other modules are renamed to the survivor in the code of their parents.
+        The modules and their instances are not modified, so the later elaborations are not affected.
+
+        :param elaborated_modules: The code of the modules, in the elaboration order.
+        :param hierarchy: The names of the submodules of each module.
+            The submodules of the surviving modules are updated to the survivors.
+        :returns: The code of the surviving modules, in the elaboration order.
+        """
+        group_of: dict[str, str] = {}
+        groups: dict[str, list[str]] = {}
+        visited: set[str] = set()
+        # The instances in frozen modules cannot be rewritten, so their submodules are kept.
+        pinned = {
+            submodule
+            for name, submodules in hierarchy.items() if cls.name_to_module[name].frozen is not None
+            for submodule in submodules
+        }
+
+        for top in elaborated_modules:
+            if top in visited:
+                continue
+            # Iterative post-order traversal, as the hierarchy can be deep.
+            visited.add(top)
+            stack = [(top, iter(hierarchy[top]))]
+            while stack:
+                name, submodules = stack[-1]
+                submodule = next((sub for sub in submodules if sub in hierarchy and sub not in visited), None)
+                if submodule is not None:
+                    visited.add(submodule)
+                    stack.append((submodule, iter(hierarchy[submodule])))
+                    continue
+                stack.pop()
+                if name in pinned:
+                    key = f"\0module {name}"
+                else:
+                    key = cls._canonical_form(cls.name_to_module[name], elaborated_modules[name], group_of)
+                members = groups.setdefault(key, [])
+                members.append(name)
+                # Modules of the same group are referred by the same token in their parents.
+                group_of[name] = group_of[members[0]] if len(members) > 1 else f"\0group{len(groups)}"
+
+        order = {name: i for i, name in enumerate(elaborated_modules)}
+        survivor = {}
+        for members in groups.values():
+            survivor |= dict.fromkeys(members, min(members, key=order.__getitem__))
+
+        result = {}
+        for name, sv_code in elaborated_modules.items():
+            if survivor[name] != name:
+                continue
+            if merged := [sub for sub in hierarchy[name] if survivor.get(sub, sub) != sub]:
+                hierarchy[name] = list(dict.fromkeys(survivor.get(sub, sub) for sub in hierarchy[name]))
+                # Instantiations are emitted at the beginning of a line, see `Instance.elaborate`.
+                pattern = re.compile(rf"^({'|'.join(map(re.escape, merged))})(?= [A-Za-z_][A-Za-z0-9_$]* \()", re.M)
+                sv_code = pattern.sub(lambda match: survivor[match.group()], sv_code)
+            result[name] = sv_code
+        return result
+
+    @staticmethod
+    def _canonical_form(module: Module, sv_code: str, group_of: dict[str, str]) -> str:
+        """
+        Return the code of the module with the names of the module and its internal objects canonicalized.
+
+        Modules overriding `elaborate()` (e.g. ExternalModule) and frozen modules
+        are never considered identical to other modules.
+        """
+        if type(module).elaborate is not Module.elaborate or module.frozen is not None:
+            return f"\0module {module.name}"
+
+        synth_objs, insts = module.trace(module._trace_roots())
+        internal_names: dict[str, str] = {module.name: "\0module"}
+        internal_names |= dict.fromkeys((obj.name for obj in synth_objs), None)
+        internal_names |= dict.fromkeys((inst.name for inst in insts), None)
+        canonical_names: dict[str, str] = {}
+
+        def canonicalize(match: re.Match) -> str:
+            name = match.group()
+            if name not in internal_names:
+                return group_of.get(name, name)
+            if name not in canonical_names:
+                canonical_names[name] = internal_names[name] or f"\0net{len(canonical_names)}"
+            return canonical_names[name]
+
+        return IDENTIFIER_PATTERN.sub(canonicalize, sv_code)
+
+    @staticmethod
+    def _parallel_elaborate(
+            pool: ProcessPoolExecutor,
+            modules: tuple[Module, ...], top_only: bool, cache: None | ElaborationCache,
+    ) -> Callable[[Module], tuple[str, Collection[Module]]]:
+        """
+        Return a function, which elaborates a module with the worker processes in the pool.
+
+        Workers are forked from the current process and inherit the constructed design and the elaboration cache.
+        Submodules are submitted as soon as their parent module is elaborated,
+        while the function waits for the result of the requested module.
+        Exceptions are kept in the futures and raised only if the failed module is requested.
+        """
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        futures: dict[int, None | Future[_WorkerResult]] = {}
+        pending: set[Future[_WorkerResult]] = set()
+
+        def submit(module_id: int):
+            if module_id not in futures:
+                futures[module_id] = pool.submit(_elaborate_by_id, module_id)
+                pending.add(futures[module_id])
+
+        def elaborate(module: Module) -> tuple[str, Collection[Module]]:
+            future = futures[id(module)]
+            # Release the result once it is consumed
+            futures[id(module)] = None
+            while future in pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                pending.difference_update(done)
+                if top_only:
+                    continue
+                for done_future in done:
+                    if done_future.exception() is None:
+                        for submodule_id in done_future.result()[1]:
+                            submit(submodule_id)
+
+            sv_code, submodule_ids, stats, profiles, added = future.result()
+            if stats is not None:
+                cache.stats.hits += stats.hits
+                cache.stats.misses += stats.misses
+            if added:
+                cache.merge(added)
+            if ElaborationProfiler._active is not None:
+                ElaborationProfiler._active.modules += profiles
+            return sv_code, [module_registry[submodule_id] for submodule_id in submodule_ids]
+
+        for mod in modules:
+            submit(id(mod))
+        return elaborate
+
+    @staticmethod
+    def profile() -> AbstractContextManager[ElaborationProfiler]:
+        """
+        Profile the elaboration within the context.
+
+        The time spent in each phase of `Module.elaborate()`, the traced objects by type and the size of the code
+        are recorded for each elaborated module, including the modules elaborated by the worker processes.
+        Modules read from the elaboration cache are not elaborated, hence not recorded.
+
+        Example:
+        with Elaborator.profile() as profiler:
+            Elaborator.to_dict(top)
+        profiler.to_json("profile.json")
+
+        :returns: A context manager of the `ElaborationProfiler` collecting the profiles.
+        """
+        return ElaborationProfiler.profile()
+
+    @classmethod
+    def to_string(
+            cls, *modules: Module,
+            top_only: bool = False,
+            jobs: int = 1,
+            cache_dir: None | PathLike | ElaborationCache = None,
+            dedup: bool = False,
+            freeze: bool = False,
+    ) -> str:
         """Elaborate all modules in the list and return the SystemVerilog code as a string."""
-        return "\n\n".join(cls.to_dict(*modules, top_only=top_only).values())
+        return "\n\n".join(cls.to_dict(
+            *modules, top_only=top_only, jobs=jobs, cache_dir=cache_dir, dedup=dedup, freeze=freeze,
+        ).values())
 
     @classmethod
-    def to_file(cls, filename: PathLike, *modules: Module, top_only: bool = False):
-        """Elaborate all modules in the list and write the SystemVerilog code to a file."""
-        sv_code = cls.to_string(*modules, top_only=top_only)
-        Path(filename).write_text(sv_code)
+    def to_file(
+            cls, filename: PathLike, *modules: Module,
+            top_only: bool = False,
+            jobs: int = 1,
+            cache_dir: None | PathLike | ElaborationCache = None,
+            dedup: bool = False,
+            freeze: bool = False,
+    ):
+        """
+        Elaborate all modules in the list and write the SystemVerilog code to a file.
+
+        Without `dedup`, the code is written incrementally once each module is elaborated.
+        """
+        if dedup:
+            sv_code = cls.to_string(
+                *modules, top_only=top_only, jobs=jobs, cache_dir=cache_dir, dedup=dedup, freeze=freeze,
+            )
+            Path(filename).write_text(sv_code)
+            return
+
+        with Path(filename).open("w") as f:
+            for i, (_, sv_code) in enumerate(cls.to_stream(
+                    *modules, top_only=top_only, jobs=jobs, cache_dir=cache_dir, freeze=freeze,
+            )):
+                if i:
+                    f.write("\n\n")
+                f.write(sv_code)
 
     @classmethod
     def to_files(
             cls, output_dir: PathLike, /,
             *modules: Module,
             force: bool = False,
-            top_only: bool = False
+            top_only: bool = False,
+            jobs: int = 1,
+            cache_dir: None | PathLike | ElaborationCache = None,
+            dedup: bool = False,
+            freeze: bool = False,
+            incremental: bool = False,
+            manifest: None | PathLike = None,
     ) -> list[Path]:
         """
         Elaborate all modules in the list and write the SystemVerilog code to files.
 
         The files are written to the output directory.
 
+        With `incremental`, the code is written to temporary files first,
+        which replace the existing files only if their content is changed.
+        Unchanged files are not touched, so their modification time is kept for the downstream build tools.
+
         :param output_dir: The output directory.
         :param modules: The modules to be elaborated.
         :param force: If True, files in the output directory will be overwritten if it exists.
         :param top_only: If True, Elaborator will skip the submodules instantiated by `modules`
+        :param jobs: The number of worker processes used to elaborate the modules.
+        :param cache_dir: The directory of the elaboration cache, or an `ElaborationCache` object.
+        :param dedup: If True, modules with identical structure are merged into one module.
+        :param freeze: If True, the elaborated modules are frozen.
+        :param incremental: If True, only the files with changed content are written.
+            The output directory may contain the files of the previous elaboration.
+        :param manifest: If specified, write the manifest of the output files as JSON to this path,
+            relative to the output directory. See `_manifest` for the content.
 
-        :returns: A list of Path objects of the files written.
+        :returns: A list of Path objects of the output files, including the unchanged files.
         """
         output_dir = Path(output_dir)
-        if not force and output_dir.is_dir() and any(output_dir.iterdir()):
+        if not (force or incremental) and output_dir.is_dir() and any(output_dir.iterdir()):
             raise FileExistsError(f"Directory {output_dir} already exists and not empty.")
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        result = cls.to_dict(*modules, top_only=top_only)
-        result_by_file: dict[str, list[str]] = {}
+        if dedup:
+            result, hierarchy = cls._elaborate_hierarchy(modules, top_only, jobs, cache_dir, dedup, freeze)
+            elaborated = (
+                (cls.name_to_module[name], sv_code, hierarchy[name])
+                for name, sv_code in result.items()
+            )
+        else:
+            elaborated = (
+                (mod, sv_code, [submodule.name for submodule in submodules])
+                for mod, sv_code, submodules in cls._elaborate_all(modules, top_only, jobs, cache_dir, freeze)
+            )
+
+        # Write to files incrementally, modules under the same output file are appended in order.
+        # In incremental mode, the code is written to the temporary files, and compared to the existing files.
+        written_files: dict[Path, Path] = {}
+        module_files: dict[str, tuple[Path, str, list[str]]] = {}
+        completed = False
+        try:
+            for module, sv_code, submodules in elaborated:
+                output_file = f"{module.name}.sv" if module.output_file is None else module.output_file
+                path = Path(output_dir, output_file)
+                if manifest is not None:
+                    module_files[module.name] = (path, _sha256(sv_code.encode()), submodules)
+                if path in written_files:
+                    with written_files[path].open("a") as f:
+                        f.write("\n\n")
+                        f.write(sv_code)
+                else:
+                    target = written_files[path] = _temp_path(path) if incremental else path
+                    target.write_text(sv_code)
+            completed = True
+        finally:
+            if incremental:
+                for path, target in written_files.items():
+                    if completed:
+                        _replace_if_changed(target, path)
+                    else:
+                        target.unlink(missing_ok=True)
 
-        # Categorize by output file
-        for fname, sv_code in result.items():
-            module = cls.name_to_module[fname]
-            output_file = f"{fname}.sv" if module.output_file is None else module.output_file
+        if manifest is not None:
+            manifest_path = Path(output_dir, manifest)
+            target = _temp_path(manifest_path) if incremental else manifest_path
+            target.write_text(cls._manifest(output_dir, module_files, list(written_files)))
+            if incremental:
+                _replace_if_changed(target, manifest_path)
 
-            if output_file not in result_by_file:
-                result_by_file[output_file] = []
-            result_by_file[output_file].append(sv_code)
+        return list(written_files)
 
-        # Write to files
-        for fname, sv_codes in result_by_file.items():
-            sv_code = "\n\n".join(sv_codes)
-            Path(output_dir, fname).write_text(sv_code)
+    @staticmethod
+    def _manifest(
+            output_dir: Path,
+            module_files: dict[str, tuple[Path, str, list[str]]],
+            output_files: list[Path],
+    ) -> str:
+        """
+        Return the manifest of the output files as JSON, for the incremental builds of downstream tools.
 
-        return [Path(output_dir, fname) for fname in result_by_file]
+        {
+            "modules": {"<module>": {"file": "<file>", "sha256": "<hash of the code>", "submodules": [...]}},
+            "files": {"<file>": {"sha256": "<hash of the file>", "modules": [...]}},
+        }
+        Files are relative to the output directory.
+        A module depends on its submodules, which may be defined in other files.
+        """
+        modules, files = {}, {}
+        for path in output_files:
+            files[path.relative_to(output_dir).as_posix()] = {"sha256": _sha256(path.read_bytes()), "modules": []}
+        for name, (path, digest, submodules) in module_files.items():
+            file = path.relative_to(output_dir).as_posix()
+            modules[name] = {"file": file, "sha256": digest, "submodules": submodules}
+            files[file]["modules"].append(name)
+        return json.dumps({"modules": modules, "files": files}, indent=2)
 
     @staticmethod
     def file(fname: PathLike):
@@ -18,8 +18,8 @@ if typing.TYPE_CHECKING:
 
 
 def constant(value: int | bytes, width: int, signed: bool) -> Constant:
-    """Create a constant."""
-    return Constant(value, width, signed)
+    """Create a constant, shared with the same literals in the module being constructed."""
+    return Constant.pooled(value, width, signed)
 
 
 def constant_like(value: int | bytes, signal: Signal) -> Constant:
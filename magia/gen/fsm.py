@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
 
 from magia import Constant, Signal
+from magia.utils import ModuleContext
 
 
 class FSM:
@@ -24,8 +25,6 @@ class FSM:
         next: str
         cond: None | Signal = None
 
-    fsm_id = 0
-
     def __init__(
             self,
             name: None | str = None,
@@ -35,8 +34,10 @@ class FSM:
         self.transitions: dict[str, list[FSM.Transition]] = {}
         self.finalized = False
 
-        self.fsm_name = f"{name if name is not None else FSM.fsm_id}"
-        FSM.fsm_id += 1
+        if name is None:
+            # Numbered in the module being constructed, e.g. "0" for "fsm_0"
+            name = ModuleContext().allocate_name("fsm").removeprefix("fsm_")
+        self.fsm_name = f"{name}"
         self.gen_id = 0
 
         self.state_width = 0
@@ -152,8 +153,8 @@ class FSM:
         return self
 
     def _fsm_logic_one_state(self, transitions, prev_state) -> Signal:
-        next_state: Signal = Constant(0, self.state_width)
-        prev_cond: Signal = Constant(0, 1)
+        next_state: Signal = Constant.pooled(0, self.state_width)
+        prev_cond: Signal = Constant.pooled(0, 1)
 
         for i, trans in enumerate(transitions):
             if trans.cond:
@@ -163,7 +164,7 @@ class FSM:
                 if i != len(transitions) - 1:
                     raise ValueError("Unconditional transition can only be the last entry")
                 next_state |= self.states[trans.next].signal.when(~prev_cond, else_=0)
-                prev_cond = Constant(1, 1)
+                prev_cond = Constant.pooled(1, 1)
         next_state |= prev_state.when(~prev_cond, else_=0)
 
         return next_state
@@ -17,6 +17,8 @@ class Input(Signal):
     It is used by both the module declaration and the module instance.
     """
 
+    __slots__ = ()
+
     def __init__(
             self,
             name: str, width: int, signed: bool = False,
@@ -65,6 +67,8 @@ class Output(Signal):
     It is used by both the module declaration and the module instance.
     """
 
+    __slots__ = ()
+
     def __init__(
             self,
             name: str, width: int, signed: bool = False,
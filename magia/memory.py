@@ -3,11 +3,11 @@ from __future__ import annotations
 
 import string
 from dataclasses import dataclass
-from itertools import count
 
 from .data_struct import SignalDict
 from .io_signal import Input
-from .signals import Signal, Synthesizable
+from .signals import Signal, Synthesizable, compile_template
+from .utils import ModuleContext
 
 
 @dataclass
@@ -25,6 +25,8 @@ class MemorySignal(Signal):
     :param name: The name of the signal. Defaults to None.
     """
 
+    __slots__ = ("memory", "drive_by_mem")
+
     def __init__(self, memory: Memory, name: str, width: int, drive_by_mem: bool = False, **kwargs):
         super().__init__(name=name, width=width, **kwargs)
         self.memory = memory
@@ -112,6 +114,7 @@ class MemWritePort(MemPort):
         "  if ($wen) $mem[$addr] <= $din;\n"
         "end"
     )
+    _IMPL_FORMAT = compile_template(_IMPL_TEMPLATE)
 
     def __init__(self, memory: Memory, name: str, **kwargs):
         """
@@ -128,7 +131,7 @@ class MemWritePort(MemPort):
         )
 
     def elaborate(self) -> str:
-        return self._IMPL_TEMPLATE.substitute(
+        return self._IMPL_FORMAT(
             mem=self.memory.name,
             clk=self.memory.clk.name,
             din=self.din.name,
@@ -150,6 +153,8 @@ class MemReadPort(MemPort):
         "  $dout = $mem[$addr];\n"
         "end"
     )
+    _IMPL_REG_FORMAT = compile_template(_IMPL_REG_TEMPLATE)
+    _IMPL_COMB_FORMAT = compile_template(_IMPL_COMB_TEMPLATE)
 
     def __init__(self, memory: Memory, name: str, registered: bool = False, **kwargs):
         """
@@ -169,8 +174,8 @@ class MemReadPort(MemPort):
         self._registered = registered
 
     def elaborate(self) -> str:
-        template = self._IMPL_REG_TEMPLATE if self._registered else self._IMPL_COMB_TEMPLATE
-        return template.substitute(
+        formatter = self._IMPL_REG_FORMAT if self._registered else self._IMPL_COMB_FORMAT
+        return formatter(
             mem=self.memory.name,
             clk=self.memory.clk.name,
             addr=self.addr.name,
@@ -194,6 +199,7 @@ class MemRWPort(MemPort):
         "  end\n"
         "end\n"
     )
+    _IMPL_FORMAT = compile_template(_IMPL_TEMPLATE)
 
     def __init__(self, memory: Memory, name: str, write_through: bool = True, **kwargs):
         """
@@ -214,7 +220,7 @@ class MemRWPort(MemPort):
         )
 
     def elaborate(self) -> str:
-        return self._IMPL_TEMPLATE.substitute(
+        return self._IMPL_FORMAT(
             mem=self.memory.name,
             clk=self.memory.clk.name,
             assignment="=" if self._write_through else "<=",
@@ -242,8 +248,8 @@ class Memory(Synthesizable):
 
     """
 
-    new_mem_counter = count(0)
     _MEM_DECL_TEMPLATE = string.Template("logic $width $name $size;")
+    _MEM_DECL_FORMAT = compile_template(_MEM_DECL_TEMPLATE)
 
     def __init__(
             self,
@@ -284,7 +290,7 @@ class Memory(Synthesizable):
 
         memory_size = 1 << address_width
         if name is None:
-            name = f"{memory_size}_{data_width}_{next(Memory.new_mem_counter)}"
+            name = ModuleContext().allocate_name(f"{memory_size}_{data_width}")
         name = f"mem_{name}"
 
         super().__init__(**kwargs)
@@ -328,7 +334,7 @@ class Memory(Synthesizable):
         return self._clk
 
     def elaborate(self) -> str:
-        mem_decl = self._MEM_DECL_TEMPLATE.substitute(
+        mem_decl = self._MEM_DECL_FORMAT(
             width=f"[{self.data_width - 1}:0]",
             name=self.name,
             size=f"[0:{self.size - 1}]",
@@ -1,23 +1,33 @@
 from __future__ import annotations
 
+import hashlib
 import inspect
 import logging
+import threading
 from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
+from enum import Enum, auto
 from functools import cached_property
-from itertools import count
 from os import PathLike
 from string import Template
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NamedTuple
+from weakref import WeakValueDictionary
 
 from .assertions import AssertionCell
-from .data_struct import SignalDict
+from .comb_ops import Operation
+from .const_fold import ConstantFolding, FoldResult
+from .data_struct import FoldStats, PoolStats, SignalDict
 from .io_ports import IOPorts
 from .io_signal import Input, Output
-from .memory import MemorySignal
-from .signals import SIGNAL_ASSIGN_TEMPLATE, CodeSectionType, Signal, Synthesizable
+from .memory import Memory, MemorySignal
+from .netlist import SIGNAL_KINDS, Netlist, NodeKind
+from .profiler import ElaborationProfiler
+from .signals import SIGNAL_ASSIGN_FORMAT, CodeSectionType, Signal, Synthesizable, compile_template
 from .sva_manual import SVAManual
-from .utils import ModuleContext
+from .utils import ModuleContext, NameAllocator
 
 if TYPE_CHECKING:
     from .bundle import Bundle
@@ -37,6 +47,20 @@ class ModuleInstanceConfig:
     name: None | str = None
 
 
+@dataclass(slots=True)
+class FrozenModule:
+    """
+    Summary of an elaborated module, which replaces the objects constructed in the module.
+
+    `digest` is the hash of the SystemVerilog code.
+    """
+
+    sv_code: str
+    submodules: frozenset[Module]
+    spec: dict[str, object]
+    digest: str
+
+
 MOD_DECL_TEMPLATE = Template("module $name (\n$io\n);")
 INST_TEMPLATE = Template("$module_name $inst_name (\n$io\n);")
 IO_TEMPLATE = Template(".$port_name($signal_name)")
@@ -45,17 +69,136 @@ FORMAL_SECTION_TEMPLATE = Template(
     "$code\n"
     "`endif"
 )
+MOD_DECL_FORMAT = compile_template(MOD_DECL_TEMPLATE)
+INST_FORMAT = compile_template(INST_TEMPLATE)
+IO_FORMAT = compile_template(IO_TEMPLATE)
+FORMAL_SECTION_FORMAT = compile_template(FORMAL_SECTION_TEMPLATE)
+
+
+# Live modules keyed by their id, allowing modules to be referred by id across forked processes.
+module_registry: WeakValueDictionary[int, Module] = WeakValueDictionary()
+# Option set by `Module.naming_by_params`, or None for the global option.
+_scoped_naming_by_params: ContextVar[None | bool] = ContextVar("scoped_naming_by_params", default=None)
+
+
+class SpecializationCache:
+    """
+    Cache of specialized modules of a class, keyed by the arguments passed to the constructor.
+
+    The least recently used module is evicted when the cache is full.
+    The cache can be shared by the threads constructing modules concurrently.
+    """
+
+    def __init__(self, maxsize: None | int = 256):
+        """:param maxsize: Maximum number of modules kept in the cache. None for an unbounded cache."""
+        self.maxsize = maxsize
+        self.stats = PoolStats()
+        self._modules: OrderedDict[tuple, Module] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._modules)
+
+    def get(self, key: tuple) -> None | Module:
+        with self._lock:
+            if (module := self._modules.get(key)) is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            self._modules.move_to_end(key)
+            return module
+
+    def put(self, key: tuple, module: Module):
+        with self._lock:
+            self._modules[key] = module
+            self._modules.move_to_end(key)
+            if self.maxsize is not None and len(self._modules) > self.maxsize:
+                self._modules.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._modules.clear()
+            self.stats = PoolStats()
+
+
+# Types of the parameters which have a deterministic representation across processes
+_PLAIN_PARAM_TYPES = (type(None), bool, int, float, str, bytes, Enum)
+
+
+def _is_plain_param(value) -> bool:
+    if isinstance(value, tuple | list):
+        return all(_is_plain_param(item) for item in value)
+    return isinstance(value, _PLAIN_PARAM_TYPES)
 
 
 class _ModuleMetaClass(type):
     def __call__(cls, *args, **kwargs):
         # Reset code section to Logic. Restore after creation.
         with Synthesizable.code_section(CodeSectionType.LOGIC):
-            inst = super().__call__(*args, **kwargs)
+            # Capture the arguments specializing the module, before running the constructor.
+            params = cls._capture_params(args, kwargs)
+
+            cache_key = None
+            if (cache := cls.__dict__.get("specialization_cache")) is not None:
+                cache_key = cls._specialization_key(args, kwargs, params)
+                if cache_key is not None and (inst := cache.get(cache_key)) is not None:
+                    return inst
+
+            inst = cls.__new__(cls, *args, **kwargs)
+            inst._mod_params = params
             # Restore module stack after creation
-            ModuleContext().pop()
+            with ModuleContext().constructing():
+                inst.__init__(*args, **kwargs)
+            module_registry[id(inst)] = inst
+
+            if cache_key is not None:
+                cache.put(cache_key, inst)
             return inst
 
+    def _specialization_key(cls, args: tuple, kwargs: dict, params: OrderedDict) -> None | tuple:
+        """Return a hashable key of the constructor arguments, or None if any of them is not hashable."""
+        positional, _ = cls._init_params
+        key = (
+            tuple(params.items()),
+            args[len(positional):],
+            tuple(sorted((k, v) for k, v in kwargs.items() if k not in params)),
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _capture_params(cls, args: tuple, kwargs: dict) -> OrderedDict:
+        """
+        Map the arguments passed to the constructor to the named parameters of `__init__`.
+
+        Parameters not specified by the caller are filled with their default values.
+        `self`, `*args` and `**kwargs` are excluded.
+        """
+        if (init_params := cls.__dict__.get("_init_params")) is None:
+            # Cache the parameters of `__init__` per class
+            parameters = list(inspect.signature(cls.__init__).parameters.values())[1:]  # Skip `self`
+            init_params = cls._init_params = (
+                [
+                    param.name for param in parameters
+                    if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD)
+                ],
+                {
+                    param.name: param.default for param in parameters
+                    if param.kind not in (param.VAR_KEYWORD, param.VAR_POSITIONAL)
+                },
+            )
+        positional, defaults = init_params
+
+        passed = dict(zip(positional, args))
+        passed.update((key, value) for key, value in kwargs.items() if key in defaults)
+        return OrderedDict(
+            (arg, passed.get(arg, default))
+            for arg, default in defaults.items()
+            if arg in passed or default is not inspect.Parameter.empty
+        )
+
 
 class Module(Synthesizable, metaclass=_ModuleMetaClass):
     """
@@ -82,27 +225,26 @@ class Module(Synthesizable, metaclass=_ModuleMetaClass):
         self.io.q <<= self.io.a + 1
     """
 
-    _new_module_counter = count(0)
+    # Numbers the modules without a name by their class
+    _module_names = NameAllocator()
+    _naming_by_params = False
     output_file: None | PathLike = None
+    specialization_cache: None | SpecializationCache = None
+    _frozen: None | FrozenModule = None
+    # Attributes kept by a frozen module
+    _FROZEN_ATTRS = frozenset(("_config", "_mod_params", "io", "operation_pool_stats", "fold_stats"))
 
     def __init__(self, name: None | str = None, **kwargs):
         super().__init__(**kwargs)
+        # Names of the signals and instances created in the module
+        self.name_allocator = NameAllocator()
         ModuleContext().push(self)  # Push current module to the context stack
 
-        # Get the arguments passed to the __init__ method of the inherited class
-        # === DON'T REFACTOR BELOW. We are inspecting the stack and refactoring will affect the result ===
-        children_local = inspect.stack(0)[1].frame.f_locals
-        children_class = children_local.get("__class__")
-        func_signature = inspect.signature(children_class.__init__) if children_class else {}
-        self._mod_params = OrderedDict(**{
-            arg: children_local[arg]
-            for arg, param in func_signature.parameters.items()
-            if param.kind not in (param.VAR_KEYWORD, param.VAR_POSITIONAL) and arg != "self"
-        })
-        # === DON'T REFACTOR ABOVE ===
+        # The arguments passed to the __init__ method of the inherited class
+        # are captured by the metaclass as `self._mod_params`.
 
         if name is None:
-            name = f"{self.__class__.__name__}_{next(self._new_module_counter)}"
+            name = self._derive_name()
 
         self._config = ModuleConfig(
             module_class=type(self),
@@ -111,6 +253,10 @@ class Module(Synthesizable, metaclass=_ModuleMetaClass):
         self.io = IOPorts()
         self.manual_sva_collected = []
         self.assertions_collected = {}
+        self.constant_pool = {}
+        self.operation_pool = {}
+        self.operation_pool_stats = PoolStats()
+        self.fold_stats = FoldStats()
 
     def validate(self) -> list[Exception]:
         undriven_outputs = [
@@ -126,7 +272,7 @@ class Module(Synthesizable, metaclass=_ModuleMetaClass):
         return []
 
     def mod_declaration(self) -> str:
-        mod_decl = MOD_DECL_TEMPLATE.substitute(
+        mod_decl = MOD_DECL_FORMAT(
             name=self.name,
             io=",\n".join(
                 port.elaborate()
@@ -142,84 +288,175 @@ class Module(Synthesizable, metaclass=_ModuleMetaClass):
         This method generates the SystemVerilog code for the module.
         :returns: The SystemVerilog code for the module, and the list of submodules of the instance in the module.
         """
+        if self._frozen is not None:
+            return self._frozen.sv_code, set(self._frozen.submodules)
+
+        profiler = ElaborationProfiler._active
+        record = None if profiler is None else profiler.start(self.name)
+
         violations = self.validate()
         if violations:
             raise ValueError(f"Module {self.name} is not valid.", violations)
+        if record is not None:
+            record.lap("validate")
 
         mod_decl = self.mod_declaration()
+        if record is not None:
+            record.lap("declaration")
+
+        netlist = self.netlist()
+        netlist.check_name_conflicts()
+        if self.operation_pool_stats.hits or self.operation_pool_stats.misses:
+            logger.debug(
+                "Module %s: %d operations shared, %d operations created.",
+                self.name, self.operation_pool_stats.hits, self.operation_pool_stats.misses,
+            )
 
-        trace_from = self.io.outputs
-        trace_from += self.manual_sva_collected
-        trace_from += list(self.assertions_collected.values())
-        synth_objs, insts = self.trace(trace_from)
+        objects, kinds, sections = netlist.objects, netlist.kind, netlist.code_section
+        formal = CodeSectionType.FORMAL.value
+        insts = [objects[node] for node in netlist.traced_nodes if kinds[node] == NodeKind.INSTANCE]
+        synth_objs = [node for node in netlist.traced_nodes if kinds[node] != NodeKind.INSTANCE]
+        formal_objs = [node for node in synth_objs if sections[node] == formal]
+        synth_objs = [node for node in synth_objs if sections[node] != formal]
+        if record is not None:
+            record.lap("trace")
+            record.objects = dict(Counter(type(obj).__name__ for obj in objects))
+
+        folded = FoldResult()
+        if ConstantFolding._enabled:
+            folded = ConstantFolding(netlist).run()
+            self.fold_stats = FoldStats(folded=len(folded.replaced), removed=len(folded.removed))
+            logger.debug(
+                "Module %s: %d nodes folded, %d nodes removed.",
+                self.name, self.fold_stats.folded, self.fold_stats.removed,
+            )
+            synth_objs = [node for node in synth_objs if node not in folded.removed]
+            formal_objs = [node for node in formal_objs if node not in folded.removed]
+
+        inlined: dict[int, str] = {}
+        if Operation.inlining_enabled:
+            excluded = folded.replaced.keys() | folded.removed | folded.referred
+            for node in netlist.inlinable_operations(excluded=excluded):
+                inlined[id(objects[node])] = objects[node].inline_expression(inlined)
+            synth_objs = [node for node in synth_objs if id(objects[node]) not in inlined]
+            formal_objs = [node for node in formal_objs if id(objects[node]) not in inlined]
+        if record is not None:
+            record.lap("optimize")
+
+        def elaborate_node(node: int) -> str:
+            if (driver := folded.replaced.get(node)) is not None:
+                return SIGNAL_ASSIGN_FORMAT(name=netlist.name(node), driver=driver)
+            if (reachable := folded.reachable_cases.get(node)) is not None:
+                return objects[node].elaborate(reachable)
+            if inlined and kinds[node] == NodeKind.OPERATION:
+                return objects[node].elaborate(inlined)
+            return objects[node].elaborate()
+
+        # The code is emitted into a single buffer of lines, which is joined once.
+        # An empty section is emitted as an empty line.
+        sv_code = [mod_decl]
+
+        def emit_section(lines: list[str]):
+            sv_code.extend(lines if lines else ("",))
+
+        emit_section([
+            netlist.signal_decl(node)
+            for node in synth_objs
+            if kinds[node] in SIGNAL_KINDS
+        ])
+        formal_signal_decl = "\n".join(
+            netlist.signal_decl(node)
+            for node in formal_objs
+            if kinds[node] in SIGNAL_KINDS
+        )
+        if record is not None:
+            record.lap("declaration")
 
-        formal_objs = [
-            obj for obj in synth_objs
-            if obj._code_section == CodeSectionType.FORMAL
-        ]
-        synth_objs = [
-            obj for obj in synth_objs
-            if obj._code_section != CodeSectionType.FORMAL
-        ]
+        emit_section([inst.elaborate() for inst in insts] + [elaborate_node(node) for node in synth_objs])
+        formal_impl = "\n".join(
+            elaborate_node(node)
+            for node in formal_objs
+        )
 
-        signal_decl = [
-            signal.signal_decl()
-            for signal in synth_objs
-            if isinstance(signal, Signal) and not (signal.is_input or signal.is_output)
-        ]
-        signal_decl = "\n".join(signal_decl)
+        sv_code.append(FORMAL_SECTION_FORMAT(code=f"{formal_signal_decl}\n{formal_impl}"))
 
-        mod_impl = [
-            inst.elaborate()
-            for inst in insts
-        ]
-        mod_impl += [
-            synth_obj.elaborate()
-            for synth_obj in synth_objs
-        ]
+        emit_section(netlist.output_assignments())
+        if record is not None:
+            record.lap("implementation")
 
-        mod_impl = "\n".join(mod_impl)
+        sv_code.append(self.post_elaborate())
+        sv_code.append("endmodule")
+        sv_code = "\n".join(sv_code)
+        if record is not None:
+            record.lap("post_elaborate")
+            record.emitted_bytes = len(sv_code.encode())
 
-        mod_output_assignment = "\n".join(
-            SIGNAL_ASSIGN_TEMPLATE.substitute(
-                name=output.name,
-                driver=output.driver().name,
-            )
-            for output in self.io.outputs
-        )
+        submodules = {inst.module for inst in insts}
 
-        formal_signal_decl = [
-            signal.signal_decl()
-            for signal in formal_objs
-            if isinstance(signal, Signal) and not (signal.is_input or signal.is_output)
-        ]
-        formal_signal_decl = "\n".join(formal_signal_decl)
-        formal_impl = [
-            obj.elaborate()
-            for obj in formal_objs
-        ]
-        formal_impl = "\n".join(formal_impl)
+        return sv_code, submodules
 
-        formal_section = FORMAL_SECTION_TEMPLATE.substitute(
-            code=f"{formal_signal_decl}\n{formal_impl}"
-        )
+    @property
+    def frozen(self) -> None | FrozenModule:
+        """The summary of the module if it is frozen, otherwise None."""
+        return self._frozen
 
-        extra_code = self.post_elaborate()
+    def freeze(self) -> None | FrozenModule:
+        """
+        Elaborate the module, and replace the objects constructed in the module with a compact summary.
 
-        mod_end = "endmodule"
+        A frozen module keeps its name, parameters, IO ports (without their drivers), `spec` and the elaborated code.
+        The signals, operations, instances and other attributes set by the constructor are released,
+        so they do not stay alive through `Elaborator.name_to_module` or the instances of the module.
 
-        sv_code = "\n".join((
-            mod_decl,
-            signal_decl,
-            mod_impl,
-            formal_section,
-            mod_output_assignment,
-            extra_code,
-            mod_end,
-        ))
-        submodules = {inst.module for inst in insts}
+        The module can still be instantiated, and it elaborates to the frozen code.
+        Its submodules are kept, but they are not frozen by this method.
+        Use `Elaborator.to_dict(..., freeze=True)` to freeze the whole hierarchy once it is elaborated.
 
-        return sv_code, submodules
+        Modules overriding `elaborate()` (e.g. ExternalModule) are not frozen,
+        as their elaboration may depend on any of their attributes.
+
+        :returns: The summary of the module, or None if the module is not frozen.
+        """
+        if self._frozen is None:
+            self._freeze(*self.elaborate())
+        return self._frozen
+
+    def _freeze(self, sv_code: str, submodules: Iterable[Module]):
+        """Freeze the module with its elaborated code and submodules, see `freeze`."""
+        if self._frozen is not None or type(self).elaborate is not Module.elaborate:
+            return
+        frozen = FrozenModule(
+            sv_code=sv_code,
+            submodules=frozenset(submodules),
+            spec=self.spec,
+            digest=hashlib.blake2b(sv_code.encode(), digest_size=20).hexdigest(),
+        )
+        for output in self.io.outputs:
+            output._drivers.clear()
+        for attr in self.__dict__.keys() - self._FROZEN_ATTRS:
+            delattr(self, attr)
+        self._init_callstack = self._annotated_from = None
+        self.manual_sva_collected = []
+        self.assertions_collected = {}
+        self.constant_pool = {}
+        self.operation_pool = {}
+        self._frozen = frozen
+
+    def _trace_roots(self) -> list[Synthesizable]:
+        """Return the objects to trace the module from: the outputs, manual SVA and assertions."""
+        return self.io.outputs + self.manual_sva_collected + list(self.assertions_collected.values())
+
+    def netlist(self) -> Netlist:
+        """
+        Lower the module into an array-backed netlist.
+
+        The netlist holds the module ports and the objects traced from `_trace_roots()`, in topological order.
+        """
+        nodes, _, _ = _trace_nodes(self._trace_roots())
+        return Netlist.lower(
+            self.io.inputs, nodes, self.io.outputs,
+            depends_on=lambda obj: _trace_rule(obj).depends_on(obj),
+        )
 
     def post_elaborate(self) -> str:
         """
@@ -234,97 +471,96 @@ class Module(Synthesizable, metaclass=_ModuleMetaClass):
 
     @staticmethod
     def trace(trace_from: list[Synthesizable]) -> tuple[list[Synthesizable], list[Instance]]:
-        """Trace nets and instances from a set of synthesizable objects."""
-        traced_obj_id: set[int] = set()
-        traced_inst_id: set[int] = set()
-        traced_obj: list[Synthesizable] = []
-        traced_inst: list[Instance] = []
-        obj_to_be_traced: dict[int, Synthesizable] = {
-            id(obj): obj
-            for obj in trace_from
-        }
+        """
+        Trace nets and instances from a set of synthesizable objects.
 
-        while obj_to_be_traced:
-            next_trace = {}
-            for obj_id, obj in obj_to_be_traced.items():
-                if obj_id in traced_obj_id:
-                    continue
-                if not isinstance(obj, (Input, Output)):
-                    traced_obj_id.add(obj_id)
-                    traced_obj.append(obj)
+        The objects are traversed depth-first, and collected after the objects they depend on.
+        Hence, the result is in a deterministic topological order: drivers come before the signals they drive,
+        except for the loops broken by registers.
 
-                match obj:
-                    case Input():
-                        continue
-
-                    case Output():
-                        owner_inst = obj.owner_instance
-                        if owner_inst is None:
-                            next_trace |= {
-                                id_sig: sig for sig in obj.drivers
-                                if (id_sig := id(sig)) not in traced_obj_id
-                            }
-                        else:
-                            if id(owner_inst) in traced_inst_id:
-                                continue
-                            traced_inst_id.add(id(owner_inst))
-                            traced_inst.append(owner_inst)
-                            # Trace the IO Ports of an instance.
-                            # Input port is driven by external signal, so we go for the driver.
-                            # Output port is an extra signal placeholder,
-                            # so we add the port itself and ensure the declaration exists.
-                            port_drivers = [
-                                port.driver() if port.is_input else port
-                                for port in owner_inst.io.values()
-                            ]
-                            next_trace |= {
-                                id_sig: sig for sig in port_drivers
-                                if (id_sig := id(sig)) not in traced_obj_id
-                            }
-
-                    case MemorySignal() as obj_mem_sig:
-                        next_trace |= {
-                            id_sig: sig for sig in obj_mem_sig.drivers
-                            if (id_sig := id(sig)) not in traced_obj_id
-                        }
-
-                        obj_mem = obj_mem_sig.memory
-                        if id(obj_mem) in traced_obj_id:
-                            continue
-
-                        traced_obj_id.add(id(obj_mem))
-                        traced_obj.append(obj_mem)
-                        next_trace |= {
-                            id_sig: sig for sig in obj_mem.drivers
-                            if (id_sig := id(sig)) not in traced_obj_id
-                        }
-
-                    case Signal() | SVAManual() | AssertionCell():
-                        next_trace |= {
-                            id_sig: sig for sig in obj.drivers
-                            if (id_sig := id(sig)) not in traced_obj_id
-                        }
-
-                    case _:
-                        raise ValueError(f"Unsupported object type: {obj}")
-
-            obj_to_be_traced = next_trace
-
-        traced_obj.reverse()
-        traced_inst.reverse()
+        :returns: The traced synthesizable objects and instances.
+        """
+        _, traced_obj, traced_inst = _trace_nodes(trace_from)
 
         # Check if we have name conflict on the signals and instances
-        sig_name_counter = Counter(sig.name for sig in traced_obj)
-        inst_name_counter = Counter(inst.name for inst in traced_inst)
-        sig_conflicts = [name for name, cnt in sig_name_counter.items() if cnt > 1]
-        inst_conflicts = [name for name, cnt in inst_name_counter.items() if cnt > 1]
-        if sig_conflicts:
-            raise ValueError(f"Signal name conflict: {sig_conflicts}")
-        if inst_conflicts:
-            raise ValueError(f"Instance name conflict: {inst_conflicts}")
+        for kind, objs in (("Signal", traced_obj), ("Instance", traced_inst)):
+            names = [obj.name for obj in objs]
+            if len(set(names)) != len(names):
+                conflicts = [name for name, cnt in Counter(names).items() if cnt > 1]
+                raise ValueError(f"{kind} name conflict: {conflicts}")
 
         return traced_obj, traced_inst
 
+    @staticmethod
+    def cached(maxsize: None | int = 256):
+        """
+        Return a class decorator to memoize the specialized modules of a Module class.
+
+        Constructing the class with the same arguments returns the same module object,
+        so it is constructed and elaborated once, but can be instantiated many times.
+        Arguments which are not hashable (e.g. list, Signal) bypass the cache.
+        The cache applies to the decorated class only, but not its subclasses.
+
+        Example:
+        @Module.cached(maxsize=64)
+        class Adder(Module):
+            ...
+
+        assert Adder(width=16) is Adder(width=16)
+        Adder.specialization_cache.stats  # PoolStats(hits=1, misses=1)
+
+        :param maxsize: Maximum number of modules kept, the least recently used one is evicted.
+            None for an unbounded cache.
+        """
+
+        def decorator(cls: type[Module]):
+            cls.specialization_cache = SpecializationCache(maxsize)
+            return cls
+
+        return decorator
+
+    @classmethod
+    @contextmanager
+    def naming_by_params(cls, enable: bool = True):
+        """
+        Name the modules constructed within this context manager by their class and parameters.
+
+        A module without a name is named `{ClassName}_{digest}`, where the digest is derived from
+        the module and qualified name of the class, and the parameters of `__init__`.
+        Modules specialized with the same parameters share the same name, in every run and process,
+        hence they are elaborated only once.
+        It requires the constructor to be deterministic, i.e. the same parameters build the same logic.
+
+        Modules with parameters other than None, bool, int, float, str, bytes, Enum, and tuples or lists of them
+        (e.g. a Signal) are numbered by their class as usual.
+        The option is local to the current thread or asyncio task.
+
+        :param enable: Enable or disable the naming by parameters.
+        """
+        token = _scoped_naming_by_params.set(enable)
+        try:
+            yield
+        finally:
+            _scoped_naming_by_params.reset(token)
+
+    @classmethod
+    def set_naming_by_params(cls, enable: bool):
+        """Enable or disable the naming of modules by their parameters globally, outside of the contexts."""
+        Module._naming_by_params = enable
+
+    def _derive_name(self) -> str:
+        """Name the module by its class, and the digest of its parameters if `naming_by_params` is enabled."""
+        cls = type(self)
+        params = tuple(self._mod_params.items())
+        if (enabled := _scoped_naming_by_params.get()) is None:
+            enabled = Module._naming_by_params
+        if enabled and _is_plain_param(params):
+            digest = hashlib.blake2b(
+                repr((cls.__module__, cls.__qualname__, params)).encode(), digest_size=8,
+            ).hexdigest()
+            return f"{cls.__name__}_{digest}"
+        return Module._module_names.allocate(cls.__name__)
+
     def instance(
             self, name: None | str = None,
             io: None | dict[str, Signal] = None
@@ -401,6 +637,8 @@ class Module(Synthesizable, metaclass=_ModuleMetaClass):
 
         It is a dictionary which can be further processed.
         """
+        if self._frozen is not None:
+            return self._frozen.spec
         return {
             "name": self.name,
             "description": self._module_doc_str.strip(),
@@ -428,15 +666,13 @@ class Module(Synthesizable, metaclass=_ModuleMetaClass):
 class Instance(Synthesizable):
     """An instance of a module."""
 
-    _new_inst_counter = count(0)
-
     def __init__(self,
                  module: Module, name: None | str = None,
                  io: None | dict[str, Signal] = None,
                  **kwargs
                  ):
         if name is None:
-            name = f"{module.name}_inst_{next(self._new_inst_counter)}"
+            name = ModuleContext().allocate_name(f"{module.name}_inst")
         super().__init__(**kwargs)
         self._inst_config = ModuleInstanceConfig(
             module=module,
@@ -508,10 +744,10 @@ class Instance(Synthesizable):
             if port.is_input:
                 signal_name = port.driver().name
 
-            io_list.append(IO_TEMPLATE.substitute(port_name=port_name, signal_name=signal_name))
+            io_list.append(IO_FORMAT(port_name=port_name, signal_name=signal_name))
 
         io_list = ",\n".join(io_list)
-        return INST_TEMPLATE.substitute(
+        return INST_FORMAT(
             module_name=module_name,
             inst_name=inst_name,
             io=io_list,
@@ -522,6 +758,113 @@ class Instance(Synthesizable):
         return self
 
 
+class _TraceTarget(Enum):
+    """The list collecting the traced objects."""
+
+    OBJ = auto()
+    INST = auto()
+
+
+class _TraceRule(NamedTuple):
+    """How `Module.trace` handles a type of objects."""
+
+    # Return the objects which the object depends on
+    depends_on: Callable[[Synthesizable], Iterable[Synthesizable]]
+    # Where the object is collected, or None if it is not collected
+    target: None | _TraceTarget
+
+
+def _trace_output(output: Output) -> Iterable[Synthesizable]:
+    # Output ports of an instance are traced through the instance
+    owner_inst = output.owner_instance
+    return output.drivers if owner_inst is None else (owner_inst,)
+
+
+def _trace_instance(inst: Instance) -> Iterable[Synthesizable]:
+    # Input port is driven by external signal, so we go for the driver.
+    # Output port is connected to a signal placeholder, so we add the placeholder and ensure the declaration exists.
+    return [
+        port.driver() if port.is_input else port
+        for port in inst.io.values()
+    ]
+
+
+def _trace_memory_signal(signal: MemorySignal) -> Iterable[Synthesizable]:
+    return *signal.drivers, signal.memory
+
+
+def _trace_drivers(obj: Synthesizable) -> Iterable[Synthesizable]:
+    return obj.drivers
+
+
+def _trace_signal_drivers(signal: Signal) -> Iterable[Synthesizable]:
+    # Skip the copy made by `Signal.drivers`
+    return signal._drivers.values()
+
+
+_TRACE_RULES: dict[type, _TraceRule] = {
+    Input: _TraceRule(lambda _: (), None),
+    Output: _TraceRule(_trace_output, None),
+    Instance: _TraceRule(_trace_instance, _TraceTarget.INST),
+    MemorySignal: _TraceRule(_trace_memory_signal, _TraceTarget.OBJ),
+    Memory: _TraceRule(_trace_drivers, _TraceTarget.OBJ),
+    Signal: _TraceRule(_trace_signal_drivers, _TraceTarget.OBJ),
+    SVAManual: _TraceRule(_trace_drivers, _TraceTarget.OBJ),
+    AssertionCell: _TraceRule(_trace_drivers, _TraceTarget.OBJ),
+}
+
+
+def _trace_rule(obj: Synthesizable) -> _TraceRule:
+    """Dispatch the trace rule by the type of the object, the rules of subclasses are resolved once."""
+    cls = type(obj)
+    rule = _TRACE_RULES.get(cls)
+    if rule is None:
+        rule = next((_TRACE_RULES[klass] for klass in cls.__mro__ if klass in _TRACE_RULES), None)
+        if rule is None:
+            raise ValueError(f"Unsupported object type: {obj}")
+        if rule.depends_on is _trace_signal_drivers and cls.drivers is not Signal.drivers:
+            rule = _TraceRule(_trace_drivers, rule.target)
+        _TRACE_RULES[cls] = rule
+    return rule
+
+
+def _trace_nodes(trace_from: list[Synthesizable]) -> tuple[list[Synthesizable], list[Synthesizable], list[Instance]]:
+    """
+    Trace the objects and instances depth-first, see `Module.trace`.
+
+    :returns: All collected objects and instances in topological order, the objects, and the instances.
+    """
+    visited: set[int] = set()
+    traced: list[Synthesizable] = []
+    traced_obj: list[Synthesizable] = []
+    traced_inst: list[Instance] = []
+
+    for root in trace_from:
+        if id(root) in visited:
+            continue
+        visited.add(id(root))
+        rule = _trace_rule(root)
+        stack = [(root, iter(rule.depends_on(root)), rule.target)]
+        while stack:
+            obj, depends_on, target = stack[-1]
+            for dep in depends_on:
+                if id(dep) not in visited:
+                    visited.add(id(dep))
+                    rule = _trace_rule(dep)
+                    stack.append((dep, iter(rule.depends_on(dep)), rule.target))
+                    break
+            else:
+                stack.pop()
+                if target is _TraceTarget.OBJ:
+                    traced.append(obj)
+                    traced_obj.append(obj)
+                elif target is _TraceTarget.INST:
+                    traced.append(obj)
+                    traced_inst.append(obj)
+
+    return traced, traced_obj, traced_inst
+
+
 class VerilogWrapper(Module):
     """
     VerilogWrapper creates a module that wraps a module in a Verilog Format.
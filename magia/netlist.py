@@ -0,0 +1,311 @@
+"""
+Array-backed netlist of a module.
+
+The netlist is a compact representation of the traced graph of a module.
+Each node is a traced object, stored as an index into typed arrays of its attributes,
+and the drivers of the nodes are stored as edge lists in Compressed Sparse Row (CSR) format.
+
+Passes over the whole graph (e.g. validation, declaration, fanout analysis) work on the arrays,
+instead of walking the Python objects and their properties.
+The netlist can be pickled without the Python objects, so it is cheap to be sent to another process.
+"""
+from __future__ import annotations
+
+import re
+from array import array
+from collections import Counter
+from collections.abc import Callable, Collection, Iterable
+from enum import IntEnum, auto
+from functools import cache
+
+from .assertions import AssertionCell
+from .comb_ops import Operation
+from .comb_select import Case, When
+from .constant import Constant
+from .data_struct import OPType
+from .io_signal import Input, Output
+from .memory import Memory, MemorySignal
+from .register import Register
+from .signals import (
+    SIGNAL_ASSIGN_FORMAT,
+    SIGNAL_DECL_FORMAL_TEMPLATE,
+    SIGNAL_DECL_TEMPLATE,
+    SIGNAL_DECL_VERILOG_TEMPLATE,
+    CodeSectionType,
+    Signal,
+    Synthesizable,
+)
+from .sva_manual import SVAManual
+
+NO_NAME = -1
+# Names assigned to the signals which are not named by the user
+AUTO_NAME_PATTERN = re.compile(r"(?:net|const)_g?\d+")
+
+
+class NodeKind(IntEnum):
+    """Kind of the nodes in a netlist."""
+
+    INPUT = auto()
+    OUTPUT = auto()
+    SIGNAL = auto()
+    OPERATION = auto()
+    CONSTANT = auto()
+    REGISTER = auto()
+    WHEN = auto()
+    CASE = auto()
+    MEMORY_SIGNAL = auto()
+    MEMORY = auto()
+    INSTANCE = auto()
+    SVA_MANUAL = auto()
+    ASSERTION = auto()
+
+
+# Kinds of nodes, which are signals declared in the module implementation.
+SIGNAL_KINDS = frozenset((
+    NodeKind.SIGNAL, NodeKind.OPERATION, NodeKind.CONSTANT, NodeKind.REGISTER,
+    NodeKind.WHEN, NodeKind.CASE, NodeKind.MEMORY_SIGNAL,
+))
+
+
+@cache
+def _node_kind(cls: type) -> NodeKind:
+    """Resolve the kind of nodes by the type of the object."""
+    from .module import Instance  # Deferred import, as module.py lowers modules into netlists.
+
+    kinds = {
+        Input: NodeKind.INPUT,
+        Output: NodeKind.OUTPUT,
+        Operation: NodeKind.OPERATION,
+        Constant: NodeKind.CONSTANT,
+        Register: NodeKind.REGISTER,
+        When: NodeKind.WHEN,
+        Case: NodeKind.CASE,
+        MemorySignal: NodeKind.MEMORY_SIGNAL,
+        Signal: NodeKind.SIGNAL,
+        Memory: NodeKind.MEMORY,
+        Instance: NodeKind.INSTANCE,
+        SVAManual: NodeKind.SVA_MANUAL,
+        AssertionCell: NodeKind.ASSERTION,
+    }
+    kind = next((kinds[klass] for klass in cls.__mro__ if klass in kinds), None)
+    if kind is None:
+        raise ValueError(f"Unsupported object type: {cls.__name__}")
+    return kind
+
+
+@cache
+def _decl_affixes(section: int, is_reg: bool, signed: bool, width: int) -> tuple[str, str]:
+    """Return the text before and after the signal name in the declaration."""
+    match CodeSectionType(section):
+        case CodeSectionType.VERILOG:
+            template = SIGNAL_DECL_VERILOG_TEMPLATE
+        case CodeSectionType.FORMAL if is_reg:
+            template = SIGNAL_DECL_FORMAL_TEMPLATE
+        case _:
+            template = SIGNAL_DECL_TEMPLATE
+    prefix, suffix = template.substitute(
+        signed="signed" if signed else "",
+        width=f"[{width - 1}:0]" if width > 1 else "",
+        name="\0",
+    ).split("\0")
+    return prefix, suffix
+
+
+class Netlist:
+    """
+    Array-backed netlist of a module.
+
+    Nodes are numbered in a topological order: the module inputs, the traced objects and instances,
+    and then the module outputs.
+    The drivers of node `i` are `driver_ids[driver_offsets[i]:driver_offsets[i + 1]]`.
+    The output ports of an instance are represented by the instance node.
+    """
+
+    __slots__ = (
+        "names", "kind", "name_id", "width", "signed", "code_section", "op_type", "annotated",
+        "driver_offsets", "driver_ids", "num_inputs", "num_outputs", "objects",
+    )
+
+    def __init__(self):
+        self.num_inputs = 0
+        self.num_outputs = 0
+        self.names: list[str] = []
+        self.kind = array("B")
+        self.name_id = array("i")
+        self.width = array("I")
+        self.signed = array("B")
+        self.code_section = array("B")
+        self.op_type = array("B")
+        self.annotated = array("B")
+        self.driver_offsets = array("I", [0])
+        self.driver_ids = array("I")
+
+        # The objects represented by the nodes, which are not pickled.
+        self.objects: list[None | Synthesizable] = []
+
+    @classmethod
+    def lower(
+            cls,
+            inputs: list[Input], nodes: list[Synthesizable], outputs: list[Output],
+            depends_on: Callable[[Synthesizable], Iterable[Synthesizable]],
+    ) -> Netlist:
+        """
+        Lower the traced objects of a module into a netlist.
+
+        :param inputs: The input ports of the module.
+        :param nodes: The traced objects and instances, in topological order.
+        :param outputs: The output ports of the module.
+        :param depends_on: Return the objects which an object depends on, i.e. the rules of `Module.trace`.
+        :returns: The netlist.
+        """
+        netlist = cls()
+        netlist.num_inputs, netlist.num_outputs = len(inputs), len(outputs)
+        objects = netlist.objects = [*inputs, *nodes, *outputs]
+        node_id = {id(obj): i for i, obj in enumerate(objects)}
+
+        name_id: dict[str, int] = {}
+        kind, names, widths, signed, sections, op_types, annotated = (
+            netlist.kind, netlist.name_id, netlist.width, netlist.signed,
+            netlist.code_section, netlist.op_type, netlist.annotated,
+        )
+        driver_offsets, driver_ids = netlist.driver_offsets, netlist.driver_ids
+
+        for obj in objects:
+            node_kind = _node_kind(type(obj))
+            kind.append(node_kind)
+            sections.append(obj._code_section.value)
+            annotated.append(obj._annotated_from is not None)
+
+            name = obj.name
+            names.append(NO_NAME if name is None else name_id.setdefault(name, len(name_id)))
+            if isinstance(obj, Signal):
+                config = obj.signal_config
+                widths.append(config.width)
+                signed.append(config.signed)
+                op_types.append(config.op_type)
+            else:
+                widths.append(0)
+                signed.append(False)
+                op_types.append(0)
+
+            if node_kind != NodeKind.INPUT:
+                for dep in depends_on(obj):
+                    dep_id = node_id.get(id(dep))
+                    if dep_id is None:
+                        # Output port of an instance
+                        dep_id = node_id[id(dep.owner_instance)]
+                    driver_ids.append(dep_id)
+            driver_offsets.append(len(driver_ids))
+
+        netlist.names = list(name_id)
+        return netlist
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def __getstate__(self) -> dict:
+        return {attr: getattr(self, attr) for attr in self.__slots__ if attr != "objects"}
+
+    def __setstate__(self, state: dict):
+        for attr, value in state.items():
+            setattr(self, attr, value)
+        self.objects = [None] * len(self.kind)
+
+    @property
+    def traced_nodes(self) -> range:
+        """The ids of the traced objects and instances, i.e. the nodes other than the module ports."""
+        return range(self.num_inputs, len(self.kind) - self.num_outputs)
+
+    def name(self, node: int) -> None | str:
+        """Return the name of the node."""
+        name_id = self.name_id[node]
+        return None if name_id == NO_NAME else self.names[name_id]
+
+    def drivers(self, node: int) -> array:
+        """Return the node ids driving the node."""
+        return self.driver_ids[self.driver_offsets[node]:self.driver_offsets[node + 1]]
+
+    def nodes(self, *kinds: NodeKind) -> list[int]:
+        """Return the ids of the nodes of the kinds, in topological order."""
+        kinds = frozenset(kinds)
+        return [node for node, kind in enumerate(self.kind) if kind in kinds]
+
+    def fanout(self) -> array:
+        """Return the number of nodes driven by each node."""
+        fanout = array("I", [0]) * len(self.kind)
+        for driver in self.driver_ids:
+            fanout[driver] += 1
+        return fanout
+
+    def inlinable_operations(self, excluded: Collection[int] = ()) -> list[int]:
+        """
+        Return the operations which can be inlined into the expression of the operation using them.
+
+        The operations are used by a single operation in the same code section, which is not slicing,
+        and they are not named by the user nor annotated.
+        Operations are returned in topological order, so the operands are inlined before their users.
+
+        :param excluded: Nodes which are not elaborated as operations, e.g. replaced by constant folding.
+        """
+        kinds, op_types, sections = self.kind, self.op_type, self.code_section
+        user = [-1] * len(kinds)
+        fanout = self.fanout()
+        for node in range(len(kinds)):
+            for driver in self.drivers(node):
+                user[driver] = node
+
+        return [
+            node for node in self.traced_nodes
+            if kinds[node] == NodeKind.OPERATION
+            and fanout[node] == 1
+            and node not in excluded and user[node] not in excluded
+            and kinds[user[node]] == NodeKind.OPERATION
+            and op_types[user[node]] != OPType.SLICE
+            and sections[user[node]] == sections[node]
+            and not self.annotated[node]
+            and self.width[node] > 0
+            and AUTO_NAME_PATTERN.fullmatch(self.name(node) or "")
+        ]
+
+    def check_name_conflicts(self):
+        """Raise ValueError if multiple signals or instances share the same name."""
+        kinds = self.kind
+        signal_names = [
+            self.name_id[node] for node, kind in enumerate(kinds)
+            if kind not in (NodeKind.INPUT, NodeKind.OUTPUT, NodeKind.INSTANCE)
+        ]
+        inst_names = [self.name_id[node] for node, kind in enumerate(kinds) if kind == NodeKind.INSTANCE]
+        for kind_name, name_ids in (("Signal", signal_names), ("Instance", inst_names)):
+            if len(set(name_ids)) != len(name_ids):
+                conflicts = [
+                    None if name_id == NO_NAME else self.names[name_id]
+                    for name_id, cnt in Counter(name_ids).items() if cnt > 1
+                ]
+                raise ValueError(f"{kind_name} name conflict: {conflicts}")
+
+    def signal_decl(self, node: int) -> str:
+        """
+        Declare the signal of the node in the module implementation.
+
+        It is equivalent to `Signal.signal_decl()`, but formatted from the arrays.
+        """
+        if self.annotated[node]:
+            return self.objects[node].signal_decl()
+        if self.name_id[node] == NO_NAME:
+            raise ValueError("Signal name is not set")
+        if (width := self.width[node]) == 0:
+            raise ValueError("Signal width is not set and cannot be inferred")
+        prefix, suffix = _decl_affixes(
+            self.code_section[node], self.op_type[node] == OPType.REG, bool(self.signed[node]), width,
+        )
+        return f"{prefix}{self.names[self.name_id[node]]}{suffix}"
+
+    def output_assignments(self) -> list[str]:
+        """Assign the output ports of the module from their drivers."""
+        return [
+            SIGNAL_ASSIGN_FORMAT(
+                name=self.name(node),
+                driver=self.name(self.driver_ids[self.driver_offsets[node]]),
+            )
+            for node in range(len(self.kind) - self.num_outputs, len(self.kind))
+        ]
@@ -0,0 +1,103 @@
+"""
+Profiler of the elaboration.
+
+The profiler records the time spent in each phase of `Module.elaborate()` for every module,
+together with the number of traced objects by type and the size of the emitted code.
+`Module.elaborate()` only checks if a profiler is active, so the hooks cost nothing when profiling is disabled.
+"""
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from os import PathLike
+from pathlib import Path
+from time import perf_counter
+
+# Phases of `Module.elaborate()`, in the order of execution.
+PHASES = ("validate", "trace", "optimize", "declaration", "implementation", "post_elaborate")
+
+
+@dataclass(slots=True)
+class ModuleProfile:
+    """Metrics of the elaboration of a module. Time is measured in seconds."""
+
+    name: str
+    phases: dict[str, float] = field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+    objects: dict[str, int] = field(default_factory=dict)
+    emitted_bytes: int = 0
+    _tick: float = field(default_factory=perf_counter, repr=False)
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def lap(self, phase: str):
+        """Add the time elapsed since the last lap to the phase."""
+        tick = perf_counter()
+        self.phases[phase] += tick - self._tick
+        self._tick = tick
+
+    def to_dict(self) -> dict:
+        result = asdict(self)
+        del result["_tick"]
+        result["total"] = self.total
+        return result
+
+
+class ElaborationProfiler:
+    """
+    Collect the `ModuleProfile` of the modules elaborated while the profiler is active.
+
+    Example:
+    with Elaborator.profile() as profiler:
+        Elaborator.to_dict(top)
+    profiler.to_json("profile.json")
+    """
+
+    _active: None | ElaborationProfiler = None
+
+    def __init__(self):
+        self.modules: list[ModuleProfile] = []
+
+    @classmethod
+    @contextmanager
+    def profile(cls) -> Iterator[ElaborationProfiler]:
+        """Activate a new profiler within the context. The previous profiler is restored afterwards."""
+        previous, cls._active = cls._active, cls()
+        try:
+            yield cls._active
+        finally:
+            cls._active = previous
+
+    def start(self, name: str) -> ModuleProfile:
+        """Start profiling the elaboration of a module."""
+        record = ModuleProfile(name)
+        self.modules.append(record)
+        return record
+
+    def phases(self) -> dict[str, float]:
+        """Return the total time of each phase over all modules."""
+        return {phase: sum(record.phases[phase] for record in self.modules) for phase in PHASES}
+
+    def to_dict(self) -> dict:
+        return {
+            "modules": [record.to_dict() for record in self.modules],
+            "phases": self.phases(),
+            "total": sum(record.total for record in self.modules),
+            "emitted_bytes": sum(record.emitted_bytes for record in self.modules),
+        }
+
+    def to_json(self, filename: None | PathLike = None, indent: None | int = 2) -> str:
+        """
+        Export the profile as JSON.
+
+        :param filename: If specified, the JSON is also written to the file.
+        :param indent: The indentation of the JSON.
+        :returns: The JSON string.
+        """
+        result = json.dumps(self.to_dict(), indent=indent)
+        if filename is not None:
+            Path(filename).write_text(result)
+        return result
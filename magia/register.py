@@ -2,15 +2,15 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from enum import IntEnum, auto
-from itertools import count
 from string import Template
 
 from .constant import Constant
 from .data_struct import OPType
-from .signals import Signal
+from .signals import Signal, compile_template
+from .utils import ModuleContext
 
 
-@dataclass
+@dataclass(slots=True)
 class RegisterConfig:
     enable: bool
     reset: bool
@@ -72,12 +72,13 @@ REG_TEMPLATE = {
         "end"
     ),
 }
+REG_FORMAT = {reg_type: compile_template(template) for reg_type, template in REG_TEMPLATE.items()}
 
 
 class Register(Signal):
     """Representing a register, most likely DFF."""
 
-    _new_reg_counter = count(0)
+    __slots__ = ("_reg_config",)
 
     def __init__(self, width: int,
                  enable: None | Signal = None,
@@ -90,7 +91,7 @@ class Register(Signal):
                  **kwargs
                  ):
         if name is None:
-            name = f"reg_{next(self._new_reg_counter)}"
+            name = ModuleContext().allocate_name("reg")
 
         super().__init__(width=width, name=name, **kwargs)
         self.signal_config.op_type = OPType.REG
@@ -195,4 +196,4 @@ class Register(Signal):
                 self._reg_config.async_reset_value, self.width, self.signed
             )
 
-        return REG_TEMPLATE[reg_type].substitute(**connections)
+        return REG_FORMAT[reg_type](**connections)
@@ -1,17 +1,19 @@
 from __future__ import annotations
 
 import inspect
-from collections.abc import Iterable
+import sys
+from collections.abc import Callable, Iterable
 from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
 from enum import Enum, auto
-from functools import cached_property
-from itertools import count
+from functools import cache
 from pathlib import Path
 from string import Template
-from typing import TYPE_CHECKING
+from types import FrameType
+from typing import TYPE_CHECKING, NamedTuple
 
-from .data_struct import OPType, SignalDict
+from .data_struct import DriverDict, OPType
 from .factory import constant, constant_like, create_case, create_comb_op, create_when, register, signal_config_like
 from .utils import ModuleContext
 
@@ -23,11 +25,39 @@ if TYPE_CHECKING:
 
 CURRENT_DIR = Path(__file__).parent
 
+
+def compile_template(template: Template) -> Callable[..., str]:
+    """
+    Compile a template into a formatter, which is faster than `Template.substitute()` in the elaboration.
+
+    The formatter is the `str.format` of the template, where the placeholders are converted into replacement fields.
+    :returns: A function substituting the placeholders with the keyword arguments.
+    """
+    fields = []
+    last_end = 0
+    for match in template.pattern.finditer(template.template):
+        fields.append(template.template[last_end:match.start()].replace("{", "{{").replace("}", "}}"))
+        if match.group("escaped") is not None:
+            fields.append("$")
+        elif (name := match.group("named") or match.group("braced")) is not None:
+            fields.append(f"{{{name}}}")
+        else:
+            raise ValueError(f"Invalid placeholder in template: {template.template!r}")
+        last_end = match.end()
+    fields.append(template.template[last_end:].replace("{", "{{").replace("}", "}}"))
+    return "".join(fields).format
+
+
 SIGNAL_DECL_TEMPLATE = Template("logic $signed $width $name;")
 SIGNAL_DECL_FORMAL_TEMPLATE = Template("logic $signed $width $name = 0;")
 SIGNAL_DECL_VERILOG_TEMPLATE = Template("wire $signed $width $name;")
 SIGNAL_ASSIGN_TEMPLATE = Template("assign $name = $driver;")
 ANNOTATION_TEMPLATE = Template("/*\nNet name: $net_name\n$comment$loc\n*/")
+SIGNAL_ASSIGN_FORMAT = compile_template(SIGNAL_ASSIGN_TEMPLATE)
+SIGNAL_DECL_FORMAT = {
+    template: compile_template(template)
+    for template in (SIGNAL_DECL_TEMPLATE, SIGNAL_DECL_FORMAL_TEMPLATE, SIGNAL_DECL_VERILOG_TEMPLATE)
+}
 
 
 class CodeSectionType(Enum):
@@ -37,7 +67,53 @@ class CodeSectionType(Enum):
     SVA_MANUAL = auto()
 
 
-@dataclass
+class CallStackMode(Enum):
+    """
+    Amount of call stack captured when a synthesizable object is created.
+
+    - OFF: Nothing is captured. `annotate()` records the call stack of its caller instead.
+    - LIGHT: Only the filename and line number of each frame are captured.
+    - FULL: The full `inspect.FrameInfo` of each frame is captured, including source code context.
+    """
+
+    OFF = auto()
+    LIGHT = auto()
+    FULL = auto()
+
+
+class FrameLocation(NamedTuple):
+    """Location of a frame in the call stack, captured by `CallStackMode.LIGHT`."""
+
+    filename: str
+    lineno: int
+
+
+@cache
+def _is_internal_file(filename: str) -> bool:
+    """Determine if the file is a part of the core magia package, which is excluded from the call stack."""
+    return Path(filename).parent == CURRENT_DIR
+
+
+def _light_callstack(frame: None | FrameType) -> list[FrameLocation]:
+    """Collect the filename and line number of the frames, starting from the given frame."""
+    callstack = []
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not _is_internal_file(filename):
+            callstack.append(FrameLocation(filename, frame.f_lineno))
+        frame = frame.f_back
+    return callstack
+
+
+@dataclass(slots=True)
+class BundleConfig:
+    bundle: None | Bundle = None
+    bundle_spec: None | BundleSpec = None
+    bundle_alias: None | str = None
+    bundle_type: None | BundleType = None
+
+
+@dataclass(slots=True)
 class SignalConfig:
     name: None | str = None
     width: int = 0
@@ -50,10 +126,33 @@ class SignalConfig:
     owner_instance: None | Instance = None
 
     # Specification of the bundle, if the signal is part of it
-    bundle: None | Bundle = None
-    bundle_spec: None | BundleSpec = None
-    bundle_alias: None | str = None
-    bundle_type: None | BundleType = None
+    # Kept aside, so only the signals in bundles pay for it.
+    bundle_config: None | BundleConfig = None
+
+    @property
+    def bundle(self) -> None | Bundle:
+        return None if self.bundle_config is None else self.bundle_config.bundle
+
+    @property
+    def bundle_spec(self) -> None | BundleSpec:
+        return None if self.bundle_config is None else self.bundle_config.bundle_spec
+
+    @property
+    def bundle_alias(self) -> None | str:
+        return None if self.bundle_config is None else self.bundle_config.bundle_alias
+
+    @property
+    def bundle_type(self) -> None | BundleType:
+        return None if self.bundle_config is None else self.bundle_config.bundle_type
+
+
+# State of the objects under construction, which is local to each thread and asyncio task.
+# Code section of the synthesizable objects created, see `Synthesizable.code_section`.
+_current_code_section: ContextVar[CodeSectionType] = ContextVar("current_code_section", default=CodeSectionType.LOGIC)
+# Print the signals as their names only, see `Signal.name_as_str`.
+_str_with_net_name_only: ContextVar[bool] = ContextVar("str_with_net_name_only", default=False)
+# Call stack capture mode of `Synthesizable.callstack_mode`, or None for the global mode.
+_scoped_callstack_mode: ContextVar[None | CallStackMode] = ContextVar("scoped_callstack_mode", default=None)
 
 
 class Synthesizable:
@@ -63,7 +162,9 @@ class Synthesizable:
     They can be elaborated into SystemVerilog code.
     """
 
-    _current_code_section = CodeSectionType.LOGIC
+    __slots__ = ("_init_callstack", "_annotated_from", "_comment", "_code_section")
+
+    _callstack_mode = CallStackMode.OFF
 
     @classmethod
     @contextmanager
@@ -75,23 +176,60 @@ class Synthesizable:
 
         :param section: The type of code section.
         """
-        prev_value, Synthesizable._current_code_section = Synthesizable._current_code_section, section
-        yield
-        Synthesizable._current_code_section = prev_value
+        token = _current_code_section.set(section)
+        try:
+            yield
+        finally:
+            _current_code_section.reset(token)
 
     @classmethod
     @property
     def current_code_section(cls) -> CodeSectionType:
-        return Synthesizable._current_code_section
+        return _current_code_section.get()
+
+    @classmethod
+    @contextmanager
+    def callstack_mode(cls, mode: CallStackMode):
+        """
+        Specify how the call stack is captured for the synthesizable objects created within this context manager.
+
+        The captured call stack is reported by the annotated objects in the elaborated code.
+
+        The mode is local to the current thread or asyncio task.
+
+        :param mode: The call stack capture mode.
+        """
+        token = _scoped_callstack_mode.set(mode)
+        try:
+            yield
+        finally:
+            _scoped_callstack_mode.reset(token)
+
+    @classmethod
+    def set_callstack_mode(cls, mode: CallStackMode):
+        """
+        Set the call stack capture mode globally, for all threads outside of `callstack_mode()`.
+
+        Capturing is disabled by default, as it dominates the construction time of large designs.
+        """
+        Synthesizable._callstack_mode = mode
 
     def __init__(self, **kwargs):
-        self._init_callstack = [
-            frame_info for frame_info in inspect.stack()[1:]
-            if Path(frame_info.filename).parent != CURRENT_DIR
-        ]
+        if (mode := _scoped_callstack_mode.get()) is None:
+            mode = Synthesizable._callstack_mode
+        match mode:
+            case CallStackMode.LIGHT:
+                self._init_callstack = _light_callstack(sys._getframe(1))
+            case CallStackMode.FULL:
+                self._init_callstack = [
+                    frame_info for frame_info in inspect.stack()[1:]
+                    if not _is_internal_file(frame_info.filename)
+                ]
+            case _:
+                self._init_callstack = None
         self._annotated_from = None
         self._comment = None
-        self._code_section = Synthesizable.current_code_section
+        self._code_section = _current_code_section.get()
 
     @property
     def name(self) -> str:
@@ -107,7 +245,7 @@ class Synthesizable:
         """
         raise NotImplementedError
 
-    @cached_property
+    @property
     def loc(self) -> str:
         """
         Get the location of the object in the code.
@@ -142,9 +280,14 @@ class Synthesizable:
         """
         Annotate the object with a comment.
 
+        If the call stack was not captured during creation, the call stack of the caller is recorded instead.
+
         :returns: The object itself.
         """
-        self._annotated_from = inspect.stack()[1].filename
+        caller = sys._getframe(1)
+        self._annotated_from = caller.f_code.co_filename
+        if self._init_callstack is None:
+            self._init_callstack = _light_callstack(caller)
         self._comment = comment
         return self
 
@@ -174,10 +317,9 @@ class Signal(Synthesizable):
     It can also drive other signals / module instances.
     """
 
-    DEFAULT_DRIVER: str = "d"
+    __slots__ = ("signal_config", "_drivers")
 
-    _new_signal_counter = count(0)
-    _str_with_net_name_only = False
+    DEFAULT_DRIVER: str = "d"
 
     def __init__(
             self,
@@ -191,7 +333,7 @@ class Signal(Synthesizable):
             **kwargs
     ):
         if name is None:
-            name = f"net_{next(self._new_signal_counter)}"
+            name = ModuleContext().allocate_name("net")
 
         super().__init__(**kwargs)
         self.signal_config = SignalConfig(
@@ -199,12 +341,15 @@ class Signal(Synthesizable):
             width=width,
             signed=signed,
             description="" if description is None else description,
-            bundle=bundle,
-            bundle_spec=bundle_spec,
-            bundle_alias=bundle_alias,
-            bundle_type=bundle_type,
         )
-        self._drivers = SignalDict()
+        if bundle is not None or bundle_spec is not None or bundle_alias is not None or bundle_type is not None:
+            self.signal_config.bundle_config = BundleConfig(
+                bundle=bundle,
+                bundle_spec=bundle_spec,
+                bundle_alias=bundle_alias,
+                bundle_type=bundle_type,
+            )
+        self._drivers = DriverDict()
         match self._code_section:
             case CodeSectionType.SVA_MANUAL:
                 if (module_context := ModuleContext().current) is not None:
@@ -344,7 +489,7 @@ class Signal(Synthesizable):
         if template is None:
             raise ValueError("Cannot determine the template.")
 
-        decl = template.substitute(
+        decl = SIGNAL_DECL_FORMAT[template](
             signed="signed" if self.signed else "",
             width=f"[{width - 1}:0]" if (width := self.width) > 1 else "",
             name=self.name,
@@ -357,15 +502,17 @@ class Signal(Synthesizable):
     @contextmanager
     def name_as_str(cls):
         """Declare a context that prints the net name of the signal only, but not the full representation."""
-        prev_value, cls._str_with_net_name_only = cls._str_with_net_name_only, True
-        yield
-        cls._str_with_net_name_only = prev_value
+        token = _str_with_net_name_only.set(True)
+        try:
+            yield
+        finally:
+            _str_with_net_name_only.reset(token)
 
     def __repr__(self):
         return f"{type(self).__name__}({self.name}:{self.width})"
 
     def __str__(self):
-        if self._str_with_net_name_only:
+        if _str_with_net_name_only.get():
             return self.name
         return repr(self)
 
@@ -375,10 +522,7 @@ class Signal(Synthesizable):
         if (driving_signal := self.driver()) is None or driving_signal.owner_instance is not None:
             return ""
 
-        return SIGNAL_ASSIGN_TEMPLATE.substitute(
-            name=self.name,
-            driver=self.driver().name,
-        )
+        return SIGNAL_ASSIGN_FORMAT(name=self.name, driver=driving_signal.name)
 
     def __ilshift__(self, other):
         """
@@ -29,10 +29,10 @@ def onehot_to_binary(onehot_input: Signal) -> Signal:
     """
     binary_width = (onehot_input.width - 1).bit_length()
     conversion_table = [
-        Constant(i, binary_width).when(onehot_input[i])
+        Constant.pooled(i, binary_width).when(onehot_input[i])
         for i in range(onehot_input.width)
     ]
-    binary_out: Signal = Constant(0, binary_width)
+    binary_out: Signal = Constant.pooled(0, binary_width)
     for entry in conversion_table:
         binary_out |= entry
     return binary_out
@@ -28,8 +28,6 @@ SVA_MANUAL_DISABLE_IFF_TEMPLATE = Template(
 class SVAManual(Synthesizable):
     """Manual SystemVerilog Assertions statements."""
 
-    assertion_count = 0
-
     def __init__(
             self, name: None | str, prop_statement: str, clk: Signal,
             disable_iff: None | Signal = None,
@@ -41,8 +39,7 @@ class SVAManual(Synthesizable):
             module_context.manual_sva_collected.append(self)
 
         if name is None:
-            name = f"prop_{SVAManual.assertion_count}"
-            SVAManual.assertion_count += 1
+            name = ModuleContext().allocate_name("prop")
         self._name = f"{prop_type.value}_{name}"
         self.prop_statement = prop_statement
         self.clk = clk
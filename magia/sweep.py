@@ -0,0 +1,173 @@
+"""
+Design-space sweep of a module class.
+
+A sweep constructs and elaborates a module class at each point of a parameter grid,
+and collects the code, the spec, the statistics of the traced objects and the timing of each point.
+Points are elaborated by a pool of forked worker processes, and yielded as soon as each point is completed.
+Each point is isolated: a point which fails to construct or elaborate records its error,
+without affecting the other points.
+"""
+from __future__ import annotations
+
+import csv
+import multiprocessing
+import traceback
+from collections import Counter
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from itertools import product
+from os import PathLike
+from pathlib import Path
+from time import perf_counter
+
+from .elaborator import Elaborator, _can_fork
+from .module import Module
+
+
+@dataclass(slots=True)
+class SweepPoint:
+    """Result of a point of the sweep. Time is measured in seconds."""
+
+    index: int
+    params: dict[str, object]
+    sv_code: dict[str, str] = field(default_factory=dict, repr=False)
+    spec: None | dict[str, object] = field(default=None, repr=False)
+    stats: dict[str, int] = field(default_factory=dict)
+    timing: dict[str, float] = field(default_factory=dict)
+    error: None | str = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_row(self) -> dict[str, object]:
+        """Flatten the point into a row of the table: the parameters, statistics, timing and error."""
+        return {"index": self.index, **self.params, **self.stats, **self.timing, "error": self.error}
+
+
+@dataclass(slots=True)
+class _SweepTask:
+    module_class: type[Module]
+    points: list[dict[str, object]]
+    top_only: bool
+    dedup: bool
+
+
+# Sweeps in progress, inherited by the forked workers, so the module class and parameters are never pickled.
+_tasks: dict[int, _SweepTask] = {}
+
+
+def grid(**axes: Iterable) -> list[dict[str, object]]:
+    """
+    Return the cartesian product of the parameter values.
+
+    Example:
+    grid(width=[8, 16], depth=[2, 4])
+    # [{"width": 8, "depth": 2}, {"width": 8, "depth": 4}, {"width": 16, "depth": 2}, {"width": 16, "depth": 4}]
+    """
+    return [dict(zip(axes, values)) for values in product(*axes.values())]
+
+
+def _run_point(task: _SweepTask, index: int) -> SweepPoint:
+    """Construct and elaborate a point of the sweep, and record the error if any."""
+    point = SweepPoint(index, dict(task.points[index]))
+    try:
+        start = perf_counter()
+        top = task.module_class(**point.params)
+        point.timing["construct"] = perf_counter() - start
+        point.spec = top.spec
+
+        with Elaborator.profile() as profiler:
+            start = perf_counter()
+            point.sv_code = Elaborator.to_dict(top, top_only=task.top_only, dedup=task.dedup)
+            point.timing["elaborate"] = perf_counter() - start
+    except Exception:
+        point.error = traceback.format_exc()
+        return point
+
+    objects = Counter()
+    for record in profiler.modules:
+        objects.update(record.objects)
+    point.stats = {
+        "modules": len(point.sv_code),
+        "objects": sum(objects.values()),
+        "emitted_bytes": sum(len(sv_code.encode()) for sv_code in point.sv_code.values()),
+        **objects,
+    }
+    return point
+
+
+def _run_forked_point(task_id: int, index: int) -> SweepPoint:
+    return _run_point(_tasks[task_id], index)
+
+
+def sweep(
+        module_class: type[Module],
+        points: Mapping[str, Iterable] | Iterable[Mapping[str, object]],
+        jobs: int = 1,
+        top_only: bool = False,
+        dedup: bool = False,
+) -> Iterator[SweepPoint]:
+    """
+    Construct and elaborate the module class at each point of the parameters.
+
+    Example:
+    for point in sweep(Adder, {"width": [8, 16, 32]}, jobs=4):
+        print(point.params, point.stats, point.error)
+
+    With `jobs` > 1, the points are elaborated by a pool of forked worker processes,
+    and yielded in the order of completion.
+    Points are elaborated serially in order if `jobs` is 1, if the platform does not support forking processes,
+    or if other threads are running, as forking them may deadlock the workers.
+
+    :param module_class: The module class to be swept.
+    :param points: The keyword arguments of the constructor at each point,
+        or a mapping of the parameters to their values, whose cartesian product are the points, see `grid`.
+    :param jobs: The number of worker processes.
+    :param top_only: If True, the submodules of each point are not elaborated.
+    :param dedup: If True, modules with identical structure are merged in each point.
+    :returns: An iterator of the results, once each point is completed.
+    """
+    points = grid(**points) if isinstance(points, Mapping) else [dict(params) for params in points]
+    task = _SweepTask(module_class, points, top_only, dedup)
+
+    if jobs <= 1 or not _can_fork():
+        for index in range(len(points)):
+            yield _run_point(task, index)
+        return
+
+    task_id = id(task)
+    _tasks[task_id] = task
+    pool = ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context("fork"))
+    try:
+        futures = {pool.submit(_run_forked_point, task_id, index): index for index in range(len(points))}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                point = future.result()
+            except Exception as e:
+                # The worker crashed, or the result cannot be sent back.
+                point = SweepPoint(index, points[index], error=f"{type(e).__name__}: {e}")
+            yield point
+    finally:
+        pool.shutdown(cancel_futures=True)
+        del _tasks[task_id]
+
+
+def table(points: Iterable[SweepPoint], filename: None | PathLike = None) -> list[dict[str, object]]:
+    """
+    Collect the results of the sweep into a table, sorted by the index of the points.
+
+    :param points: The results of the sweep.
+    :param filename: If specified, the table is also written to the file as CSV.
+    :returns: The rows of the table, see `SweepPoint.to_row`.
+    """
+    rows = [point.to_row() for point in sorted(points, key=lambda point: point.index)]
+    if filename is not None:
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        with Path(filename).open("w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+    return rows
@@ -6,6 +6,6 @@ Put those tools here if:
 
 e.g. Logic Optimization, etc.
 """
-from .module_context import ModuleContext
+from .module_context import ModuleContext, NameAllocator
 
-__all__ = ["ModuleContext"]
+__all__ = ["ModuleContext", "NameAllocator"]
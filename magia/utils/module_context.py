@@ -1,36 +1,97 @@
-"""ModuleContext is a singleton class that keeps track of the module that is currently being constructed."""
+"""
+ModuleContext is a singleton class that keeps track of the module that is currently being constructed.
+
+The stack of modules is kept in a context variable, so each thread or asyncio task has its own stack,
+and independent modules can be constructed concurrently.
+
+It also allocates the names of the objects which are not named by the designers.
+Names are allocated by the module being constructed, so they are deterministic and local to the module.
+"""
 from __future__ import annotations
 
 import typing
 from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
 
 if typing.TYPE_CHECKING:
     from magia import Module
 
 
+class NameAllocator:
+    """
+    Allocate unique names by prefix, e.g. `net_0`, `net_1`, `const_0`.
+
+    Each prefix is numbered independently from 0.
+    Allocation is thread-safe, as the counters are created and advanced atomically.
+    """
+
+    __slots__ = ("_counters", "_suffix")
+
+    def __init__(self, suffix: str = ""):
+        """:param suffix: Text inserted between the prefix and the number, to tell names of different scopes apart."""
+        self._counters: dict[str, count] = {}
+        self._suffix = suffix
+
+    def allocate(self, prefix: str) -> str:
+        if (counter := self._counters.get(prefix)) is None:
+            counter = self._counters.setdefault(prefix, count())
+        return f"{prefix}_{self._suffix}{next(counter)}"
+
+
+# Stack of the modules being constructed in the current thread or asyncio task.
+# An immutable tuple is kept, so the copied contexts never share the same stack.
+_module_stack: ContextVar[tuple[None | Module, ...]] = ContextVar("module_stack", default=())
+
+
 class ModuleContext:
     """Describe stack of modules which are currently being constructed."""
 
+    # Names of the objects created outside any module, e.g. `net_g0`.
+    # They are marked, so they never conflict with the names allocated by a module.
+    global_names = NameAllocator("g")
+
     _instance: None | ModuleContext = None
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super().__new__(cls, *args, **kwargs)
-            cls._instance._stack = []
         return cls._instance
 
     def push(self, module: Module):
-        self._stack.append(module)
+        _module_stack.set((*_module_stack.get(), module))
 
     @property
     def current(self) -> None | Module:
-        if len(self._stack) == 0:
-            return None
-        return self._stack[-1]
+        stack = _module_stack.get()
+        return stack[-1] if stack else None
 
     def pop(self):
-        if len(self._stack) != 0:
-            self._stack.pop()
+        if stack := _module_stack.get():
+            _module_stack.set(stack[:-1])
+
+    @contextmanager
+    def constructing(self):
+        """
+        Construct a module within the context, which pushes itself to the stack in `Module.__init__`.
+
+        Objects created before `Module.__init__` (e.g. before calling `super().__init__()`) belong to no module yet.
+        They are named in the global scope, so they never conflict with the names of either module.
+        The stack is restored as it was on exit,
+        even if the constructor failed before pushing the module, e.g. on checking its arguments.
+        """
+        token = _module_stack.set((*_module_stack.get(), None))
+        try:
+            yield
+        finally:
+            _module_stack.reset(token)
+
+    def allocate_name(self, prefix: str) -> str:
+        """Allocate a unique name in the module being constructed, or in the global scope outside any module."""
+        stack = _module_stack.get()
+        module = stack[-1] if stack else None
+        allocator = ModuleContext.global_names if module is None else module.name_allocator
+        return allocator.allocate(prefix)
 
     @property
     @contextmanager
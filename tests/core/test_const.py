@@ -2,7 +2,7 @@ import cocotb.clock
 import pytest
 from magia_flow.simulation.general import Simulator
 
-from magia import Constant, Module, Output
+from magia import Constant, Elaborator, Input, Module, Output
 from tests import helper
 
 test_constants = [
@@ -86,3 +86,68 @@ class TestSvConstant:
         ])
         def test_sv_constant_unknown(self, width, signed, expected):
             assert Constant.sv_constant(None, width, signed) == expected
+
+    @pytest.mark.parametrize("value, width, signed, expected", [
+        (0, 1, False, "1'h0"),
+        (5, 3, False, "3'h5"),
+        (-1, 3, True, "3'sh7"),
+        (-2, 8, True, "8'shFE"),
+        (0x1234, 13, False, "13'h1234"),
+        (-1, 70, True, "70'sh3FFFFFFFFFFFFFFFFF"),
+        (b"\x12\x34", 12, False, "12'h234"),
+    ])
+    def test_sv_constant_format(self, value, width, signed, expected):
+        assert Constant.sv_constant(value, width, signed) == expected
+
+    @pytest.mark.parametrize("value, width, signed", [(256, 8, False), (-1, 8, False), (128, 8, True)])
+    def test_sv_constant_overflow(self, value, width, signed):
+        with pytest.raises(OverflowError):
+            Constant.sv_constant(value, width, signed)
+
+
+def test_constant_pool():
+    """Repeated literals within a module share a single constant net."""
+
+    class Top(Module):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.io += Input("a", 8)
+            self.io += Input("b", 8)
+            self.io += Output("q", 8)
+            self.io += Output("eq", 1)
+
+            self.io.q <<= (self.io.a + 1) ^ (self.io.b + 1) ^ (self.io.a - 3)
+            self.io.eq <<= (self.io.a == 1) | (self.io.b == 3)
+
+    sv_code = Elaborator.to_string(Top(name="TopModule"))
+    const_assignments = [line for line in sv_code.splitlines() if line.startswith("assign const_")]
+    assert len(const_assignments) == 2, f"Expected 2 constants, got {len(const_assignments)}."
+
+
+def test_constant_pool_modified():
+    """A pooled constant renamed or annotated by the user is not shared with the later literals."""
+
+    class Top(Module):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.io += Input("a", 8)
+            self.io += Output("q", 8)
+            self.io += Output("r", 8)
+            self.io += Output("s", 8)
+
+            one = Constant.pooled(1, 8)
+            one.set_name("renamed_one")
+            self.io.q <<= self.io.a + one
+            self.io.r <<= self.io.a + 1
+            two = Constant.pooled(2, 8).annotate("two")
+            self.io.s <<= self.io.a + two + 2
+
+            assert one.name == "renamed_one"
+            assert Constant.pooled(1, 8) is not one
+            assert Constant.pooled(2, 8) is not two
+
+    sv_code = Elaborator.to_string(Top(name="TopModule"))
+    const_names = [line.split()[1] for line in sv_code.splitlines() if line.startswith("assign const_")]
+    assert "assign renamed_one = 8'h01;" in sv_code
+    # The annotated constant 2, and the new constants of the later literals 1 and 2
+    assert len(const_names) == 3, f"Expected 3 anonymous constants, got {const_names}."
@@ -0,0 +1,57 @@
+import pytest
+
+from magia import Constant, Elaborator, Input, Module, Output
+from magia.comb_ops import Operation
+from magia.const_fold import ConstantFolding
+
+
+class FoldingModule(Module):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.io += Input("a", 8)
+        self.io += Input("sel", 2)
+        self.io += Output("q0", 8)
+        self.io += Output("q1", 8)
+        self.io += Output("q2", 3)
+        self.io += Output("q3", 8)
+
+        # Pattern generated by FSM
+        self.io.q0 <<= Constant(0, 8) | self.io.a.when(~Constant(0, 1))
+        self.io.q1 <<= (self.io.a & 0xFF) ^ (Constant(3, 8) + 2)
+        # The upper bit of the selector is always 0
+        self.io.q2 <<= (Constant(0, 1) @ self.io.sel[0]).case({0: 1, 1: 2, 2: 3, 3: 4})
+        # Signals named by the user are kept
+        kept = (self.io.a & 0).set_name("kept")
+        self.io.q3 <<= ~~self.io.a | kept
+
+
+class TestConstantFolding:
+    TOP = "TopModule"
+
+    @pytest.mark.parametrize("inlining", [True, False])
+    def test_folding(self, inlining):
+        top = FoldingModule(name=self.TOP)
+        with ConstantFolding.enabled(), Operation.inlining(inlining):
+            sv_code = Elaborator.to_string(top)
+
+        assert top.fold_stats.folded == 8
+        assert top.fold_stats.removed == 10
+        assert "assign q0 = net_" in sv_code
+        assert sv_code.count("= a;") == 3
+        assert "= 8'h05;" in sv_code
+        assert "assign kept = 8'h00;" in sv_code
+        assert "2'h0: " in sv_code and "default: " in sv_code
+        assert "2'h2: " not in sv_code and "unique" not in sv_code
+
+    def test_disabled(self):
+        top = FoldingModule(name=self.TOP)
+        sv_code = Elaborator.to_string(top)
+
+        assert top.fold_stats.folded == top.fold_stats.removed == 0
+        assert "unique case" in sv_code
+        assert "2'h3: " in sv_code
+
+    def test_restored_on_error(self):
+        with pytest.raises(ValueError), ConstantFolding.enabled():
+            raise ValueError
+        assert not ConstantFolding._enabled
@@ -8,6 +8,7 @@ from magia_flow.simulation.general import Simulator
 
 import tests.helper as helper
 from magia import Elaborator, Input, Module, Output
+from magia.comb_ops import Operation
 
 #############################
 # Test for When and Case operations
@@ -438,3 +439,79 @@ class TestArithmetic:
             self.TOP, Top(name=self.TOP), testcase="bitwise_op",
             **self.sim_module_and_path,
         )
+
+
+class TestStructuralSharing:
+    TOP = "TopModule"
+
+    @pytest.mark.parametrize("enable", [True, False])
+    def test_operation_sharing(self, enable):
+        class Top(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+
+                self.io += Input("a", 8)
+                self.io += Input("b", 8)
+                self.io += Output("q0", 8)
+                self.io += Output("q1", 8)
+                self.io += Output("q2", 9)
+
+                self.sum_0, self.sum_1 = self.io.a + self.io.b, self.io.a + self.io.b
+                self.io.q0 <<= self.sum_0 ^ self.io.a[7:0]
+                self.io.q1 <<= self.sum_1 ^ self.io.a[7:0]
+                # Resized operation cannot be shared with the later ones
+                self.io.q2 <<= (self.io.a - self.io.b).set_width(9) + (self.io.a - self.io.b).with_width(9)
+
+        with Operation.structural_sharing(enable):
+            top = Top(name=self.TOP)
+
+        sv_code = Elaborator.to_string(top)
+        assert (top.sum_0 is top.sum_1) == enable
+        if enable:
+            assert top.operation_pool_stats.hits == 3
+            assert sv_code.count("= a + b;") == 1
+            assert sv_code.count("= a[7:0];") == 1
+        else:
+            assert top.operation_pool_stats.hits == top.operation_pool_stats.misses == 0
+            assert sv_code.count("= a + b;") == 2
+        assert sv_code.count("= a - b;") == 2
+
+
+class TestExpressionInlining:
+    TOP = "TopModule"
+
+    @pytest.mark.parametrize("enable", [True, False])
+    def test_inlining(self, enable):
+        class Top(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+
+                self.io += Input("a", 8)
+                self.io += Input("b", 8)
+                self.io += Input("c", 9, signed=True)
+                self.io += Output("q0", 9)
+                self.io += Output("q1", 8)
+                self.io += Output("q2", 9, signed=True)
+
+                self.io.q0 <<= (self.io.a + self.io.b) & self.io.c.with_signed(False) ^ 1
+                # Named and annotated operations are kept
+                named = (self.io.a - self.io.b).set_name("diff")
+                annotated = (self.io.a * self.io.b)[7:0].annotate("Lower bits of product")
+                self.io.q1 <<= ~named | annotated
+                # Operations with multiple fanouts are kept
+                shared = self.io.c + self.io.c
+                self.io.q2 <<= (shared - shared) @ self.io.a[0]
+
+        with Operation.inlining(enable):
+            sv_code = Elaborator.to_string(Top(name=self.TOP))
+
+        assert "diff = a - b;" in sv_code
+        assert "Lower bits of product" in sv_code
+        if enable:
+            assert sv_code.count("always_comb") == 7
+            assert "= 9'(8'(a + b) & " in sv_code
+            assert "= 8'(~diff) | " in sv_code
+            assert "{9'(" in sv_code
+        else:
+            assert sv_code.count("always_comb") == 12
+            assert "8'(" not in sv_code
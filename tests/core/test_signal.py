@@ -1,10 +1,13 @@
 import random
+from string import Template
 
 import cocotb
 import cocotb.clock
+import pytest
 from magia_flow.simulation.general import Simulator
 
-from magia import Elaborator, Input, Module, Output, Signal
+from magia import CallStackMode, Elaborator, Input, Module, Output, Signal
+from magia.signals import compile_template
 from tests import helper
 
 
@@ -22,6 +25,17 @@ async def adder_test(dut):
         assert dut.q.value == (a + b)
 
 
+@pytest.mark.parametrize("template", [
+    "assign $name = $driver;",
+    "always_comb\n  ${name}_q = {$driver};",
+    "$$ $$name {} ${name}$driver",
+])
+def test_compile_template(template):
+    """Compiled templates produce the same code as `Template.substitute()`."""
+    template = Template(template)
+    assert compile_template(template)(name="a", driver="b") == template.substitute(name="a", driver="b")
+
+
 class TestSignalManipulate:
     TOP = "TopLevel"
     sim_module_and_path = {
@@ -100,3 +114,20 @@ class TestSignalManipulate:
         assert "/*" in result, "There shall be a comment in the elaboration result"
         assert "Net name: a\n/" in result, "Net name does not exists in the elaboration result"
         assert __file__ in result, "The file name does not exists in the elaboration result"
+
+    @pytest.mark.parametrize("mode", [CallStackMode.OFF, CallStackMode.LIGHT, CallStackMode.FULL])
+    def test_annotate_callstack_mode(self, mode):
+        """Call stack is captured during creation according to the mode, and reported by `signal.annotate()`."""
+
+        def create_signal():
+            return Signal(8, name="a")
+
+        with Signal.callstack_mode(mode):
+            signal = create_signal()
+        captured = signal._init_callstack is not None
+        assert captured == (mode != CallStackMode.OFF), f"Unexpected call stack capture under {mode}"
+
+        signal.annotate("This is a comment")
+        creation_line = f"{__file__}:{create_signal.__code__.co_firstlineno + 1}"
+        assert __file__ in signal.loc, "The file name does not exists in the location"
+        assert (creation_line in signal.loc) == captured, "Creation location mismatch with the capture mode"
@@ -0,0 +1,206 @@
+import json
+import os
+import stat
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from magia import Elaborator, Input, Module, Output
+from magia.cli import main, parse_value
+from magia.daemon import ElaborationDaemon
+from magia.elab_cache import MemoryElaborationCache
+
+
+class Adder(Module):
+    def __init__(self, width, step=1, **kwargs):
+        super().__init__(**kwargs)
+        self.io += Input("a", width)
+        self.io += Output("q", width)
+        self.io.q <<= self.io.a + step
+
+
+class TestCLI:
+    TARGET = f"{__name__}:Adder"
+
+    def test_parse_value(self):
+        assert parse_value("16") == 16
+        assert parse_value("(1, 2)") == (1, 2)
+        assert parse_value("True") is True
+        assert parse_value("adder") == "adder"
+
+    def test_elaborate_to_stdout(self, capsys):
+        assert main([self.TARGET, "-p", "width=8", "-p", "step=3", "--name", "adder"]) == 0
+        assert capsys.readouterr().out == Elaborator.to_string(Adder(8, 3, name="adder")) + "\n"
+
+    def test_elaborate_to_files(self, tmp_path):
+        (tmp_path / "params.json").write_text(json.dumps({"width": 8, "step": 2}))
+        args = [
+            self.TARGET, "--params", str(tmp_path / "params.json"), "-p", "width=16", "--name", "adder",
+            "-o", str(tmp_path / "rtl"), "--incremental", "--manifest", "manifest.json",
+            "--profile", str(tmp_path / "profile.json"),
+        ]
+        assert main(args) == 0
+        assert (tmp_path / "rtl" / "adder.sv").read_text() == Elaborator.to_string(Adder(16, 2, name="adder"))
+        assert "adder" in json.loads((tmp_path / "rtl" / "manifest.json").read_text())["modules"]
+        assert json.loads((tmp_path / "profile.json").read_text())["modules"][0]["name"] == "adder"
+
+    @pytest.mark.parametrize("args", [
+        ["magia.nonexistent:Adder"],
+        [f"{__name__}:Nonexistent"],
+        [f"{__name__}:TestCLI"],
+        [f"{__name__}:Adder", "-p", "width"],
+        [f"{__name__}:Adder", "-p", "width=8", "--manifest", "manifest.json"],
+    ])
+    def test_usage_error(self, args, capsys):
+        with pytest.raises(SystemExit) as exc_info:
+            main(args)
+        assert exc_info.value.code == 2
+        assert "magia: error:" in capsys.readouterr().err
+
+    def test_daemon(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(sys, "path", list(sys.path))
+        design = tmp_path / "warm_design.py"
+        design.write_text(
+            "from magia import Input, Module, Output\n"
+            "class Top(Module):\n"
+            "    def __init__(self, width, **kwargs):\n"
+            "        super().__init__(**kwargs)\n"
+            "        self.io += Input('a', width)\n"
+            "        self.io += Output('q', width)\n"
+            "        self.io.q <<= self.io.a\n"
+        )
+        daemon = ElaborationDaemon(tmp_path / "magia.sock")
+        server = threading.Thread(target=daemon.serve_forever)
+        server.start()
+        try:
+            for _ in range(100):
+                if daemon._server is not None:
+                    break
+                time.sleep(0.05)
+            assert stat.S_IMODE(os.stat(tmp_path / "magia.sock").st_mode) == 0o600
+            args = ["--connect", "magia.sock", "warm_design:Top", "-p", "width=8"]
+            assert main(args) == 0
+            first = capsys.readouterr().out
+            assert "assign q = a;" in first
+
+            # Served again by the warm process, with the same names as a fresh process
+            assert main(args) == 0
+            assert capsys.readouterr().out == first
+
+            # The changed design is imported again
+            design.write_text(design.read_text().replace("self.io.a\n", "~self.io.a\n"))
+            assert main(args) == 0
+            assert "= ~a;" in capsys.readouterr().out
+            assert main(["--connect", "magia.sock", "warm_design:Top"]) == 1
+            assert "TypeError" in capsys.readouterr().err
+        finally:
+            daemon.shutdown()
+            server.join()
+            sys.modules.pop("warm_design", None)
+        assert not (tmp_path / "magia.sock").exists()
+
+    def test_daemon_specialization_cache(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(sys, "path", list(sys.path))
+        (tmp_path / "cached_design.py").write_text(
+            "from magia import Input, Module, Output\n"
+            "@Module.cached()\n"
+            "class Adder(Module):\n"
+            "    def __init__(self, width, **kwargs):\n"
+            "        super().__init__(**kwargs)\n"
+            "        self.io += Input('a', width)\n"
+            "        self.io += Output('q', width)\n"
+            "        self.io.q <<= self.io.a + 1\n"
+            "class Top(Module):\n"
+            "    def __init__(self, widths, **kwargs):\n"
+            "        super().__init__(**kwargs)\n"
+            "        self.io += Input('a', 8)\n"
+            "        self.io += Output('q', 8)\n"
+            "        net = self.io.a\n"
+            "        for width in widths:\n"
+            "            inst = Adder(width).instance()\n"
+            "            inst.io.a <<= net\n"
+            "            net = inst.io.q\n"
+            "        self.io.q <<= net\n"
+        )
+        daemon = ElaborationDaemon(tmp_path / "magia.sock")
+        try:
+            assert daemon.handle(["cached_design:Top", "-p", "widths=(8,)"], tmp_path)["status"] == 0
+            response = daemon.handle(["cached_design:Top", "-p", "widths=(8, 4)"], tmp_path)
+        finally:
+            sys.modules.pop("cached_design", None)
+        assert response["status"] == 0, response["stderr"]
+        assert response["stdout"].count("module Adder_") == 2
+
+    def test_daemon_parallel(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(sys, "path", list(sys.path))
+        (tmp_path / "parallel_design.py").write_text(
+            "from magia import Input, Module, Output\n"
+            "class Leaf(Module):\n"
+            "    def __init__(self, offset, **kwargs):\n"
+            "        super().__init__(**kwargs)\n"
+            "        self.io += Input('a', 8)\n"
+            "        self.io += Output('q', 8)\n"
+            "        self.io.q <<= self.io.a + offset\n"
+            "class Top(Module):\n"
+            "    def __init__(self, **kwargs):\n"
+            "        super().__init__(**kwargs)\n"
+            "        self.io += Input('a', 8)\n"
+            "        self.io += Output('q', 8)\n"
+            "        net = self.io.a\n"
+            "        for offset in range(4):\n"
+            "            inst = Leaf(offset).instance()\n"
+            "            inst.io.a <<= net\n"
+            "            net = inst.io.q\n"
+            "        self.io.q <<= net\n"
+        )
+        daemon = ElaborationDaemon(tmp_path / "magia.sock")
+        # The memory cache is inherited by the forked workers, instead of being sent to them.
+        def reduce(_):
+            raise TypeError("The memory cache is pickled")
+
+        monkeypatch.setattr(MemoryElaborationCache, "__reduce__", reduce)
+        try:
+            first = daemon.handle(["parallel_design:Top", "-j", "2"], tmp_path)
+            assert first["status"] == 0, first["stderr"]
+            # The entries added by the workers are merged into the memory of the daemon.
+            assert len(daemon.cache) == 5
+            assert daemon.cache.stats.misses == 5
+
+            second = daemon.handle(["parallel_design:Top", "-j", "2"], tmp_path)
+        finally:
+            sys.modules.pop("parallel_design", None)
+        assert second["status"] == 0, second["stderr"]
+        # The order of the submodules is not deterministic.
+        assert sorted(second["stdout"].split("endmodule")) == sorted(first["stdout"].split("endmodule"))
+        assert daemon.cache.stats.hits == 5
+
+    def test_daemon_projects(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(sys, "path", list(sys.path))
+        for project, driver in (("a", "self.io.a"), ("b", "~self.io.a")):
+            (tmp_path / project).mkdir()
+            (tmp_path / project / "project_design.py").write_text(
+                "from magia import Input, Module, Output\n"
+                "class Top(Module):\n"
+                "    def __init__(self, **kwargs):\n"
+                "        super().__init__(**kwargs)\n"
+                "        self.io += Input('a', 8)\n"
+                "        self.io += Output('q', 8)\n"
+                f"        self.io.q <<= {driver}\n"
+            )
+        daemon = ElaborationDaemon(tmp_path / "magia.sock")
+        try:
+            first = daemon.handle(["project_design:Top"], tmp_path / "a")
+            second = daemon.handle(["project_design:Top"], tmp_path / "b")
+        finally:
+            sys.modules.pop("project_design", None)
+        assert "~a" not in first["stdout"]
+        assert "~a" in second["stdout"]
+        assert str(tmp_path / "a") not in sys.path
+        assert Path.cwd() == tmp_path
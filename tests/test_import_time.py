@@ -0,0 +1,54 @@
+import subprocess
+import sys
+
+import pytest
+
+import magia
+
+# Cumulative time of `import magia` in a fresh interpreter, in microseconds.
+IMPORT_BUDGET_US = 150_000
+# Modules loaded only once the Elaborator, parallel elaboration or ExternalModule is used.
+DEFERRED_MODULES = ("magia.elaborator", "magia.external", "multiprocessing", "concurrent.futures", "hdlConvertor")
+
+
+def import_times(statement: str) -> dict[str, int]:
+    """Run the statement with `python -X importtime`, and return the cumulative time of each imported module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True,  # noqa: S603
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime:
+    def test_deferred_imports(self):
+        times = import_times("import magia")
+        assert "magia" in times
+        assert not [
+            name for name in times
+            if any(name == deferred or name.startswith(f"{deferred}.") for deferred in DEFERRED_MODULES)
+        ]
+
+    def test_import_budget(self):
+        # The best of a few runs, as the first run may compile the bytecode, and the tests may run in parallel.
+        best = min(import_times("import magia")["magia"] for _ in range(5))
+        assert best < IMPORT_BUDGET_US, f"`import magia` took {best / 1000:.1f} ms"
+
+    def test_lazy_attrs(self):
+        from magia.elaborator import Elaborator
+
+        assert magia.Elaborator is Elaborator
+        assert {"Elaborator", "ExternalModule"} <= set(dir(magia))
+        with pytest.raises(AttributeError):
+            magia.Nonexistent  # noqa: B018
+
+    def test_external_module(self):
+        pytest.importorskip("hdlConvertor")
+        from magia.external import ExternalModule
+
+        assert magia.ExternalModule is ExternalModule
@@ -1,8 +1,28 @@
+import gc
+import hashlib
+import importlib
+import json
+import os
+import pickle
+import re
+import sys
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from magia import CodeSectionType, Elaborator, Input, IOPorts, Module, Output, VerilogWrapper
+import pytest
+
+from magia import CodeSectionType, Constant, Elaborator, Input, IOPorts, Module, Output, Register, VerilogWrapper
+from magia.assertions import AssertionCell
+from magia.comb_ops import Operation
+from magia.data_struct import PoolStats
+from magia.elab_cache import ElaborationCache
+from magia.elaborator import _can_fork
+from magia.profiler import PHASES
 from magia.signals import Synthesizable
 from magia.sva_manual import SVAManual
+from magia.sweep import sweep, table
 from magia.utils import ModuleContext
 
 
@@ -161,6 +181,611 @@ class TestElaboration:
                 assert port["direction"] == "Output"
                 assert port["description"] == ""
 
+    def test_module_params(self):
+        class Base(Module):
+            def __init__(self, width, depth=4, *, signed=False, **kwargs):
+                # Calling the parent class without `super()`
+                Module.__init__(self, **kwargs)
+                self.io += Input("a", width, signed=signed)
+                self.io += Output("b", width, signed=signed)
+                self.io.b <<= self.io.a
+
+        class Derived(Base):
+            def __init__(self, width, **kwargs):
+                super().__init__(width, depth=8, **kwargs)
+
+        assert Base(8).params == {"width": 8, "depth": 4, "signed": False}
+        assert Base(8, 2, signed=True, name="base").params == {"width": 8, "depth": 2, "signed": True}
+        assert Derived(width=16).params == {"width": 16}
+        assert "width: 16" in Elaborator.to_string(Derived(16))
+
+    def test_cached_specialization(self):
+        @Module.cached(maxsize=2)
+        class Adder(Module):
+            def __init__(self, width, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", width)
+                self.io += Input("b", width)
+                self.io += Output("q", width)
+                self.io.q <<= self.io.a + self.io.b
+
+        class Top(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Input("b", 8)
+                for i in range(4):
+                    self.io += Output(f"q{i}", 8)
+                    Adder(8).instance(io={"a": self.io.a, "b": self.io.b, "q": self.io[f"q{i}"]})
+
+        adder = Adder(width=8)
+        assert Adder(8) is adder
+        assert Adder(8, name="named_adder") is not adder
+        assert len(Elaborator.to_dict(Top())) == 2, "Expected Top + 1 Adder."
+        assert Adder.specialization_cache.stats.hits == 5
+
+        # Least recently used specialization is evicted
+        Adder(16), Adder(32)
+        assert Adder(8) is not adder
+
+    def test_trace_order(self):
+        class Sub(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                self.io.q <<= self.io.a
+
+        class Top(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Input("clk", 1)
+                self.io += Output("q", 8)
+                nets = [self.io.a, self.io.a + 1]
+                for _ in range(2000):
+                    nets.append(nets[-1] ^ nets[-2])
+                inst = Sub().instance()
+                inst.io.a <<= nets[-1]
+                self.io.q <<= (inst.io.q + nets[1000]).reg(self.io.clk)
+
+        top = Top()
+        synth_objs, insts = top.trace(top._trace_roots())
+        assert len(synth_objs) == 2001 + 4 and len(insts) == 1
+        assert (synth_objs, insts) == top.trace(top._trace_roots()), "Trace order is not deterministic."
+
+        # Drivers come before the signals they drive
+        position = {id(obj): i for i, obj in enumerate(synth_objs)}
+        for i, obj in enumerate(synth_objs):
+            assert all(position.get(id(driver), -1) < i for driver in obj.drivers)
+
+    def test_netlist(self):
+        class Top(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Input("clk", 1)
+                self.io += Output("q", 8, signed=True)
+                nets = [self.io.a, self.io.a + 1]
+                for _ in range(200):
+                    nets.append(nets[-1] ^ nets[-2])
+                self.io.q <<= nets[-1].reg(self.io.clk).with_signed(True)
+
+        top = Top()
+        netlist = top.netlist()
+        synth_objs, _ = top.trace(top._trace_roots())
+        assert len(netlist) == len(synth_objs) + len(top.io.inputs) + len(top.io.outputs)
+        assert [netlist.objects[node] for node in netlist.traced_nodes] == synth_objs
+
+        # Drivers come before the nodes they drive, and the CSR offsets cover all edges
+        assert netlist.driver_offsets[-1] == len(netlist.driver_ids)
+        for node in netlist.traced_nodes:
+            assert all(driver < node for driver in netlist.drivers(node))
+        assert sum(netlist.fanout()) == len(netlist.driver_ids)
+
+        for node in netlist.traced_nodes:
+            assert netlist.signal_decl(node) == netlist.objects[node].signal_decl()
+        assert netlist.output_assignments() == [f"assign q = {top.io.q.driver().name};"]
+
+        # The netlist is pickled without the objects
+        restored = pickle.loads(pickle.dumps(netlist))  # noqa: S301
+        assert restored.objects == [None] * len(netlist)
+        assert [restored.signal_decl(node) for node in restored.traced_nodes] == [
+            netlist.signal_decl(node) for node in netlist.traced_nodes
+        ]
+        assert len(pickle.dumps(netlist)) < len(netlist) * 48
+
+    def test_parallel_elaboration(self):
+        class Adder(Module):
+            def __init__(self, width, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", width)
+                self.io += Output("q", width)
+                self.io.q <<= self.io.a + width
+
+        class Top(Module):
+            def __init__(self, depth, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                prev = self.io.a
+                for i in range(depth):
+                    inst = Adder(8 + i).instance()
+                    inst.io.a <<= prev
+                    prev = inst.io.q
+                if depth > 1:
+                    inst = Top(depth // 2).instance()
+                    inst.io.a <<= prev
+                    prev = inst.io.q
+                self.io.q <<= prev
+
+        tops = [Top(4), Top(3), Adder(8)]
+        serial = Elaborator.to_dict(*tops)
+        parallel = Elaborator.to_dict(*tops, jobs=3)
+        assert list(parallel.items()) == list(serial.items())
+        assert all(Elaborator.name_to_module[name] in tops or name.startswith(("Adder", "Top")) for name in parallel)
+        assert Elaborator.to_dict(*tops, top_only=True, jobs=2) == Elaborator.to_dict(*tops, top_only=True)
+
+        # Elaborated serially if other threads are running, as forking them may deadlock
+        with ThreadPoolExecutor(1) as pool:
+            pool.submit(time.sleep, 0.1)
+            assert list(Elaborator.to_dict(*tops, jobs=3).items()) == list(serial.items())
+            assert not _can_fork()
+
+    def test_concurrent_construction(self):
+        class Leaf(Module):
+            def __init__(self, offset, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("clk", 1)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                reg = Register(8, clk=self.io.clk)
+                reg <<= (self.io.a + offset) ^ Constant(offset, 8)
+                self.io.q <<= reg
+                with AssertionCell.code_section():
+                    AssertionCell(None, cond=self.io.q != offset, clk=self.io.clk)
+                with SVAManual.code_section():
+                    SVAManual(None, f"{self.io.a == offset} |=> {self.io.q == 0}", clk=self.io.clk)
+
+        class Top(Module):
+            def __init__(self, count, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("clk", 1)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                net = self.io.a
+                for i in range(count):
+                    inst = Leaf(i * 7 % 256).instance()
+                    inst.io.clk <<= self.io.clk
+                    inst.io.a <<= net
+                    net = (inst.io.q + i) & (inst.io.q + i)
+                self.io.q <<= net
+
+        def options(index: int) -> tuple[bool, bool]:
+            """Naming by parameters and structural sharing, which are set differently by each thread."""
+            return index % 2 == 0, index % 3 == 0
+
+        def build(index: int) -> Top:
+            naming, sharing = options(index)
+            with Module.naming_by_params(naming), Operation.structural_sharing(sharing):
+                return Top(index % 16 + 1, name=f"top_{index}")
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            serial = [Elaborator.to_dict(build(i)) for i in range(64)]
+            with ThreadPoolExecutor(8) as pool:
+                tops = list(pool.map(build, range(64)))
+            parallel = [Elaborator.to_dict(top) for top in tops]
+        finally:
+            sys.setswitchinterval(switch_interval)
+        for index, top in enumerate(tops):
+            naming, sharing = options(index)
+            leaf_names = [name for name in parallel[index] if name.startswith("Leaf_")]
+            assert leaf_names
+            if naming:
+                assert all(re.fullmatch(r"Leaf_[0-9a-f]{16}", name) for name in leaf_names)
+                assert parallel[index] == serial[index]
+            else:
+                # Numbered in the order of construction, which depends on the other threads.
+                assert all(re.fullmatch(r"Leaf_[0-9]+", name) for name in leaf_names)
+            assert (top.operation_pool_stats.hits > 0) == sharing
+        assert ModuleContext().current is None
+        assert not Operation.structural_sharing_enabled
+
+    def test_failed_child_construction(self):
+        class Child(Module):
+            def __init__(self, width, **kwargs):
+                if width <= 0:
+                    raise ValueError("width must be positive")
+                super().__init__(**kwargs)
+
+        class Parent(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                with pytest.raises(ValueError):
+                    Child(0)
+                assert ModuleContext().current is self
+                self.io.q <<= self.io.a + 1
+
+        class Top(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                inst = Parent().instance()
+                assert ModuleContext().current is self
+                inst.io.a <<= self.io.a
+                self.io.q <<= inst.io.q
+
+        top = Top(name="top")
+        assert ModuleContext().current is None
+        assert "_g" not in Elaborator.to_string(top)
+
+    def test_objects_before_super_init(self):
+        class Child(Module):
+            def __init__(self, **kwargs):
+                offset = Constant(3, 8)
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                self.io.q <<= (self.io.a + offset) ^ Constant(5, 8)
+
+        class Parent(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                inst = Child().instance()
+                inst.io.a <<= self.io.a ^ Constant(1, 8)
+                self.io.q <<= inst.io.q
+
+        sv_code = Elaborator.to_dict(Parent(name="parent"))
+        assert len(sv_code) == 2
+        child_code = next(code for name, code in sv_code.items() if name != "parent")
+        assert "const_0" in child_code and "const_g" in child_code
+
+    def test_streaming_elaboration(self, tmp_path):
+        class Adder(Module):
+            def __init__(self, width, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", width)
+                self.io += Output("q", width)
+                self.io.q <<= self.io.a + 1
+
+        class Top(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                prev = self.io.a
+                for width in (8, 8, 8):
+                    inst = Adder(width).instance()
+                    inst.io.a <<= prev
+                    prev = inst.io.q
+                self.io.q <<= prev
+
+        top = Top()
+        expected = Elaborator.to_dict(top)
+        stream = Elaborator.to_stream(top)
+        assert next(stream) == (top.name, expected[top.name]), "Top module is yielded before its submodules."
+        assert [top.name, *dict(stream)] == list(expected)
+        assert list(Elaborator.to_stream(top, jobs=2)) == list(expected.items())
+
+        Elaborator.to_file(tmp_path / "top.sv", top)
+        assert (tmp_path / "top.sv").read_text() == Elaborator.to_string(top)
+
+    def test_incremental_files(self, tmp_path):
+        class Adder(Module):
+            def __init__(self, width, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", width)
+                self.io += Output("q", width)
+                self.io.q <<= self.io.a + increment
+
+        increment = 1
+
+        class Top(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                inst = Adder(8, name="adder").instance()
+                inst.io.a <<= self.io.a
+                self.io.q <<= inst.io.q
+
+        files = Elaborator.to_files(tmp_path, Top(name="top"), incremental=True, manifest="manifest.json")
+        assert sorted(file.name for file in tmp_path.iterdir()) == ["adder.sv", "manifest.json", "top.sv"]
+        manifest = json.loads((tmp_path / "manifest.json").read_text())
+        assert manifest["modules"]["top"]["file"] == "top.sv"
+        assert manifest["modules"]["top"]["submodules"] == ["adder"]
+        assert manifest["files"]["adder.sv"]["modules"] == ["adder"]
+        for file in files:
+            assert manifest["files"][file.name]["sha256"] == hashlib.sha256(file.read_bytes()).hexdigest()
+            os.utime(file, ns=(0, 0))
+        os.utime(tmp_path / "manifest.json", ns=(0, 0))
+
+        # Only the changed module is written
+        Elaborator.to_files(tmp_path, Top(name="top"), incremental=True, manifest="manifest.json")
+        assert (tmp_path / "manifest.json").stat().st_mtime_ns == 0
+        increment = 2
+        Elaborator.to_files(tmp_path, Top(name="top"), incremental=True, manifest="manifest.json")
+        assert (tmp_path / "top.sv").stat().st_mtime_ns == 0
+        assert (tmp_path / "adder.sv").stat().st_mtime_ns != 0
+        assert (tmp_path / "manifest.json").stat().st_mtime_ns != 0
+        assert "8'h02" in (tmp_path / "adder.sv").read_text()
+        assert len(list(tmp_path.iterdir())) == 3, "Temporary files are removed."
+
+    def test_elaboration_cache(self, tmp_path):
+        class Adder(Module):
+            def __init__(self, width, offset, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", width)
+                self.io += Output("q", width)
+                self.io.q <<= self.io.a + offset
+
+        class Top(Module):
+            def __init__(self, offset, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                inst = Adder(8, offset, name="adder").instance()
+                inst.io.a <<= self.io.a
+                self.io.q <<= inst.io.q
+
+        top = Top(1, name="top")
+        expected = Elaborator.to_dict(top)
+        assert Elaborator.to_dict(top, cache_dir=tmp_path) == expected
+        assert Elaborator.elaboration_cache.stats == PoolStats(hits=0, misses=2)
+        assert Elaborator.to_dict(top, cache_dir=tmp_path, jobs=2) == expected
+        assert Elaborator.elaboration_cache.stats == PoolStats(hits=2, misses=0)
+
+        # Modules with the same name but different structure are elaborated again.
+        changed = Top(2, name="top")
+        changed_expected = Elaborator.to_dict(changed)
+        assert Elaborator.to_dict(changed, cache_dir=tmp_path) == changed_expected
+        assert Elaborator.elaboration_cache.stats == PoolStats(hits=0, misses=2)
+
+        # Least recently used entries are evicted
+        cache = ElaborationCache(tmp_path, max_size=sum(len(sv_code) for sv_code in expected.values()))
+        Elaborator.to_dict(top, cache_dir=cache)
+        assert len(cache) == 2
+        assert cache.stats == PoolStats(hits=2, misses=0)
+
+    def test_elaboration_cache_overrides(self, tmp_path, monkeypatch):
+        monkeypatch.syspath_prepend(str(tmp_path))
+        design = tmp_path / "override_design.py"
+        source = (
+            "from magia import Input, Module, Output\n"
+            "class Header(Module):\n"
+            "    def __init__(self, **kwargs):\n"
+            "        super().__init__(**kwargs)\n"
+            "        self.io += Input('a', 8)\n"
+            "        self.io += Output('q', 8)\n"
+            "        self.io.q <<= self.io.a\n"
+            "    def mod_declaration(self):\n"
+            "        return '// {}\\n' + super().mod_declaration()\n"
+        )
+        cache_dir = tmp_path / "cache"
+        try:
+            design.write_text(source.format("first"))
+            module = importlib.import_module("override_design")
+            assert "// first" in Elaborator.to_string(module.Header(name="header"), cache_dir=cache_dir)
+
+            # The code changes with the overriding method, though the traced structure is the same
+            design.write_text(source.format("second"))
+            module = importlib.reload(module)
+            sv_code = Elaborator.to_string(module.Header(name="header"), cache_dir=cache_dir)
+            assert "// second" in sv_code
+            assert Elaborator.elaboration_cache.stats == PoolStats(hits=0, misses=1)
+            assert Elaborator.to_string(module.Header(name="header"), cache_dir=cache_dir) == sv_code
+            assert Elaborator.elaboration_cache.stats == PoolStats(hits=1, misses=0)
+        finally:
+            sys.modules.pop("override_design", None)
+
+    def test_dedup_elaboration(self):
+        class Adder(Module):
+            def __init__(self, width, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", width)
+                self.io += Output("q", width)
+                self.io.q <<= self.io.a + 1
+
+        class Chain(Module):
+            def __init__(self, width, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", width)
+                self.io += Output("q", width)
+                prev = self.io.a
+                for _ in range(2):
+                    inst = Adder(width).instance()
+                    inst.io.a <<= prev
+                    prev = inst.io.q
+                self.io.q <<= prev
+
+        class Top(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                self.io += Output("r", 4)
+                prev = self.io.a
+                for _ in range(3):
+                    inst = Chain(8).instance()
+                    inst.io.a <<= prev
+                    prev = inst.io.q
+                self.io.q <<= prev
+                inst = Chain(4).instance()
+                inst.io.a <<= self.io.a[3:0]
+                self.io.r <<= inst.io.q
+
+        top = Top()
+        assert len(Elaborator.to_dict(top)) == 1 + 4 + 8
+        result = Elaborator.to_dict(top, dedup=True)
+        assert sorted(Elaborator.name_to_module[name].params.get("width", 0) for name in result) == [0, 4, 4, 8, 8]
+
+        # The instantiations refer to the surviving modules, while the design is not modified.
+        _, insts = top.trace(top._trace_roots())
+        instantiated = re.findall(r"^(?!module )(\w+) (\w+) \(", result[top.name], re.M)
+        assert [inst_name for _, inst_name in instantiated] == [inst.name for inst in insts]
+        assert {module_name for module_name, _ in instantiated} <= result.keys()
+        assert len(Elaborator.to_dict(top)) == 1 + 4 + 8
+        assert Elaborator.to_dict(top, dedup=True, jobs=2) == result
+
+    def test_sweep(self, tmp_path):
+        class Adder(Module):
+            def __init__(self, width, depth=1, **kwargs):
+                super().__init__(**kwargs)
+                if width > 16:
+                    raise ValueError("Width is too large")
+                self.io += Input("a", width)
+                self.io += Output("q", width)
+                net = self.io.a
+                for i in range(depth):
+                    net = net + i
+                self.io.q <<= net
+
+        points = list(sweep(Adder, {"width": [8, 16, 32], "depth": [1, 4]}, jobs=2))
+        assert sorted(point.index for point in points) == list(range(6))
+        failed = [point for point in points if not point.ok]
+        assert [point.params["width"] for point in failed] == [32, 32]
+        assert "Width is too large" in failed[0].error
+
+        point = next(point for point in points if point.params == {"width": 16, "depth": 4})
+        assert point.spec["parameters"][0]["value"] == 16
+        assert point.stats["Operation"] == 4
+        assert point.stats["modules"] == len(point.sv_code) == 1
+        assert point.timing["construct"] > 0 and point.timing["elaborate"] > 0
+        with Module.naming_by_params():
+            parallel = next(sweep(Adder, [{"width": 16, "depth": 4}], jobs=2))
+            serial = next(sweep(Adder, [{"width": 16, "depth": 4}]))
+        assert parallel.sv_code == serial.sv_code
+
+        rows = table(points, tmp_path / "sweep.csv")
+        assert [row["index"] for row in rows] == list(range(6))
+        assert (tmp_path / "sweep.csv").read_text().startswith("index,width,depth,")
+
+    def test_profile_elaboration(self, tmp_path):
+        class Adder(Module):
+            def __init__(self, width, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", width)
+                self.io += Output("q", width)
+                self.io.q <<= self.io.a + 1
+
+        class Top(Module):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                prev = self.io.a
+                for width in (8, 8):
+                    inst = Adder(width).instance()
+                    inst.io.a <<= prev
+                    prev = inst.io.q
+                self.io.q <<= prev
+
+        top = Top(name="top")
+        for jobs in (1, 2):
+            with Elaborator.profile() as profiler:
+                result = Elaborator.to_dict(top, jobs=jobs)
+            assert [record.name for record in profiler.modules] == list(result)
+            assert all(record.emitted_bytes == len(result[record.name]) for record in profiler.modules)
+            assert profiler.modules[0].objects == {"Input": 1, "Output": 1, "Instance": 2, "Signal": 2}
+
+        profile = json.loads(profiler.to_json(tmp_path / "profile.json"))
+        assert profile == json.loads((tmp_path / "profile.json").read_text())
+        assert list(profile["phases"]) == list(PHASES)
+        assert profile["total"] == pytest.approx(sum(profile["phases"].values()))
+
+        # Nothing is recorded outside the context.
+        Elaborator.to_dict(top)
+        assert len(profiler.modules) == len(result)
+
+    def test_freeze_module(self):
+        class Adder(Module):
+            def __init__(self, width, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", width, description="Operand")
+                self.io += Output("q", width)
+                self.io.q <<= self.io.a + 1
+
+        class Top(Module):
+            def __init__(self, adder, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                self.inst = adder.instance()
+                self.inst.io.a <<= self.io.a
+                self.io.q <<= self.inst.io.q
+
+        adder = Adder(8, name="adder")
+        top = Top(adder, name="top")
+        spec = top.spec
+        inst = weakref.ref(top.inst)
+        expected = Elaborator.to_dict(top)
+        assert Elaborator.to_dict(top, freeze=True) == expected
+        assert top.frozen is not None and adder.frozen is not None
+        assert top.frozen.submodules == {adder}
+        assert top.spec == spec
+        assert not hasattr(top, "inst")
+        gc.collect()
+        assert inst() is None, "Objects of the frozen module are released."
+
+        # Frozen modules elaborate to the same code, and can be instantiated again.
+        assert Elaborator.to_dict(top) == expected
+        assert Elaborator.to_dict(top, dedup=True) == expected
+        assert Elaborator.to_dict(Top(adder, name="top2"))["adder"] == expected["adder"]
+        assert adder.freeze() is adder.frozen
+
+    def test_deterministic_naming(self):
+        class Adder(Module):
+            def __init__(self, width, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", width)
+                self.io += Output("q", width)
+                self.io.q <<= (self.io.a + 1) + self.io.a
+
+        class Top(Module):
+            def __init__(self, widths, **kwargs):
+                super().__init__(**kwargs)
+                self.io += Input("a", 8)
+                self.io += Output("q", 8)
+                net = self.io.a
+                for width in widths:
+                    inst = Adder(width).instance()
+                    inst.io.a <<= net
+                    net = inst.io.q
+                self.io.q <<= net
+
+        # Names are allocated by the module, regardless of the objects constructed elsewhere.
+        first, second = Adder(8), Adder(8)
+        assert first.name != second.name
+        assert [sig.name for sig in first.trace(first._trace_roots())[0]] == ["const_0", "net_0", "net_1"]
+        assert Elaborator.to_string(first, top_only=True) == \
+            Elaborator.to_string(second, top_only=True).replace(second.name, first.name)
+
+        # Same specializations share the same name
+        with Module.naming_by_params():
+            result = Elaborator.to_dict(Top((8, 4, 8), name="top"))
+            assert Adder(8).name == Adder(8).name != Adder(4).name
+            assert Adder(8).name.startswith("Adder_")
+        assert len(result) == 3
+        with Module.naming_by_params():
+            assert Elaborator.to_dict(Top((8, 4, 8), name="top")) == result
+            # Parameters without a deterministic representation fall back to numbering
+            assert Top(iter((8, 4)), name="top").name == "top"
+            assert Top(iter((8, 4))).name != Top(iter((8, 4))).name
+        assert Adder(8).name != Adder(8).name
+        with pytest.raises(ValueError), Module.naming_by_params():
+            raise ValueError
+        # Modules of different specializations must not share a name
+        with pytest.raises(ValueError, match="name conflict"):
+            Elaborator.to_dict(Adder(8, name="adder"), Adder(4, name="adder"))
+        assert Adder(8).name != Adder(8).name
+
 
 def test_module_io_definition():
     io_set_1 = IOPorts()